@@ -0,0 +1,81 @@
+"""
+Auth benchmark
+--------------
+
+Per-call cost of the authentication dependency chain.
+
+``decode`` is a cold ``verify_access_token`` (token cache emptied before
+every call, full HMAC verification and claim parsing), ``cached`` a warm
+one, and ``chain`` a warm ``verify_access_token`` followed by
+``get_current_user_entry`` served from the user cache, i.e. everything
+``/me`` does before building the response.
+
+Usage::
+
+    SECRET_KEY=... python -m benchmarks.auth [--calls 50000]
+
+"""
+
+
+import argparse
+import asyncio
+import time
+from typing import Awaitable, Callable
+from fast_python_api.auth.user_auth import (
+    get_current_user_entry, token_cache, verify_access_token
+)
+from fast_python_api.database import async_engine, async_session
+from fast_python_api.models import Base
+from benchmarks.me import make_token
+from benchmarks.serialization import make_users
+
+
+async def measure(func: Callable[[], Awaitable], calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        await func()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+async def run(calls: int) -> None:
+    async_engine.echo = False
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    user = make_users(1)[0]
+    async with async_session() as session:
+        session.add(user)
+        await session.commit()
+    token = make_token(user.id, user.login.username)
+
+    async def decode():
+        token_cache.clear()
+        return await verify_access_token(token)
+
+    async def cached():
+        return await verify_access_token(token)
+
+    async with async_session() as session:
+        async def chain():
+            claims = await verify_access_token(token)
+            return await get_current_user_entry(claims, session)
+
+        results = [
+            ("decode", await measure(decode, calls)),
+            ("cached", await measure(cached, calls)),
+            ("chain", await measure(chain, calls)),
+        ]
+    print(f"{'step':>8} {'us/call':>10}")
+    for name, cost in results:
+        print(f"{name:>8} {cost:>10.2f}")
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[4])
+    parser.add_argument("--calls", type=int, default=50000)
+    args = parser.parse_args()
+    asyncio.run(run(args.calls))
+
+
+if __name__ == "__main__":
+    main()
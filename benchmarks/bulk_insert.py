@@ -0,0 +1,105 @@
+"""
+Bulk insert benchmark
+---------------------
+
+Throughput of ``create_user_bulk``, the insert behind ``POST /import``,
+and of the chunked updates and deletes behind ``PATCH`` and ``DELETE
+/users/bulk``, in users per second.
+
+Every run inserts ``--rows`` new users into an empty database, then
+inserts the same users again, which are all skipped as conflicts, then
+updates and finally deletes all of them ``BULK_CHUNK_SIZE`` at a time. Runs
+against an in-memory SQLite database unless ``--url`` points elsewhere,
+e.g. a local ``postgresql+asyncpg://`` database whose ``users``,
+``logins`` and ``names`` tables may be emptied.
+
+Usage::
+
+    python -m benchmarks.bulk_insert [--rows 50000] [--url URL]
+
+"""
+
+
+import argparse
+import asyncio
+import time
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import (
+    AsyncSession, create_async_engine, async_sessionmaker
+)
+from fast_python_api.chemas.user_db import UserInDB
+from fast_python_api.database import enable_sqlite_foreign_keys
+from fast_python_api.models import Base, User
+from fast_python_api.chemas.user_crud import BulkUserChanges
+from fast_python_api.core.bulk import ChunkAction
+from fast_python_api.core.user_crud import (
+    create_user_bulk, delete_users_chunk, update_users_chunk
+)
+from fast_python_api.settings import settings
+from benchmarks.serialization import make_users
+
+
+async def timed(users: list[UserInDB], session: AsyncSession) -> float:
+    start = time.perf_counter()
+    result = await create_user_bulk(users, session)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{result['inserted']:>9} inserted {result['skipped']:>9} skipped "
+        f"{len(users) / elapsed:>10.0f} users/s"
+    )
+    return elapsed
+
+
+async def timed_chunks(
+        label: str,
+        action: ChunkAction,
+        user_ids: list[str],
+        session: AsyncSession
+) -> float:
+    size = settings.BULK_CHUNK_SIZE
+    start = time.perf_counter()
+    for offset in range(0, len(user_ids), size):
+        await action(user_ids[offset:offset + size], session)
+    elapsed = time.perf_counter() - start
+    print(f"{len(user_ids):>9} {label:<18} {len(user_ids) / elapsed:>10.0f} "
+          "users/s")
+    return elapsed
+
+
+async def update_chunk(
+        user_ids: list[str], session: AsyncSession
+) -> set[str]:
+    return await update_users_chunk(
+        user_ids, BulkUserChanges(city="Oslo", role="archived"), session
+    )
+
+
+async def run(rows: int, url: str) -> None:
+    engine = create_async_engine(url)
+    enable_sqlite_foreign_keys(engine.sync_engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+        await conn.execute(delete(User))
+    users = [
+        UserInDB.model_validate(user) for user in make_users(rows)
+    ]
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        await timed(users, session)
+        await timed(users, session)
+        user_ids = [user.id for user in users]
+        await timed_chunks("updated", update_chunk, user_ids, session)
+        await timed_chunks("deleted", delete_users_chunk, user_ids, session)
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[4])
+    parser.add_argument("--rows", type=int, default=50000)
+    parser.add_argument("--url", default="sqlite+aiosqlite:///:memory:")
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.url))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+External HTTP client benchmark
+------------------------------
+
+Latency of requests to a local stand-in for the external user service,
+with a new ``aiohttp`` session per request (``per-request``) and with
+the shared session of ``http_client`` (``shared``), which keeps its
+connections alive between requests.
+
+With ``--tls`` the stand-in serves HTTPS with a throwaway self-signed
+certificate made by the ``openssl`` command, so the per-request numbers
+include a TLS handshake as they do against the real service.
+
+Usage::
+
+    SECRET_KEY=... python -m benchmarks.http_client [--requests 500]
+        [--tls]
+
+"""
+
+
+import argparse
+import asyncio
+import os
+import ssl
+import subprocess
+import tempfile
+import time
+from aiohttp import ClientSession, web
+from fast_python_api.services.http import get_http_session, http_client
+from fast_python_api.settings import settings
+
+
+PAYLOAD = {
+    "results": [],
+    "info": {"seed": "bench", "results": 0, "page": 1, "version": "1.4"},
+}
+
+
+async def users(request: web.Request) -> web.Response:
+    return web.json_response(PAYLOAD)
+
+
+def make_ssl_context(directory: str) -> ssl.SSLContext:
+    cert = os.path.join(directory, "cert.pem")
+    key = os.path.join(directory, "key.pem")
+    subprocess.run(
+        [
+            "openssl", "req", "-x509", "-newkey", "rsa:2048", "-nodes",
+            "-keyout", key, "-out", cert, "-days", "1",
+            "-subj", "/CN=127.0.0.1",
+        ],
+        check=True, capture_output=True
+    )
+    context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    context.load_cert_chain(cert, key)
+    return context
+
+
+async def fetch(session: ClientSession, url: str) -> None:
+    async with session.get(url, params={"results": "5"}, ssl=False) as resp:
+        await resp.json()
+
+
+async def timed(label: str, url: str, requests: int) -> None:
+    start = time.perf_counter()
+    for _ in range(requests):
+        # The session the endpoints get: a new one per request unless
+        # http_client is started, as by the app lifespan
+        async for session in get_http_session():
+            await fetch(session, url)
+    elapsed = time.perf_counter() - start
+    print(
+        f"{label:<12} {requests / elapsed:>10.0f} req/s "
+        f"{elapsed / requests * 1000:>8.2f} ms/request"
+    )
+
+
+async def run(requests: int, tls: bool) -> None:
+    app = web.Application()
+    app.router.add_get("/api", users)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    with tempfile.TemporaryDirectory() as directory:
+        context = make_ssl_context(directory) if tls else None
+        site = web.TCPSite(runner, "127.0.0.1", 0, ssl_context=context)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        scheme = "https" if tls else "http"
+        url = f"{scheme}://127.0.0.1:{port}/api"
+        print(f"{requests} sequential requests to {url}, "
+              f"pool limit {settings.HTTP_POOL_LIMIT}")
+        await timed("per-request", url, requests)
+        http_client.start()
+        await timed("shared", url, requests)
+        await http_client.close()
+    await runner.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[4])
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--tls", action="store_true")
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.tls))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+/me benchmark
+-------------
+
+Requests per second of ``GET /me`` in one worker, served from the user
+cache (``hit``) and with the cache emptied before every request
+(``miss``).
+
+Requests are passed straight to the ASGI app, so the numbers include
+routing, token verification and the handler, but no HTTP parsing or
+network I/O. The database is the one of ``DATABASE_URL``, by default
+an in-memory SQLite one.
+
+Usage::
+
+    SECRET_KEY=... python -m benchmarks.me [--requests 20000]
+
+"""
+
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+import jwt
+from fast_python_api.core.cache import user_cache
+from fast_python_api.database import async_engine, async_session
+from fast_python_api.main import app
+from fast_python_api.models import Base
+from fast_python_api.settings import settings
+from benchmarks.serialization import make_users
+
+
+def make_token(user_id: str, username: str) -> str:
+    payload = {
+        "sub": username,
+        "role": "user",
+        "id": user_id,
+        "exp": datetime.now(timezone.utc) + timedelta(hours=1),
+    }
+    return jwt.encode(
+        payload, settings.SECRET_KEY, algorithm=settings.ALGORITHM
+    )
+
+
+async def call(scope: dict) -> int:
+    status = 0
+
+    async def receive() -> dict:
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message: dict) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+async def measure(scope: dict, requests: int, clear: bool) -> float:
+    start = time.perf_counter()
+    for _ in range(requests):
+        if clear:
+            await user_cache.clear()
+        assert await call(scope) == 200
+    return requests / (time.perf_counter() - start)
+
+
+async def run(requests: int) -> None:
+    async_engine.echo = False
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    user = make_users(1)[0]
+    async with async_session() as session:
+        session.add(user)
+        await session.commit()
+
+    token = make_token(user.id, user.login.username)
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/me",
+        "raw_path": b"/me",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"authorization", f"Bearer {token}".encode())],
+        "client": ("127.0.0.1", 12345),
+        "server": ("127.0.0.1", 8000),
+    }
+
+    miss = await measure(scope, max(requests // 10, 1), clear=True)
+    await measure(scope, 100, clear=False)
+    hit = await measure(scope, requests, clear=False)
+    print(f"{'path':>6} {'req/s':>10}")
+    print(f"{'miss':>6} {miss:>10.0f}")
+    print(f"{'hit':>6} {hit:>10.0f}")
+    await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[4])
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Read path benchmark
+-------------------
+
+Throughput of a ``GET /users/`` page built from ORM objects versus one
+built from plain Core rows.
+
+``orm`` loads ``User`` objects with their name and login joined in and
+serializes them through ``UserPublic``. ``core`` is the current path of
+``GET /users/``: ``get_user_rows`` selects explicit columns, mapped
+straight into payloads and rendered with orjson. Both run against an
+in-memory SQLite database.
+
+Usage::
+
+    python -m benchmarks.read_path [--rows 10000] [--repeat 5]
+
+"""
+
+
+import argparse
+import asyncio
+import json
+import time
+from typing import Awaitable, Callable
+from sqlalchemy import select
+from sqlalchemy.orm import joinedload
+from sqlalchemy.ext.asyncio import (
+    AsyncSession, create_async_engine, async_sessionmaker
+)
+from fast_python_api.core.projection import PUBLIC_FIELDS, to_payload
+from fast_python_api.core.user_db import get_user_rows
+from fast_python_api.models import Base, User
+from fast_python_api.responses import ORJSONResponse
+from benchmarks.serialization import adapter, make_users
+
+
+async def orm(session: AsyncSession, limit: int) -> bytes:
+    result = await session.execute(
+        select(User)
+        .options(joinedload(User.login), joinedload(User.name))
+        .order_by(User.created_at, User.id)
+        .limit(limit)
+    )
+    users = result.scalars().all()
+    session.expunge_all()
+    return adapter(users)
+
+
+async def core(session: AsyncSession, limit: int) -> bytes:
+    rows = await get_user_rows(session, PUBLIC_FIELDS, limit=limit)
+    return ORJSONResponse(
+        [to_payload(row, PUBLIC_FIELDS) for row in rows]
+    ).body
+
+
+async def measure(
+        func: Callable[[AsyncSession, int], Awaitable[bytes]],
+        sessionmaker: async_sessionmaker,
+        rows: int,
+        repeat: int
+) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        async with sessionmaker() as session:
+            start = time.perf_counter()
+            await func(session, rows)
+            best = min(best, time.perf_counter() - start)
+    return best
+
+
+async def run(rows: int, repeat: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    sessionmaker = async_sessionmaker(engine, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with sessionmaker() as session:
+        session.add_all(make_users(rows))
+        await session.commit()
+
+    async with sessionmaker() as session:
+        assert json.loads(await orm(session, rows)) == json.loads(
+            await core(session, rows)
+        )
+    old = await measure(orm, sessionmaker, rows, repeat)
+    new = await measure(core, sessionmaker, rows, repeat)
+    print(f"{'rows':>8} {'orm pages/s':>12} {'core pages/s':>13}"
+          f" {'speedup':>8}")
+    print(f"{rows:>8} {1 / old:>12.2f} {1 / new:>13.2f}"
+          f" {old / new:>7.1f}x")
+    await engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[4])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
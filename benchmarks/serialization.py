@@ -0,0 +1,120 @@
+"""
+Serialization benchmark
+-----------------------
+
+Per-user cost of turning ``User`` ORM objects into a JSON response body.
+
+``legacy`` reproduces the former path: ``User.to_dict()`` ->
+``UserPublic(**dict)`` -> re-validation against the return annotation ->
+``jsonable_encoder`` -> ``json.dumps``. ``adapter`` is the path of
+``fast_python_api.responses.user_response`` applied to a list: one
+``from_attributes`` validation through a cached ``TypeAdapter`` and
+``dump_json``.
+
+Usage::
+
+    python -m benchmarks.serialization [--sizes 1000 10000] [--repeat 5]
+
+"""
+
+
+import argparse
+import json
+import time
+import uuid
+from datetime import date, datetime, timezone
+from typing import Any, Callable
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from fast_python_api.chemas.user_crud import UserPublic
+from fast_python_api.models import User, Login, Name
+
+
+users_adapter = TypeAdapter(list[UserPublic])
+
+
+def make_users(count: int) -> list[User]:
+    users = []
+    for i in range(count):
+        user_id = str(uuid.uuid4())
+        user = User(
+            id=user_id,
+            dob=date(1990, 1, 1 + i % 28),
+            city=f"City {i % 50}",
+            email=f"user{i}@example.com",
+            created_at=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        )
+        user.name = Name(
+            user_id=user_id, title="Mr", first_name=f"First{i}",
+            last_name=f"Last{i}"
+        )
+        user.login = Login(
+            uuid=user_id, username=f"user{i}", role="user",
+            password="x" * 60
+        )
+        users.append(user)
+    return users
+
+
+def _to_dict(user: User) -> dict[str, Any]:
+    return {
+        "id": user.id,
+        "dob": user.dob,
+        "city": user.city,
+        "email": user.email,
+        "created_at": user.created_at,
+        "name": {
+            "title": user.name.title,
+            "first_name": user.name.first_name,
+            "last_name": user.name.last_name,
+        },
+        "login": {
+            "uuid": user.login.uuid,
+            "role": user.login.role,
+            "username": user.login.username,
+            "password": user.login.password,
+        },
+    }
+
+
+def legacy(users: list[User]) -> bytes:
+    models = [UserPublic(**_to_dict(user)) for user in users]
+    revalidated = users_adapter.validate_python(
+        [model.model_dump() for model in models]
+    )
+    return json.dumps(jsonable_encoder(revalidated)).encode()
+
+
+def adapter(users: list[User]) -> bytes:
+    models = users_adapter.validate_python(users, from_attributes=True)
+    return users_adapter.dump_json(models)
+
+
+def measure(func: Callable[[list[User]], bytes], users: list[User],
+            repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(users)
+        best = min(best, time.perf_counter() - start)
+    return best / len(users) * 1e6
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[4])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"{'users':>8} {'legacy us/user':>16} {'adapter us/user':>16}"
+          f" {'speedup':>8}")
+    for size in args.sizes:
+        users = make_users(size)
+        assert json.loads(legacy(users)) == json.loads(adapter(users))
+        old = measure(legacy, users, args.repeat)
+        new = measure(adapter, users, args.repeat)
+        print(f"{size:>8} {old:>16.2f} {new:>16.2f} {old / new:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
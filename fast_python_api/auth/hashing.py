@@ -1,7 +1,45 @@
+import asyncio
+import multiprocessing
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Sequence
 from passlib.context import CryptContext
+from fast_python_api.settings import settings
 
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+#: Schemes passwords can be hashed with, the first one is the default.
+SCHEMES = ("bcrypt", "pbkdf2_sha256")
+
+
+def make_context(scheme: str, rounds: int | None = None) -> CryptContext:
+    """
+    Build the password context hashing with ``scheme`` at ``rounds``.
+
+    Hashes of the other schemes still verify, but are reported by
+    :func:`needs_rehash`, like hashes of another cost when ``rounds`` is
+    set.
+
+    Args:
+        scheme (str): One of :data:`SCHEMES`.
+        rounds (int | None): Cost of the scheme, the log2 rounds for
+            bcrypt and the iterations for PBKDF2. None keeps passlib's
+            default and accepts any cost.
+
+    Returns:
+        CryptContext: The password context.
+    """
+    options = {}
+    if rounds is not None:
+        options = {
+            f"{scheme}__{option}": rounds
+            for option in ("default_rounds", "min_rounds", "max_rounds")
+        }
+    return CryptContext(
+        schemes=SCHEMES, default=scheme, deprecated="auto", **options
+    )
+
+
+pwd_context = make_context(settings.HASH_SCHEME, settings.HASH_ROUNDS)
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -29,3 +67,188 @@ def get_password_hash(password: str) -> str:
         str: The hashed password.
     """
     return pwd_context.hash(password)
+
+
+def get_password_hashes(passwords: Sequence[str]) -> list[str]:
+    """
+    Hash several plain passwords.
+
+    Args:
+        passwords (Sequence[str]): The plain text passwords to hash.
+
+    Returns:
+        list[str]: The hashed passwords, in the same order.
+    """
+    return [pwd_context.hash(password) for password in passwords]
+
+
+def needs_rehash(hashed_password: str) -> bool:
+    """
+    Check whether a hash is of another scheme or cost than configured.
+
+    Args:
+        hashed_password (str): The stored hash.
+
+    Returns:
+        bool: True if the hash should be replaced on the next login.
+    """
+    return pwd_context.needs_update(hashed_password)
+
+
+def _timed(func: Callable[..., Any], *args: Any) -> tuple[float, Any]:
+    # Runs in the worker, time.monotonic is system-wide so the start
+    # stamp is comparable with the submit stamp of the parent process.
+    return time.monotonic(), func(*args)
+
+
+class HashingExecutor:
+    """
+    Dedicated pool for bcrypt work, so hashing never blocks the event loop.
+
+    bcrypt releases the GIL, so a thread pool scales with the number of
+    cores. A process pool is available for hashers that do not.
+
+    Args:
+        kind: ``"thread"`` or ``"process"``.
+        workers: Number of workers of the pool.
+    """
+
+    def __init__(self, kind: str, workers: int) -> None:
+        self.kind = kind
+        self.workers = workers
+        self._pool: Executor | None = None
+        self.in_flight = 0
+        self.completed = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    @property
+    def pool(self) -> Executor:
+        if self._pool is None:
+            if self.kind == "process":
+                # The app runs other threads (e.g. aiosqlite), forking
+                # them is unsafe
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers)
+        return self._pool
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run ``func(*args)`` in the pool and wait for the result.
+
+        Args:
+            func: A picklable function, e.g. :func:`verify_password`.
+            *args: Its arguments.
+
+        Returns:
+            The return value of ``func``.
+        """
+        loop = asyncio.get_running_loop()
+        submitted = time.monotonic()
+        self.in_flight += 1
+        try:
+            started, result = await loop.run_in_executor(
+                self.pool, _timed, func, *args
+            )
+        finally:
+            self.in_flight -= 1
+        wait = max(started - submitted, 0.0)
+        self.completed += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+        return result
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+    def stats(self) -> dict[str, Any]:
+        """Queue depth and wait times, for the metrics endpoint."""
+        return {
+            "executor": self.kind,
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": max(self.in_flight - self.workers, 0),
+            "completed": self.completed,
+            "wait_avg_ms": (
+                self.wait_total / self.completed * 1000
+                if self.completed else 0.0
+            ),
+            "wait_max_ms": self.wait_max * 1000,
+        }
+
+
+#: Pool used by the async hashing helpers.
+hashing_executor = HashingExecutor(
+    settings.HASH_EXECUTOR, settings.HASH_WORKERS
+)
+
+#: Pool of batch hashing, so logins never queue behind a bulk import.
+bulk_hashing_executor = HashingExecutor(
+    settings.HASH_EXECUTOR, settings.BULK_HASH_WORKERS
+)
+
+
+async def verify_password_async(
+        plain_password: str, hashed_password: str
+) -> bool:
+    """
+    Verify a password like :func:`verify_password`, off the event loop.
+
+    Args:
+        plain_password (str): The plain text password to verify.
+        hashed_password (str): The hashed password to compare against.
+
+    Returns:
+        bool: True if the password matches, False otherwise.
+    """
+    return await hashing_executor.run(
+        verify_password, plain_password, hashed_password
+    )
+
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    Hash a password like :func:`get_password_hash`, off the event loop.
+
+    Args:
+        password (str): The plain text password to hash.
+
+    Returns:
+        str: The hashed password.
+    """
+    return await hashing_executor.run(get_password_hash, password)
+
+
+async def get_password_hashes_async(passwords: Sequence[str]) -> list[str]:
+    """
+    Hash many passwords concurrently on ``bulk_hashing_executor``.
+
+    The passwords are hashed in slices of ``BULK_HASH_SLICE``, with at
+    most one slice per worker submitted at a time, so the pool queue
+    stays short however large the batch is.
+
+    Args:
+        passwords (Sequence[str]): The plain text passwords to hash.
+
+    Returns:
+        list[str]: The hashed passwords, in the same order.
+    """
+    size = settings.BULK_HASH_SLICE
+    slots = asyncio.Semaphore(bulk_hashing_executor.workers)
+
+    async def hash_slice(start: int) -> list[str]:
+        async with slots:
+            return await bulk_hashing_executor.run(
+                get_password_hashes, list(passwords[start:start + size])
+            )
+
+    chunks = await asyncio.gather(*(
+        hash_slice(start) for start in range(0, len(passwords), size)
+    ))
+    return [hashed for chunk in chunks for hashed in chunk]
@@ -0,0 +1,118 @@
+import asyncio
+import time
+from typing import Any, Callable
+from sqlalchemy import delete, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from fast_python_api.database import async_session
+from fast_python_api.logging_config import logger
+from fast_python_api.models import RevokedToken
+
+
+class RevocationList:
+    """
+    IDs (``jti``) of refresh tokens that can no longer be used.
+
+    Lookups only touch an in-memory dict of ``jti -> exp``. The
+    ``revoked_tokens`` table is the copy shared by all workers:
+    :meth:`revoke` writes to it first, and its primary key makes
+    exchanging a refresh token one-time even across workers.
+    :meth:`sync` periodically reloads the revocations of other workers and
+    drops the expired ones, an expired token is rejected by its ``exp``
+    claim anyway.
+
+    Args:
+        timer: Wall clock in seconds since the epoch, replaceable in tests.
+    """
+
+    def __init__(self, timer: Callable[[], float] = time.time) -> None:
+        self.timer = timer
+        self._revoked: dict[str, int] = {}
+        self._syncer: asyncio.Task | None = None
+        self.synced = 0
+
+    def __contains__(self, jti: str) -> bool:
+        return jti in self._revoked
+
+    def __len__(self) -> int:
+        return len(self._revoked)
+
+    async def revoke(
+            self, jti: str, expires_at: int, session: AsyncSession
+    ) -> bool:
+        """
+        Revoke a refresh token.
+
+        Args:
+            jti: The ``jti`` claim of the token.
+            expires_at: The ``exp`` claim of the token.
+            session: The database session.
+
+        Returns:
+            False if the token was already revoked, here or by another
+            worker, otherwise True.
+        """
+        if jti in self._revoked:
+            return False
+        try:
+            async with session.begin_nested():
+                session.add(RevokedToken(jti=jti, expires_at=expires_at))
+        except IntegrityError:
+            revoked = False
+        else:
+            await session.commit()
+            revoked = True
+        self._revoked[jti] = expires_at
+        return revoked
+
+    async def sync(self, session: AsyncSession) -> None:
+        """
+        Replace the in-memory list with the unexpired rows of the table.
+
+        Args:
+            session: The database session.
+        """
+        now = int(self.timer())
+        await session.execute(
+            delete(RevokedToken).where(RevokedToken.expires_at <= now)
+        )
+        await session.commit()
+        rows = await session.execute(
+            select(RevokedToken.jti, RevokedToken.expires_at)
+        )
+        revoked = dict(rows.tuples().all())
+        # Keep revocations recorded while the rows were read
+        revoked.update(
+            (jti, exp) for jti, exp in self._revoked.items() if exp > now
+        )
+        self._revoked = revoked
+        self.synced += 1
+
+    async def _run(self, interval: float) -> None:
+        while True:
+            try:
+                async with async_session() as session:
+                    await self.sync(session)
+            except Exception:
+                logger.exception("Syncing revoked tokens failed")
+            await asyncio.sleep(interval)
+
+    def start(self, interval: float) -> None:
+        """Sync now and then every ``interval`` seconds in the background."""
+        self._syncer = asyncio.create_task(self._run(interval))
+
+    async def close(self) -> None:
+        if self._syncer is not None:
+            self._syncer.cancel()
+            await asyncio.gather(self._syncer, return_exceptions=True)
+            self._syncer = None
+
+    def clear(self) -> None:
+        self._revoked.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {"revoked": len(self._revoked), "synced": self.synced}
+
+
+#: Revoked refresh tokens, shared by the auth routes.
+revocation_list = RevocationList()
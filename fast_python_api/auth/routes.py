@@ -1,13 +1,20 @@
 from typing import Annotated
-from datetime import timedelta
-from fast_python_api.settings import settings
-from fast_python_api.chemas.token import Token
+from fast_python_api.chemas.token import RefreshRequest, Token
 from sqlalchemy.ext.asyncio import AsyncSession
 from fast_python_api.database import get_session
 from fastapi.security import OAuth2PasswordRequestForm
-from fast_python_api.auth.token import create_access_token
-from fastapi import APIRouter, Depends, HTTPException, status
-from fast_python_api.auth.user_auth import authenticate_user
+from fast_python_api.auth.token import create_token_pair
+from fastapi import (
+    APIRouter, BackgroundTasks, Depends, HTTPException, status
+)
+from fast_python_api.auth.revocation import revocation_list
+from fast_python_api.auth.user_auth import (
+    authenticate_user, invalid_credentials, verify_refresh_token
+)
+from fast_python_api.core.user_db import get_cached_user
+from fast_python_api.auth.throttling import (
+    limit_login_attempts, login_admission
+)
 
 
 router = APIRouter(tags=["Auth"])
@@ -20,14 +27,18 @@ router = APIRouter(tags=["Auth"])
                 "The returned token should be used in the Authorization "
                 "header in the Bearer format.",
     response_model=Token,
+    dependencies=[Depends(limit_login_attempts)],
     responses={
         200: {"description": "Token successfully created"},
         401: {"description": "Incorrect username or password"},
+        429: {"description": "Too many attempts for this user or client"},
+        503: {"description": "Too many concurrent logins"},
     }
 )
 async def login_for_access_token(
         form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
-        session: Annotated[AsyncSession, Depends(get_session)]
+        session: Annotated[AsyncSession, Depends(get_session)],
+        background_tasks: BackgroundTasks
 ) -> Token:
     """
     Get access token.
@@ -37,37 +48,118 @@ async def login_for_access_token(
         form_data (OAuth2PasswordRequestForm): The username and password to
             authenticate with.
         session (AsyncSession): The database session to use.
+        background_tasks (BackgroundTasks): Where an outdated password
+            hash is replaced after the response.
     Returns:
-        Token: The access token and its type.
+        Token: The access token, its type and a refresh token.
     Raises:
         HTTPException: If the credentials are invalid, an HTTP 401 error
         is raised with a message "Incorrect username or password".
+        HTTPException: 429 Too Many Requests if the client IP or the
+        username is over its attempt rate.
+        HTTPException: 503 Service Unavailable if the password
+        verification budget and its queue are full.
     Example:
         Request:
         POST /token
         Body: {"username": "user", "password": "pass"}
         Response:
         Status: 200 OK
-        Body: {"access_token": "token", "token_type": "bearer"}
+        Body: {"access_token": "token", "token_type": "bearer",
+               "refresh_token": "token"}
     """
-    user = await authenticate_user(
-        form_data.username, form_data.password, session
-    )
+    async with login_admission.admit():
+        user = await authenticate_user(
+            form_data.username, form_data.password, session,
+            background_tasks
+        )
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    access_token_expires = timedelta(
-        minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
+    return create_token_pair(
+        user.login.username, user.login.role, str(user.login.uuid)
     )
-    access_token = create_access_token(
-        data={
-            "sub": user.login.username,
-            "role": user.login.role,
-            "id": str(user.login.uuid)
-        },
-        expires_delta=access_token_expires
+
+
+@router.post(
+    "/token/refresh",
+    summary="Refresh access token",
+    description="Exchange a refresh token for a new access token and "
+                "refresh token, without the password. "
+                "Every refresh token can be exchanged only once.",
+    response_model=Token,
+    responses={
+        200: {"description": "Tokens successfully created"},
+        401: {"description": "Invalid, expired or revoked refresh token"},
+    }
+)
+async def refresh_access_token(
+        body: RefreshRequest,
+        session: Annotated[AsyncSession, Depends(get_session)]
+) -> Token:
+    """
+    Refresh access token.
+    The refresh token is revoked and a new pair of tokens is issued with
+    the current username and role of the user. No password hash is
+    verified, so this is much cheaper than POST /token.
+    Args:
+        body (RefreshRequest): The refresh token to exchange.
+        session (AsyncSession): The database session to use.
+    Returns:
+        Token: The new access token, its type and the new refresh token.
+    Raises:
+        HTTPException: 401 Unauthorized if the refresh token is invalid,
+        expired or was already used or revoked, or the user no longer
+        exists.
+    Example:
+        Request:
+        POST /token/refresh
+        Body: {"refresh_token": "token"}
+        Response:
+        Status: 200 OK
+        Body: {"access_token": "token", "token_type": "bearer",
+               "refresh_token": "token"}
+    """
+    claims = verify_refresh_token(body.refresh_token)
+    user = await get_cached_user(claims["id"], session)
+    if user is None or not await revocation_list.revoke(
+            claims["jti"], claims["exp"], session
+    ):
+        raise invalid_credentials()
+    return create_token_pair(
+        user.snapshot["login.username"],
+        user.snapshot["login.role"],
+        user.snapshot["id"]
     )
-    return Token(access_token=access_token, token_type="bearer")
+
+
+@router.post(
+    "/token/revoke",
+    summary="Revoke refresh token",
+    description="Revoke a refresh token, e.g. on logout. "
+                "Access tokens already issued stay valid until they expire.",
+    status_code=status.HTTP_204_NO_CONTENT,
+    responses={
+        204: {"description": "Refresh token revoked"},
+        401: {"description": "Invalid or expired refresh token"},
+    }
+)
+async def revoke_refresh_token(
+        body: RefreshRequest,
+        session: Annotated[AsyncSession, Depends(get_session)]
+) -> None:
+    """
+    Revoke refresh token.
+    Revoking an already revoked token is a no-op.
+    Args:
+        body (RefreshRequest): The refresh token to revoke.
+        session (AsyncSession): The database session to use.
+    Raises:
+        HTTPException: 401 Unauthorized if the refresh token is invalid
+        or expired.
+    """
+    claims = verify_refresh_token(body.refresh_token, check_revoked=False)
+    await revocation_list.revoke(claims["jti"], claims["exp"], session)
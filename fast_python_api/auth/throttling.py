@@ -0,0 +1,242 @@
+import asyncio
+import ipaddress
+import math
+import time
+from contextlib import asynccontextmanager
+from typing import Annotated, Any, AsyncIterator, Callable
+from fastapi import Depends, HTTPException, Request, status
+from fastapi.security import OAuth2PasswordRequestForm
+from fast_python_api.core.cache import TTLCache
+from fast_python_api.settings import settings
+
+
+class AdmissionController:
+    """
+    Concurrency budget with a bounded wait queue.
+
+    At most ``limit`` callers run at once and at most ``queue_size`` wait
+    for a slot. Callers beyond that, or waiting longer than ``timeout``,
+    are rejected right away with 503 Service Unavailable, so a burst is
+    shed instead of piling up behind the CPU-bound work.
+
+    Args:
+        limit: Number of callers admitted at once.
+        queue_size: Number of callers allowed to wait for a slot.
+        timeout: Maximum wait for a slot in seconds.
+        retry_after: Value of the ``Retry-After`` header of rejections.
+    """
+
+    def __init__(
+            self,
+            limit: int,
+            queue_size: int,
+            timeout: float,
+            retry_after: int
+    ) -> None:
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._slots = asyncio.Semaphore(limit)
+        self.active = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected = 0
+
+    def _reject(self) -> HTTPException:
+        self.rejected += 1
+        return HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many concurrent logins, try again later",
+            headers={"Retry-After": str(self.retry_after)},
+        )
+
+    @asynccontextmanager
+    async def admit(self) -> AsyncIterator[None]:
+        """
+        Hold a slot for the duration of the ``async with`` block.
+
+        Raises:
+            HTTPException: 503 Service Unavailable if the queue is full or
+            no slot was free within ``timeout``.
+        """
+        if self.active >= self.limit and self.waiting >= self.queue_size:
+            raise self._reject()
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except TimeoutError:
+            raise self._reject()
+        finally:
+            self.waiting -= 1
+        self.active += 1
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._slots.release()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+        }
+
+
+class RateLimiter:
+    """
+    Token buckets keyed by an arbitrary string, e.g. a username or an IP.
+
+    Every bucket holds up to ``burst`` tokens and refills at ``rate``
+    tokens per second. Buckets are kept in a bounded :class:`TTLCache`
+    and expire once they would be full again, a missing bucket is a full
+    one.
+
+    Args:
+        rate: Refill rate in tokens per second.
+        burst: Capacity of a bucket.
+        maxsize: Maximum number of tracked keys.
+        timer: Monotonic clock, replaceable in tests.
+    """
+
+    def __init__(
+            self,
+            rate: float,
+            burst: int,
+            maxsize: int = 100000,
+            timer: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self.timer = timer
+        self.buckets = TTLCache(maxsize, burst / rate, timer)
+        self.limited = 0
+
+    def consume(self, key: str) -> float | None:
+        """
+        Take one token from the bucket of ``key``.
+
+        Args:
+            key: The bucket to take the token from.
+
+        Returns:
+            None if a token was taken, otherwise the seconds until the
+            next token is available.
+        """
+        now = self.timer()
+        tokens, stamp = self.buckets.get(key) or (self.burst, now)
+        tokens = min(self.burst, tokens + (now - stamp) * self.rate)
+        if tokens < 1:
+            self.limited += 1
+            return (1 - tokens) / self.rate
+        self.buckets.set(key, (tokens - 1, now))
+        return None
+
+    def clear(self) -> None:
+        self.buckets.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {"tracked": len(self.buckets), "limited": self.limited}
+
+
+#: Budget of concurrent password verifications on ``/token``.
+login_admission = AdmissionController(
+    settings.LOGIN_CONCURRENCY,
+    settings.LOGIN_QUEUE_SIZE,
+    settings.LOGIN_QUEUE_TIMEOUT,
+    settings.LOGIN_RETRY_AFTER
+)
+
+#: Login attempts per client IP.
+ip_limiter = RateLimiter(
+    settings.LOGIN_IP_RATE_PER_MINUTE / 60, settings.LOGIN_IP_BURST
+)
+
+#: Login attempts per username.
+username_limiter = RateLimiter(
+    settings.LOGIN_USERNAME_RATE_PER_MINUTE / 60,
+    settings.LOGIN_USERNAME_BURST
+)
+
+
+def _is_trusted_proxy(address: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(
+        ip in ipaddress.ip_network(proxy, strict=False)
+        for proxy in settings.TRUSTED_PROXIES
+    )
+
+
+def client_ip(request: Request) -> str:
+    """
+    The address of the client behind the trusted proxies.
+
+    ``X-Forwarded-For`` is only read when the peer is one of
+    ``TRUSTED_PROXIES``. Its entries are walked from the right, the
+    last one appended by a trusted proxy, and the first address that
+    is not a trusted proxy is the client. Entries left of it may be
+    forged by the client and are ignored.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        str: The client address, ``"unknown"`` without a peer.
+    """
+    peer = request.client.host if request.client else "unknown"
+    if not _is_trusted_proxy(peer):
+        return peer
+    forwarded = [
+        address.strip()
+        for header in request.headers.getlist("x-forwarded-for")
+        for address in header.split(",") if address.strip()
+    ]
+    for address in reversed(forwarded):
+        if not _is_trusted_proxy(address):
+            return address
+    return forwarded[0] if forwarded else peer
+
+
+def limit_login_attempts(
+        request: Request,
+        form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
+) -> None:
+    """
+    Reject the login early if its client IP or username is over its rate.
+
+    Runs before the password is verified, so credential stuffing cannot
+    consume the hashing budget. The IP is resolved by :func:`client_ip`.
+
+    Args:
+        request (Request): The incoming request.
+        form_data (OAuth2PasswordRequestForm): The submitted credentials.
+
+    Raises:
+        HTTPException: 429 Too Many Requests with ``Retry-After``.
+    """
+    retry_after = (
+        ip_limiter.consume(client_ip(request))
+        or username_limiter.consume(form_data.username.lower())
+    )
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+def stats() -> dict[str, Any]:
+    """Counters of login throttling, for the metrics endpoint."""
+    return {
+        "admission": login_admission.stats(),
+        "ip": ip_limiter.stats(),
+        "username": username_limiter.stats(),
+    }
@@ -1,5 +1,7 @@
 import jwt
+import secrets
 from typing import Any
+from fast_python_api.chemas.token import Token
 from fast_python_api.settings import settings
 from datetime import datetime, timedelta, timezone
 from fastapi.security import OAuth2PasswordBearer
@@ -40,3 +42,51 @@ def create_access_token(
         to_encode, settings.SECRET_KEY, settings.ALGORITHM
     )
     return encoded_jwt
+
+
+def create_refresh_token(
+        data: dict[str, Any], expires_delta: timedelta | None = None
+) -> str:
+    """
+    Create a refresh token with the provided data.
+
+    The token has ``"type": "refresh"`` so it is never accepted as an
+    access token, and a unique ``jti`` so it can be revoked.
+
+    Args:
+        data (dict[str, Any]): The data to encode in the token.
+        expires_delta (timedelta | None): The time delta before
+        the token expires.
+            If not provided, ``REFRESH_TOKEN_EXPIRE_DAYS`` is used.
+
+    Returns:
+        str: The JWT token.
+    """
+    return create_access_token(
+        {**data, "type": "refresh", "jti": secrets.token_urlsafe(16)},
+        expires_delta or timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    )
+
+
+def create_token_pair(username: str, role: str, user_id: str) -> Token:
+    """
+    Issue a new access token and refresh token for a user.
+
+    Args:
+        username (str): The ``sub`` claim.
+        role (str): The ``role`` claim.
+        user_id (str): The ``id`` claim.
+
+    Returns:
+        Token: The access token, its type and the refresh token.
+    """
+    data = {"sub": username, "role": role, "id": user_id}
+    access_token = create_access_token(
+        data,
+        expires_delta=timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    )
+    return Token(
+        access_token=access_token,
+        token_type="bearer",
+        refresh_token=create_refresh_token(data)
+    )
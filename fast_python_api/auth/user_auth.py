@@ -1,38 +1,114 @@
-from fastapi import HTTPException, Depends, status
+from fastapi import BackgroundTasks, HTTPException, Depends, status
+import hashlib
+import time
 import jwt
 from jwt.exceptions import InvalidTokenError
-from typing import Annotated
+from typing import Annotated, Any
 from fast_python_api.settings import settings
 from fast_python_api.chemas.token import TokenData
 from fast_python_api.auth.token import oauth2_scheme
-from fast_python_api.auth.hashing import verify_password
-from fast_python_api.core.user_db import get_user_by_username
+from fast_python_api.auth.hashing import (
+    get_password_hash_async, needs_rehash, verify_password_async
+)
+from fast_python_api.auth.revocation import revocation_list
+from fast_python_api.core.cache import CachedUser, TTLCache, user_cache
+from fast_python_api.core.user_db import get_cached_user, get_user_in_db
+from sqlalchemy import update
 from sqlalchemy.ext.asyncio import AsyncSession
-from fast_python_api.database import get_session
-from fast_python_api.chemas.user_db import UserInDB
+from fast_python_api.database import async_session, get_session
+from fast_python_api.models import Login
 from fast_python_api.chemas.user_crud import UserPublic
 
 
+#: Validated tokens by digest, as ``(exp, TokenData)``.
+# On the wall clock, as it also checks the ``exp`` claim of the entries
+token_cache = TTLCache(
+    settings.TOKEN_CACHE_SIZE, settings.TOKEN_CACHE_TTL, timer=time.time
+)
+
+
+def invalid_credentials() -> HTTPException:
+    """Build the 401 error returned for unusable credentials."""
+    return HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": "Bearer"},
+    )
+
+
+async def rehash_password(
+        user_id: str, password: str, old_hash: str, session: AsyncSession
+) -> bool:
+    """
+    Replace a stored hash by one of the configured scheme and cost.
+
+    The hash is only replaced if it is still ``old_hash``, so a password
+    changed in the meantime is kept.
+
+    Args:
+        user_id: The ID of the user.
+        password: The plain password the user just logged in with.
+        old_hash: The hash it was verified against.
+        session: The database session.
+
+    Returns:
+        True if the hash was replaced.
+    """
+    new_hash = await get_password_hash_async(password)
+    result = await session.execute(
+        update(Login)
+        .where(Login.uuid == user_id, Login.password == old_hash)
+        .values(password=new_hash)
+    )
+    await session.commit()
+    await user_cache.invalidate(user_id)
+    return result.rowcount == 1
+
+
+async def rehash_password_in_background(
+        user_id: str, password: str, old_hash: str
+) -> None:
+    """Run :func:`rehash_password` in a session of its own."""
+    async with async_session() as session:
+        await rehash_password(user_id, password, old_hash, session)
+
+
 async def authenticate_user(
-        username: str, password: str, session: AsyncSession
+        username: str,
+        password: str,
+        session: AsyncSession,
+        background_tasks: BackgroundTasks | None = None
 ) -> UserPublic | None:
     """
     Authenticate user by username and password.
 
+    The hash is read from the database, it is never kept in
+    ``user_cache``. If it is of another scheme or cost than configured,
+    it is replaced after the response is sent, never inline.
+
     Args:
         username: The username to authenticate.
         password: The password to authenticate.
         session: The database session.
+        background_tasks: Where the rehash is scheduled, if given.
 
     Returns:
         The authenticated user if successful, otherwise None.
     """
-    user = await get_user_by_username(username, session)
+    user = await get_user_in_db(Login.username == username, session)
 
-    if not user or not verify_password(password, user.login.password):
+    if not user or not await verify_password_async(
+            password, user["login"]["password"]
+    ):
         return None
 
-    return UserPublic(**user.to_dict())
+    hashed_password = user["login"]["password"]
+    if background_tasks is not None and needs_rehash(hashed_password):
+        background_tasks.add_task(
+            rehash_password_in_background,
+            user["id"], password, hashed_password
+        )
+    return UserPublic.model_validate(user)
 
 
 async def verify_access_token(
@@ -41,6 +117,9 @@ async def verify_access_token(
     """
     Verify the provided access token and extract user information.
 
+    Validated tokens are kept in ``token_cache`` until they expire, so
+    repeated requests with the same token skip signature verification.
+
     Args:
         token: The JWT access token to verify.
 
@@ -51,38 +130,81 @@ async def verify_access_token(
         HTTPException: If the token is invalid or the credentials
         cannot be validated.
     """
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": "Bearer"},
-    )
+    key = hashlib.blake2b(token.encode(), digest_size=16).digest()
+    cached = token_cache.get(key)
+    if cached is not None and (
+            cached[0] is None or cached[0] > token_cache.timer()
+    ):
+        return cached[1]
     try:
         payload = jwt.decode(
             token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
         )
-        username: str = payload.get("sub")
-        role: str = payload.get("role")
-        user_id: str = payload.get("id")
-        if username is None:
-            raise credentials_exception
-        return TokenData(username=username, role=role, id=user_id)
     except InvalidTokenError:
-        raise credentials_exception
+        raise invalid_credentials()
+    username: str = payload.get("sub")
+    if username is None or payload.get("type") == "refresh":
+        raise invalid_credentials()
+    token_data = TokenData(
+        username=username, role=payload.get("role"), id=payload.get("id")
+    )
+    token_cache.set(key, (payload.get("exp"), token_data))
+    return token_data
 
 
-async def get_current_user(
+def verify_refresh_token(
+        token: str, check_revoked: bool = True
+) -> dict[str, Any]:
+    """
+    Verify a refresh token and return its claims.
+
+    Args:
+        token: The refresh token to verify.
+        check_revoked: Whether a revoked token is rejected.
+
+    Returns:
+        The claims of the token.
+
+    Raises:
+        HTTPException: 401 Unauthorized if the token is invalid, is not
+        a refresh token or was revoked while ``check_revoked`` is set.
+    """
+    try:
+        payload = jwt.decode(
+            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM],
+            options={"require": ["exp", "jti", "id"]}
+        )
+    except InvalidTokenError:
+        raise invalid_credentials()
+    if payload.get("type") != "refresh":
+        raise invalid_credentials()
+    if check_revoked and payload["jti"] in revocation_list:
+        raise invalid_credentials()
+    return payload
+
+
+async def get_current_user_entry(
         token: Annotated[TokenData, Depends(verify_access_token)],
         session: Annotated[AsyncSession, Depends(get_session)]
-) -> UserInDB | None:  # TODO: Разобраться, что делать с None
+) -> CachedUser:
     """
-    Get the current user by the provided access token.
+    Get the cache entry of the user the access token was issued to.
+
+    The user is looked up by the ID claim, so a cache hit needs no
+    database access at all.
 
     Args:
-    - token: The access token to get the user from.
-    - session: The database session to use.
+        token: Claims of the access token.
+        session: The database session, used on a cache miss.
 
     Returns:
-    - The current user if found, otherwise None.
+        The cache entry of the current user.
+
+    Raises:
+        HTTPException: 401 Unauthorized if the token has no ID or the
+        user no longer exists.
     """
-    user = await get_user_by_username(username=token.username, session=session)
-    return UserInDB(**user.to_dict())
+    user = await get_cached_user(token.id, session) if token.id else None
+    if user is None:
+        raise invalid_credentials()
+    return user
@@ -0,0 +1,28 @@
+from datetime import datetime
+from typing import Literal
+from pydantic import BaseModel, ConfigDict, Field
+
+
+class ImportJobStatus(BaseModel):
+    """Progress of a background import job."""
+    id: str = Field(
+        json_schema_extra={"example": "3fa85f64-5717-4562-b3fc-2c963f66afa6"}
+    )
+    status: Literal["queued", "running", "done", "failed", "cancelled"]
+    requested: int = Field(json_schema_extra={"example": 10000})
+    fetched: int = Field(json_schema_extra={"example": 2400})
+    inserted: int = Field(json_schema_extra={"example": 2395})
+    skipped: int = Field(json_schema_extra={"example": 5})
+    users_per_second: float | None = Field(
+        default=None,
+        description="Users fetched per second while the job was running",
+        json_schema_extra={"example": 480.0}
+    )
+    error: str | None = Field(
+        default=None, json_schema_extra={"example": "External API error"}
+    )
+    created_at: datetime
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    model_config = ConfigDict(from_attributes=True)
@@ -1,5 +1,7 @@
 from pydantic import BaseModel, Field
 from typing import Literal, Optional
+from datetime import date, datetime
+from fast_python_api.settings import settings
 
 
 class RandomUserParams(BaseModel):
@@ -23,3 +25,56 @@ class RandomUserParams(BaseModel):
         description="Nationality of the users",
         json_schema_extra={"example": "GB"},
     )
+
+
+class ImportParams(RandomUserParams):
+    results: int = Field(
+        default=5,
+        ge=1,
+        le=settings.IMPORT_MAX_RESULTS,
+        title="Number of users to import",
+        description="Number of users to import, fetched from the external "
+                    "API in concurrent pages of IMPORT_PAGE_SIZE users",
+        json_schema_extra={"example": 1000},
+    )
+
+
+class UserFilterParams(BaseModel):
+    city: Optional[str] = Field(
+        default=None,
+        description="Only users from this city",
+        json_schema_extra={"example": "New York"},
+    )
+    dob_from: Optional[date] = Field(
+        default=None,
+        description="Only users born on or after this date",
+        json_schema_extra={"example": "1985-01-01"},
+    )
+    dob_to: Optional[date] = Field(
+        default=None,
+        description="Only users born on or before this date",
+        json_schema_extra={"example": "1995-12-31"},
+    )
+    created_from: Optional[datetime] = Field(
+        default=None,
+        description="Only users created at or after this time",
+        json_schema_extra={"example": "2025-02-01T00:00:00"},
+    )
+    created_to: Optional[datetime] = Field(
+        default=None,
+        description="Only users created at or before this time",
+        json_schema_extra={"example": "2025-03-01T00:00:00"},
+    )
+    role: Optional[str] = Field(
+        default=None,
+        description="Only users with this role",
+        json_schema_extra={"example": "admin"},
+    )
+    sort_by: Literal["created_at", "dob", "city", "email"] = Field(
+        default="created_at",
+        description="Field to sort users by",
+    )
+    order: Literal["asc", "desc"] = Field(
+        default="asc",
+        description="Sort direction",
+    )
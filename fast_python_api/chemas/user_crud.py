@@ -1,6 +1,8 @@
 from fast_python_api.chemas.base import UserBase, NameBase, LoginBase
+from fast_python_api.chemas.params import UserFilterParams
 from datetime import datetime, date
-from pydantic import EmailStr
+from typing import Literal
+from pydantic import BaseModel, EmailStr, model_validator
 from pydantic.fields import Field
 from uuid import UUID
 
@@ -88,3 +90,63 @@ class UserUpdate(UserBase):
     )
     name: NameUpdate | None = None
     login: LoginUpdate | None = None
+
+
+class BulkUserStatus(BaseModel):
+    """Outcome of one user of a bulk insert."""
+    id: str = Field(
+        json_schema_extra={"example": "3fa85f64-5717-4562-b3fc-2c963f66afa6"}
+    )
+    username: str = Field(json_schema_extra={"example": "john_doe"})
+    email: str = Field(json_schema_extra={"example": "john.doe@example.com"})
+    status: Literal["inserted", "skipped"]
+    detail: str | None = Field(
+        default=None, json_schema_extra={"example": "Username already taken"}
+    )
+
+
+class BulkInsertResult(BaseModel):
+    """Per-user outcome of a bulk insert, in input order."""
+    inserted: int = Field(json_schema_extra={"example": 4})
+    skipped: int = Field(json_schema_extra={"example": 1})
+    users: list[BulkUserStatus]
+
+
+class BulkSelection(BaseModel):
+    """Users targeted by a bulk update or delete, by ID or by filter."""
+    ids: list[UUID] | None = Field(
+        default=None,
+        json_schema_extra={"example": ["3fa85f64-5717-4562-b3fc-2c963f66afa6"]}
+    )
+    filters: UserFilterParams | None = None
+
+    @model_validator(mode="after")
+    def check_selection(self) -> "BulkSelection":
+        if (self.ids is None) == (self.filters is None):
+            raise ValueError("Exactly one of ids and filters is required")
+        if self.filters is not None and not self.filters.model_dump(
+                exclude={"sort_by", "order"}, exclude_none=True
+        ):
+            raise ValueError("At least one filter is required")
+        return self
+
+
+class BulkUserChanges(BaseModel):
+    """Fields a bulk update may set, the ones not unique to a user."""
+    city: str | None = Field(
+        default=None, json_schema_extra={"example": "New York"}
+    )
+    dob: date | None = Field(
+        default=None, json_schema_extra={
+            "example": date(1990, 1, 1).isoformat()
+        }
+    )
+    name: NameUpdate | None = None
+    role: str | None = Field(
+        default=None, json_schema_extra={"example": "user"}
+    )
+
+
+class BulkUpdateRequest(BulkSelection):
+    """Schema for updating users in bulk."""
+    changes: BulkUserChanges
@@ -0,0 +1,291 @@
+import uuid
+import zlib
+from typing import Any, AsyncIterator, Awaitable, Callable
+import orjson
+from fastapi import HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from fast_python_api.auth.hashing import get_password_hashes_async
+from fast_python_api.chemas.user_crud import BulkSelection, UserCreate
+from fast_python_api.chemas.user_db import LoginInDB, NameInDB, UserInDB
+from fast_python_api.core.user_db import filter_conditions
+from fast_python_api.logging_config import logger
+from fast_python_api.models import Login, User
+from fast_python_api.settings import settings
+
+
+#: Content types of newline-delimited JSON bodies.
+NDJSON_TYPES = ("application/x-ndjson", "application/jsonl")
+
+#: Validates a whole bulk body at once.
+create_users_adapter = TypeAdapter(list[UserCreate])
+
+
+def _too_large(detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE, detail=detail
+    )
+
+
+def _decompress(body: bytes) -> bytes:
+    """Inflate a gzip body, refusing to grow past ``BULK_MAX_BYTES``."""
+    inflater = zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+    try:
+        data = inflater.decompress(body, settings.BULK_MAX_BYTES)
+    except zlib.error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid gzip body"
+        )
+    if inflater.unconsumed_tail:
+        raise _too_large("Decompressed body is too large")
+    return data
+
+
+async def _read_body(request: Request) -> bytes:
+    """Read the body, stopping as soon as it exceeds ``BULK_MAX_BYTES``."""
+    length = request.headers.get("content-length", "")
+    if length.isdigit() and int(length) > settings.BULK_MAX_BYTES:
+        raise _too_large("Body is too large")
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > settings.BULK_MAX_BYTES:
+            raise _too_large("Body is too large")
+    return bytes(body)
+
+
+def _parse(data: bytes, ndjson: bool) -> list[Any]:
+    try:
+        if ndjson:
+            return [orjson.loads(line) for line in data.splitlines() if line]
+        records = orjson.loads(data)
+    except orjson.JSONDecodeError as error:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid JSON: {error}"
+        )
+    if not isinstance(records, list):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Expected a JSON array of users"
+        )
+    return records
+
+
+async def read_users(request: Request) -> list[UserCreate]:
+    """
+    Read and validate the users of a bulk request body.
+
+    The body is either a JSON array or newline-delimited JSON (by its
+    content type), optionally gzip-compressed (``Content-Encoding: gzip``
+    or ``Content-Type: application/gzip``, which implies NDJSON). All
+    records are validated in a single ``TypeAdapter`` pass. A body
+    declared or found to be larger than ``BULK_MAX_BYTES`` is rejected
+    without reading the rest of it.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        list[UserCreate]: The validated users, in body order.
+
+    Raises:
+        HTTPException: 400 Bad Request if the body cannot be decoded.
+        HTTPException: 413 Request Entity Too Large if the body or the
+        number of records exceeds the configured limits.
+        RequestValidationError: 422 if a record is invalid, with its
+        index in the error locations.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0]
+    gzipped = (
+        request.headers.get("content-encoding") == "gzip"
+        or content_type == "application/gzip"
+    )
+    data = await _read_body(request)
+    if gzipped:
+        data = _decompress(data)
+    records = _parse(
+        data, content_type in NDJSON_TYPES or content_type == "application/gzip"
+    )
+    if len(records) > settings.BULK_MAX_RECORDS:
+        raise _too_large(
+            f"At most {settings.BULK_MAX_RECORDS} users per request"
+        )
+    try:
+        return create_users_adapter.validate_python(records)
+    except ValidationError as error:
+        raise RequestValidationError([
+            {**detail, "loc": ("body", *detail["loc"])}
+            for detail in error.errors(include_url=False)
+        ])
+
+
+async def prepare_users(users: list[UserCreate]) -> list[UserInDB]:
+    """
+    Assign IDs and hash the passwords of users to create.
+
+    The passwords are hashed concurrently on the bulk hashing executor.
+
+    Args:
+        users (list[UserCreate]): The validated users.
+
+    Returns:
+        list[UserInDB]: The users ready to be inserted.
+    """
+    hashes = await get_password_hashes_async(
+        [user.login.password for user in users]
+    )
+    prepared = []
+    for user, hashed in zip(users, hashes):
+        user_id = str(uuid.uuid4())
+        prepared.append(UserInDB(
+            id=user_id,
+            dob=user.dob,
+            city=user.city,
+            email=user.email,
+            name=NameInDB(user_id=user_id, **user.name.model_dump()),
+            login=LoginInDB(
+                uuid=user_id, username=user.login.username, password=hashed
+            ),
+        ))
+    return prepared
+
+
+#: Applies a bulk change to a chunk of user IDs and returns the ones found.
+ChunkAction = Callable[[list[str], AsyncSession], Awaitable[set[str]]]
+
+
+def check_selection(selection: BulkSelection) -> None:
+    """
+    Refuse ID lists longer than ``BULK_MAX_RECORDS``.
+
+    Raises:
+        HTTPException: 413 Request Entity Too Large.
+    """
+    if selection.ids is not None and (
+            len(selection.ids) > settings.BULK_MAX_RECORDS
+    ):
+        raise _too_large(
+            f"At most {settings.BULK_MAX_RECORDS} users per request"
+        )
+
+
+def _filtered_ids(selection: BulkSelection) -> Select:
+    query = select(User.id).where(*filter_conditions(selection.filters))
+    if selection.filters.role is not None:
+        query = query.join(Login, User.id == Login.uuid)
+    return query
+
+
+async def _count(selection: BulkSelection, session: AsyncSession) -> int:
+    if selection.ids is not None:
+        return len(set(selection.ids))
+    result = await session.execute(
+        select(func.count()).select_from(_filtered_ids(selection).subquery())
+    )
+    return result.scalar_one()
+
+
+async def _chunks(
+        selection: BulkSelection, session: AsyncSession, size: int
+) -> AsyncIterator[list[str]]:
+    """
+    Yield the selected user IDs ``size`` at a time.
+
+    Filtered users are read by keyset pagination over their ID, one
+    query per chunk, so no cursor stays open across the transactions of
+    the chunks and users changed by an earlier chunk are not read again.
+    """
+    if selection.ids is not None:
+        ids = list(dict.fromkeys(str(user_id) for user_id in selection.ids))
+        for start in range(0, len(ids), size):
+            yield ids[start:start + size]
+        return
+    query = _filtered_ids(selection).order_by(User.id).limit(size)
+    last = None
+    while True:
+        page = query if last is None else query.where(User.id > last)
+        ids = list((await session.execute(page)).scalars().all())
+        if not ids:
+            return
+        yield ids
+        last = ids[-1]
+
+
+def _line(payload: dict[str, Any]) -> bytes:
+    return orjson.dumps(payload, option=orjson.OPT_APPEND_NEWLINE)
+
+
+async def bulk_progress(
+        selection: BulkSelection,
+        action: ChunkAction,
+        done_status: str,
+        session: AsyncSession
+) -> AsyncIterator[bytes]:
+    """
+    Apply ``action`` to the selected users chunk by chunk and report the
+    progress as newline-delimited JSON.
+
+    Every chunk of ``BULK_CHUNK_SIZE`` users runs in its own short
+    transaction and is reported by one line with the running count and
+    the status of each of its users, ``done_status`` or ``not_found``.
+    The last line holds the totals. If a chunk fails, its transaction is
+    rolled back and the last line holds the error and ``"done": false``
+    instead, the chunks reported before stay applied. The stream
+    releases the session connection itself, as it outlives the request
+    dependencies.
+
+    Args:
+        selection: The users to change.
+        action: Applies the change to a chunk, see ``ChunkAction``.
+        done_status: Status of the users found by ``action``.
+        session: The database session.
+
+    Yields:
+        bytes: One JSON line per chunk, then the summary line.
+    """
+    total = None
+    processed = done = 0
+    try:
+        total = await _count(selection, session)
+        async for ids in _chunks(selection, session, settings.BULK_CHUNK_SIZE):
+            found = await action(ids, session)
+            processed += len(ids)
+            done += len(found)
+            yield _line({
+                "processed": processed,
+                "total": total,
+                "results": [
+                    {
+                        "id": user_id,
+                        "status": done_status if user_id in found
+                        else "not_found"
+                    }
+                    for user_id in ids
+                ],
+            })
+        yield _line({
+            "processed": processed,
+            "total": total,
+            done_status: done,
+            "not_found": processed - done,
+            "done": True,
+        })
+    except Exception:
+        # The status line is already sent, the error can only be reported
+        # in the body
+        logger.exception(
+            "Bulk request failed after %d of %s users", processed, total
+        )
+        await session.rollback()
+        yield _line({
+            "processed": processed,
+            "total": total,
+            "error": "Bulk operation failed",
+            "done": False,
+        })
+    finally:
+        await session.close()
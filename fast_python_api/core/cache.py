@@ -0,0 +1,468 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from typing import Any, Callable, Hashable, Mapping
+import orjson
+from fast_python_api.core.projection import PUBLIC_FIELDS, to_payload
+from fast_python_api.settings import settings
+
+
+@dataclass
+class CacheStats:
+    """Counters of a :class:`TTLCache`."""
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return asdict(self)
+
+
+class TTLCache:
+    """
+    Bounded mapping with least-recently-used eviction and a per-entry TTL.
+
+    Entries older than ``ttl`` seconds are treated as missing and dropped
+    on access. When ``maxsize`` entries are stored, adding another one
+    evicts the least recently used entry.
+
+    Args:
+        maxsize: Maximum number of entries, 0 disables the cache.
+        ttl: Lifetime of an entry in seconds.
+        timer: Clock of the TTLs, monotonic by default, replaceable in
+            tests.
+    """
+
+    def __init__(
+            self,
+            maxsize: int,
+            ttl: float,
+            timer: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self.stats = CacheStats()
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the live value of ``key`` or None, counting the lookup."""
+        entry = self._data.get(key)
+        if entry is not None and entry[0] <= self.timer():
+            del self._data[key]
+            self.stats.expirations += 1
+            entry = None
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.stats.hits += 1
+        return entry[1]
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store ``value`` under ``key``, evicting the oldest entry if full."""
+        if self.maxsize <= 0:
+            return
+        self._data[key] = (self.timer() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    def pop(self, key: Hashable) -> Any | None:
+        """Remove ``key`` and return its value, if any."""
+        entry = self._data.pop(key, None)
+        return entry[1] if entry is not None else None
+
+    def clear(self) -> None:
+        self._data.clear()
+
+
+class CacheBackend(ABC):
+    """
+    Byte store behind :class:`UserCache`.
+
+    Backends only move opaque bytes, encoding is up to the caller.
+    :meth:`invalidate` is the write path: it must make the keys disappear
+    for every worker sharing the backend, not only for this process, and
+    advance the :meth:`generation` they all see.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> bytes | None:
+        """Return the value of ``key``, or None if it is missing."""
+
+    @abstractmethod
+    async def set(
+            self, key: str, value: bytes, generation: int | None = None
+    ) -> bool:
+        """
+        Store ``value`` under ``key`` for the lifetime of an entry.
+
+        With ``generation``, the value is only stored if no invalidation
+        happened since :meth:`generation` returned it.
+
+        Returns:
+            Whether the value was stored.
+        """
+
+    @abstractmethod
+    async def generation(self) -> int:
+        """Number of invalidations so far."""
+
+    @abstractmethod
+    async def invalidate(self, *keys: str) -> None:
+        """Drop ``keys`` for every worker sharing the backend."""
+
+    @abstractmethod
+    async def clear(self) -> None:
+        """Drop every entry of the backend."""
+
+    async def start(self) -> None:
+        """Start background work, called from the app lifespan."""
+
+    async def close(self) -> None:
+        """Release connections and stop background work."""
+
+    def stats(self) -> dict[str, Any]:
+        return {}
+
+
+class MemoryBackend(CacheBackend):
+    """
+    Process-local backend, coherent only within a single worker.
+
+    Args:
+        maxsize: Maximum number of entries.
+        ttl: Lifetime of an entry in seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.cache = TTLCache(maxsize, ttl)
+        self._generation = 0
+
+    async def get(self, key: str) -> bytes | None:
+        return self.cache.get(key)
+
+    async def set(
+            self, key: str, value: bytes, generation: int | None = None
+    ) -> bool:
+        if generation is not None and generation != self._generation:
+            return False
+        self.cache.set(key, value)
+        return True
+
+    async def generation(self) -> int:
+        return self._generation
+
+    async def invalidate(self, *keys: str) -> None:
+        self._generation += 1
+        for key in keys:
+            self.cache.pop(key)
+
+    async def clear(self) -> None:
+        self.cache.clear()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "type": "memory",
+            "size": len(self.cache),
+            "maxsize": self.cache.maxsize,
+            **self.cache.stats.as_dict(),
+        }
+
+
+class RedisBackend(CacheBackend):
+    """
+    Backend shared by all workers through a Redis-protocol server.
+
+    Hot entries are also kept in a small process-local near-cache.
+    Invalidations delete the shared keys and are published on
+    ``channel``, every worker listening on it drops them from its
+    near-cache.
+
+    Args:
+        client: A ``redis.asyncio.Redis`` compatible client.
+        ttl: Lifetime of a shared entry in seconds.
+        near_cache: Process-local cache in front of the server, or None.
+        channel: Pub/sub channel of invalidation messages.
+        prefix: Namespace of the keys, :meth:`clear` only drops these.
+    """
+
+    def __init__(
+            self,
+            client: Any,
+            ttl: float,
+            near_cache: TTLCache | None = None,
+            channel: str = "cache:invalidate",
+            prefix: str = "cache:"
+    ) -> None:
+        self.client = client
+        self.ttl = ttl
+        self.near_cache = near_cache
+        self.channel = channel
+        self.prefix = prefix
+        self._listener: asyncio.Task | None = None
+
+    async def get(self, key: str) -> bytes | None:
+        if self.near_cache is not None:
+            value = self.near_cache.get(key)
+            if value is not None:
+                return value
+        value = await self.client.get(self.prefix + key)
+        if value is not None and self.near_cache is not None:
+            self.near_cache.set(key, value)
+        return value
+
+    async def set(
+            self, key: str, value: bytes, generation: int | None = None
+    ) -> bool:
+        ttl = int(self.ttl * 1000)
+        if generation is None:
+            await self.client.set(self.prefix + key, value, px=ttl)
+        elif not await self._set_if_current(key, value, ttl, generation):
+            return False
+        if self.near_cache is not None:
+            self.near_cache.set(key, value)
+        return True
+
+    async def _set_if_current(
+            self, key: str, value: bytes, ttl: int, generation: int
+    ) -> bool:
+        from redis.exceptions import WatchError
+
+        # The transaction fails if an invalidation bumps the counter
+        # between the check and the write
+        async with self.client.pipeline(transaction=True) as pipe:
+            await pipe.watch(self._generation_key)
+            if int(await pipe.get(self._generation_key) or 0) != generation:
+                return False
+            pipe.multi()
+            pipe.set(self.prefix + key, value, px=ttl)
+            try:
+                await pipe.execute()
+            except WatchError:
+                return False
+        return True
+
+    @property
+    def _generation_key(self) -> str:
+        return f"{self.prefix}generation"
+
+    async def generation(self) -> int:
+        return int(await self.client.get(self._generation_key) or 0)
+
+    def _forget(self, keys: Any) -> None:
+        if self.near_cache is not None:
+            for key in keys:
+                self.near_cache.pop(key)
+
+    async def invalidate(self, *keys: str) -> None:
+        if not keys:
+            return
+        self._forget(keys)
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incr(self._generation_key)
+            pipe.delete(*(self.prefix + key for key in keys))
+            await pipe.execute()
+        await self.client.publish(self.channel, "\n".join(keys))
+
+    async def clear(self) -> None:
+        if self.near_cache is not None:
+            self.near_cache.clear()
+        keys = [key async for key in self.client.scan_iter(f"{self.prefix}*")]
+        if keys:
+            await self.client.delete(*keys)
+
+    async def start(self) -> None:
+        pubsub = self.client.pubsub()
+        await pubsub.subscribe(self.channel)
+        self._listener = asyncio.create_task(self._listen(pubsub))
+
+    async def _listen(self, pubsub: Any) -> None:
+        try:
+            async for message in pubsub.listen():
+                if message["type"] == "message":
+                    data = message["data"]
+                    if isinstance(data, bytes):
+                        data = data.decode()
+                    self._forget(data.split("\n"))
+        finally:
+            await pubsub.aclose()
+
+    async def close(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        await self.client.aclose()
+
+    def stats(self) -> dict[str, Any]:
+        stats: dict[str, Any] = {"type": "redis"}
+        if self.near_cache is not None:
+            stats["near_cache"] = {
+                "size": len(self.near_cache),
+                **self.near_cache.stats.as_dict(),
+            }
+        return stats
+
+
+class CachedUser:
+    """
+    A cache entry: the flat ``CACHED_FIELDS`` snapshot of a user and the
+    ready ``UserPublic`` JSON body, stored as ``snapshot\\nbody`` bytes.
+
+    The snapshot is only decoded when it is used, serving the full
+    representation just slices the stored bytes. It is always decoded
+    from the bytes, so values read from the database and from the cache
+    have the same types.
+    """
+
+    def __init__(self, entry: bytes) -> None:
+        self.entry = entry
+        self._split = entry.index(b"\n")
+        self._snapshot: Mapping[str, Any] | None = None
+
+    @classmethod
+    def encode(cls, snapshot: Mapping[str, Any]) -> "CachedUser":
+        body = orjson.dumps(
+            to_payload(snapshot, PUBLIC_FIELDS), option=orjson.OPT_UTC_Z
+        )
+        entry = orjson.dumps(snapshot, option=orjson.OPT_UTC_Z)
+        return cls(entry + b"\n" + body)
+
+    @property
+    def snapshot(self) -> Mapping[str, Any]:
+        if self._snapshot is None:
+            self._snapshot = orjson.loads(self.entry[:self._split])
+        return self._snapshot
+
+    @property
+    def version(self) -> str:
+        """The ``updated_at`` stamp the entry was read at."""
+        return self.snapshot["updated_at"]
+
+    @property
+    def body(self) -> bytes:
+        return self.entry[self._split + 1:]
+
+
+class UserCache:
+    """
+    Users keyed by ID, with a secondary index by username.
+
+    The username index only maps to an ID, so a user is stored once and
+    a renamed user can never be served under the old username.
+
+    Writers must call :meth:`invalidate` after committing a change.
+    Readers take the :meth:`generation` before reading a user from the
+    database and pass it to :meth:`put`, so a snapshot read before a
+    write is never cached after the write invalidated the user.
+
+    Args:
+        backend: Where the encoded entries are stored.
+    """
+
+    def __init__(self, backend: CacheBackend) -> None:
+        self.backend = backend
+        self.lookups = CacheStats()
+
+    def _count(self, user: CachedUser | None) -> CachedUser | None:
+        if user is None:
+            self.lookups.misses += 1
+        else:
+            self.lookups.hits += 1
+        return user
+
+    async def _get(self, user_id: str) -> CachedUser | None:
+        entry = await self.backend.get(f"user:{user_id}")
+        return CachedUser(entry) if entry is not None else None
+
+    async def get_by_id(self, user_id: str) -> CachedUser | None:
+        return self._count(await self._get(user_id))
+
+    async def get_by_username(self, username: str) -> CachedUser | None:
+        user_id = await self.backend.get(f"username:{username}")
+        user = await self._get(user_id.decode()) if user_id else None
+        if user is not None and user.snapshot["login.username"] != username:
+            user = None
+        return self._count(user)
+
+    async def generation(self) -> int:
+        """The generation to pass to :meth:`put`, taken before reading."""
+        return await self.backend.generation()
+
+    async def put(
+            self, snapshot: Mapping[str, Any], generation: int | None = None
+    ) -> CachedUser:
+        """
+        Cache the snapshot of a user.
+
+        Args:
+            snapshot: The ``CACHED_FIELDS`` of the user.
+            generation: The :meth:`generation` taken before the snapshot
+                was read. If a user was invalidated since, the snapshot
+                may be stale and is not stored.
+
+        Returns:
+            The entry of the snapshot, stored or not.
+        """
+        user = CachedUser.encode(snapshot)
+        user_id = str(snapshot["id"])
+        if await self.backend.set(f"user:{user_id}", user.entry, generation):
+            await self.backend.set(
+                f"username:{snapshot['login.username']}", user_id.encode()
+            )
+        return user
+
+    async def invalidate(self, *user_ids: Any) -> None:
+        """Drop the entries of ``user_ids`` for every worker."""
+        await self.backend.invalidate(
+            *(f"user:{user_id}" for user_id in user_ids)
+        )
+
+    async def clear(self) -> None:
+        await self.backend.clear()
+
+    def stats(self) -> dict[str, Any]:
+        """Lookup counters and backend statistics, for ``/metrics``."""
+        return {
+            "hits": self.lookups.hits,
+            "misses": self.lookups.misses,
+            "backend": self.backend.stats(),
+        }
+
+
+def create_backend() -> CacheBackend:
+    """
+    Build the backend selected by ``settings.CACHE_BACKEND``.
+
+    The Redis backend needs the optional ``redis`` package.
+
+    Returns:
+        CacheBackend: A backend, not started yet.
+    """
+    if settings.CACHE_BACKEND == "redis":
+        from redis.asyncio import Redis
+
+        near_cache = None
+        if settings.USER_CACHE_NEAR_TTL > 0:
+            near_cache = TTLCache(
+                settings.USER_CACHE_SIZE, settings.USER_CACHE_NEAR_TTL
+            )
+        return RedisBackend(
+            Redis.from_url(settings.REDIS_URL),
+            settings.USER_CACHE_TTL,
+            near_cache
+        )
+    return MemoryBackend(settings.USER_CACHE_SIZE, settings.USER_CACHE_TTL)
+
+
+#: Process-wide cache used by ``user_db`` lookups.
+user_cache = UserCache(create_backend())
@@ -0,0 +1,46 @@
+import hashlib
+from typing import Any
+from fastapi import Response, status
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Build a strong ETag from the values that identify a representation,
+    e.g. a user ID, its ``updated_at`` stamp and the requested fields.
+
+    Args:
+        *parts: Values the representation depends on.
+
+    Returns:
+        str: The quoted ETag.
+    """
+    raw = "\x1f".join(str(part) for part in parts)
+    return f'"{hashlib.blake2b(raw.encode(), digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    """
+    Check an ``If-None-Match`` header against the current ETag.
+
+    Uses the weak comparison required for ``If-None-Match``.
+
+    Args:
+        if_none_match (str | None): The header sent by the client.
+        etag (str): The current ETag of the resource.
+
+    Returns:
+        bool: True if the client copy is still current.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    tags = (tag.strip() for tag in if_none_match.split(","))
+    return etag in {tag.removeprefix("W/") for tag in tags}
+
+
+def not_modified(etag: str) -> Response:
+    """Build a body-less 304 Not Modified response for ``etag``."""
+    return Response(
+        status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag}
+    )
@@ -0,0 +1,82 @@
+import csv
+import io
+from typing import Any, AsyncIterator, Sequence
+import orjson
+from sqlalchemy.engine import Row
+
+
+#: Column order of the CSV export, matches the rows of ``stream_users``.
+CSV_HEADER = (
+    "id", "email", "dob", "city", "created_at",
+    "title", "first_name", "last_name", "username", "role",
+)
+
+
+def _row_to_public(row: Row) -> dict[str, Any]:
+    """Nest a flat export row into the shape of ``UserPublic``."""
+    return {
+        "name": {
+            "title": row.title,
+            "first_name": row.first_name,
+            "last_name": row.last_name,
+        },
+        "login": {
+            "username": row.username,
+            "role": row.role,
+            "uuid": row.id,
+        },
+        "dob": row.dob,
+        "city": row.city,
+        "email": row.email,
+        "created_at": row.created_at,
+    }
+
+
+async def ndjson_chunks(
+        partitions: AsyncIterator[Sequence[Row]]
+) -> AsyncIterator[bytes]:
+    """
+    Encode chunks of user rows as newline-delimited JSON.
+
+    Args:
+        partitions: Chunks of rows produced by ``stream_users``.
+
+    Yields:
+        bytes: One encoded block per chunk, one user per line.
+    """
+    async for rows in partitions:
+        yield b"".join(
+            orjson.dumps(_row_to_public(row), option=orjson.OPT_APPEND_NEWLINE)
+            for row in rows
+        )
+
+
+async def csv_chunks(
+        partitions: AsyncIterator[Sequence[Row]]
+) -> AsyncIterator[bytes]:
+    """
+    Encode chunks of user rows as CSV, starting with a header line.
+
+    Args:
+        partitions: Chunks of rows produced by ``stream_users``.
+
+    Yields:
+        bytes: The header, then one encoded block per chunk.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_HEADER)
+    async for rows in partitions:
+        writer.writerows(
+            (
+                row.id, row.email, row.dob.isoformat(), row.city,
+                row.created_at.isoformat(), row.title, row.first_name,
+                row.last_name, row.username, row.role,
+            )
+            for row in rows
+        )
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
@@ -0,0 +1,53 @@
+import base64
+import binascii
+import json
+from datetime import date
+from typing import Any
+from fastapi import HTTPException, status
+
+
+def encode_cursor(sort_by: str, value: Any, user_id: Any) -> str:
+    """
+    Encode the position of a user in the ``(sort_by, id)`` ordering
+    into an opaque cursor.
+
+    Args:
+        sort_by (str): Name of the sort key the page was ordered by.
+        value (Any): Value of the sort key for the last returned user.
+        user_id (Any): ID of the last returned user.
+
+    Returns:
+        str: URL-safe cursor to pass back in the ``after`` parameter.
+    """
+    if isinstance(value, date):
+        value = value.isoformat()
+    raw = json.dumps([sort_by, str(value), str(user_id)])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str) -> tuple[str, str]:
+    """
+    Decode a cursor produced by :func:`encode_cursor`.
+
+    Args:
+        cursor (str): The opaque cursor received from the client.
+        sort_by (str): Sort key of the requested page.
+
+    Returns:
+        tuple[str, str]: The raw sort key value and the user ID.
+
+    Raises:
+        HTTPException: 400 Bad Request if the cursor is malformed or was
+        issued for a different sort key.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key, value, user_id = json.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError):
+        key = value = user_id = None
+    if key != sort_by or not isinstance(value, str):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    return value, str(user_id)
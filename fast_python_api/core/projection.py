@@ -0,0 +1,183 @@
+from typing import Annotated, Any, Iterable, Mapping, Sequence
+from fastapi import HTTPException, Query, status
+from sqlalchemy import Select, select
+from sqlalchemy.engine import Row
+from fast_python_api.models import User, Login, Name
+
+
+#: Public field names in ``UserPublic`` order and the columns they are
+#: read from. ``login.uuid`` is the user ID, so it never needs a join.
+FIELD_COLUMNS = {
+    "id": User.id,
+    "name.title": Name.title,
+    "name.first_name": Name.first_name,
+    "name.last_name": Name.last_name,
+    "login.username": Login.username,
+    "login.role": Login.role,
+    "login.uuid": User.id,
+    "dob": User.dob,
+    "city": User.city,
+    "email": User.email,
+    "created_at": User.created_at,
+}
+
+#: Fields of the full ``UserPublic`` representation.
+PUBLIC_FIELDS = tuple(field for field in FIELD_COLUMNS if field != "id")
+
+#: Columns the application may read but ``?fields=`` never exposes.
+INTERNAL_COLUMNS = {
+    "login.password": Login.password,
+    "updated_at": User.updated_at,
+}
+
+#: Fields of the ``UserInDB`` representation plus the version stamp.
+IN_DB_FIELDS = ("id", *PUBLIC_FIELDS, "login.password", "updated_at")
+
+#: Fields kept in ``user_cache``. The password hash is left out, it is
+#: only ever read from the database.
+CACHED_FIELDS = tuple(
+    field for field in IN_DB_FIELDS if field != "login.password"
+)
+
+_COLUMNS = {**FIELD_COLUMNS, **INTERNAL_COLUMNS}
+
+#: Column referencing ``users.id`` of the models joined to users.
+_USER_KEYS = {Name: Name.user_id, Login: Login.uuid}
+
+
+def _expand(field: str) -> list[str]:
+    if field in FIELD_COLUMNS:
+        return [field]
+    nested = [name for name in FIELD_COLUMNS if name.startswith(f"{field}.")]
+    if not nested:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Unknown field: {field}"
+        )
+    return nested
+
+
+def parse_fields(
+        fields: Annotated[
+            str | None,
+            Query(
+                description="Comma-separated fields to return, e.g. "
+                            "id,email,name.last_name. `name` and `login` "
+                            "select all of their nested fields."
+            )
+        ] = None
+) -> tuple[str, ...] | None:
+    """
+    Parse the ``fields`` query parameter of sparse fieldset requests.
+
+    Args:
+        fields (str | None): Comma-separated list of field names.
+
+    Returns:
+        tuple[str, ...] | None: The requested fields in a stable order,
+        or None when the full representation is requested.
+
+    Raises:
+        HTTPException: 400 Bad Request if a field is unknown.
+    """
+    if not fields:
+        return None
+    requested = [
+        name
+        for field in fields.split(",") if field.strip()
+        for name in _expand(field.strip())
+    ]
+    return tuple(dict.fromkeys(requested)) or None
+
+
+def select_fields(fields: Sequence[str], *extra: str) -> Select:
+    """
+    Build a select of only the columns behind ``fields``.
+
+    Names and logins are always inner-joined, whichever columns are
+    selected, so a sparse fieldset lists exactly the users of the full
+    representation.
+
+    Args:
+        fields: Fields to select, labelled with their public names.
+        *extra: Additional fields needed by the caller, e.g. for cursors.
+
+    Returns:
+        A select of the labelled columns over ``users``.
+    """
+    names = dict.fromkeys([*fields, *extra])
+    return (
+        select(*(_COLUMNS[name].label(name) for name in names))
+        .select_from(User)
+        .join(Name, User.id == Name.user_id)
+        .join(Login, User.id == Login.uuid)
+    )
+
+
+def returning_columns(model: type, fields: Sequence[str]) -> list[Any]:
+    """
+    Columns of ``model`` behind ``fields`` for a ``RETURNING`` clause.
+
+    Args:
+        model: The model written by the statement.
+        fields: Fields to return, the ones of other models are skipped.
+
+    Returns:
+        The columns labelled with their field names, so the returned rows
+        of several statements can be merged for :func:`to_payload`.
+    """
+    return [
+        _COLUMNS[name].label(name) for name in fields
+        if _COLUMNS[name].class_ is model
+    ]
+
+
+def related_columns(
+        models: Iterable[type], fields: Sequence[str], user_id: str
+) -> list[Any]:
+    """
+    Subqueries reading ``fields`` of ``models`` of one user.
+
+    Added to the ``RETURNING`` clause of a statement on ``users``, they
+    return the columns of names and logins without another query.
+
+    Args:
+        models: ``Name`` and/or ``Login``.
+        fields: Fields to return, the ones of other models are skipped.
+        user_id: The ID of the user.
+
+    Returns:
+        Scalar subqueries labelled with their field names.
+    """
+    models = set(models)
+    return [
+        select(column)
+        .where(_USER_KEYS[column.class_] == user_id)
+        .scalar_subquery()
+        .label(name)
+        for name, column in ((name, _COLUMNS[name]) for name in fields)
+        if column.class_ in models
+    ]
+
+
+def to_payload(
+        row: Row | Mapping[str, Any], fields: Sequence[str]
+) -> dict[str, Any]:
+    """
+    Nest the requested fields of a projected row into a response payload.
+
+    Args:
+        row: A row produced by a :func:`select_fields` query, or a
+            mapping with the same keys.
+        fields: The requested fields.
+
+    Returns:
+        A dict with ``name.*`` and ``login.*`` fields nested.
+    """
+    values = row._mapping if isinstance(row, Row) else row
+    payload: dict[str, Any] = {}
+    for field in fields:
+        parent, _, key = field.rpartition(".")
+        target = payload.setdefault(parent, {}) if parent else payload
+        target[key] = values[field]
+    return payload
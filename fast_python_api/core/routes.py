@@ -1,11 +1,39 @@
-from fastapi import APIRouter, Depends, Query, Path, status, HTTPException
-from typing import Annotated
+from fastapi import (
+    APIRouter, Depends, Header, Query, Path, Request, Response, status,
+    HTTPException
+)
+from fastapi.responses import StreamingResponse
+from typing import Annotated, AsyncIterator, Literal, Sequence
 from fast_python_api.auth.user_auth import verify_access_token
-from fast_python_api.chemas.user_crud import UserPublic, UserCreate, UserUpdate
+from fast_python_api.chemas.user_crud import (
+    BulkInsertResult, BulkSelection, BulkUpdateRequest, UserPublic,
+    UserCreate, UserUpdate
+)
 from fast_python_api.chemas.token import TokenData
-from fast_python_api.core.user_db import get_users, get_user_by_id
-from fast_python_api.core.user_crud import create_user, update_user
+from fast_python_api.core.user_db import (
+    get_cached_user, get_user_rows, stream_users, get_page_versions
+)
+from fast_python_api.core.etag import make_etag, etag_matches, not_modified
+from fast_python_api.core.projection import (
+    PUBLIC_FIELDS, parse_fields, to_payload
+)
+from fast_python_api.core.export import ndjson_chunks, csv_chunks
+from fast_python_api.core.search import search_users
+from fast_python_api.settings import settings
+from fast_python_api.core.bulk import (
+    ChunkAction, bulk_progress, check_selection, prepare_users, read_users
+)
+from fast_python_api.core.user_crud import (
+    create_user, create_user_bulk, delete_user, delete_users_chunk,
+    update_user, update_users_chunk
+)
+from fast_python_api.core.pagination import encode_cursor
+from fast_python_api.chemas.params import UserFilterParams
 from fast_python_api.database import get_session
+from fast_python_api.responses import (
+    ORJSONResponse, cached_user_response, user_response
+)
+from sqlalchemy.engine import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 from uuid import UUID
 
@@ -16,10 +44,15 @@ router = APIRouter(prefix="/users", tags=["Users"])
 @router.get(
     '/',
     tags=["Users"],
+    response_model=list[UserPublic],
     summary="Retrieve a list of users",
-    description="Retrieve a list of users with pagination options. "
-                "Use skip and limit query parameters to control the "
-                "number of returned users.",
+    description="Retrieve a list of users with filtering, sorting and "
+                "pagination options. Use skip and limit query parameters "
+                "to control the number of returned users, or pass the "
+                "X-Next-Cursor header of the previous page as `after` to "
+                "fetch the next one. Send the ETag of a page back in "
+                "If-None-Match to get 304 Not Modified while it is "
+                "unchanged.",
     dependencies=[Depends(verify_access_token)],
     responses={
         200: {
@@ -49,72 +82,255 @@ router = APIRouter(prefix="/users", tags=["Users"])
 )
 async def get_users_list(
         session: Annotated[AsyncSession, Depends(get_session)],
+        filters: Annotated[UserFilterParams, Depends()],
         skip: Annotated[
             int, Query(description="Number of users to skip", ge=0)
         ] = 0,
         limit: Annotated[
             int, Query(description="Maximum number of users to return", ge=1)
-        ] = 5
-) -> list[UserPublic]:
+        ] = 5,
+        after: Annotated[
+            str | None,
+            Query(description="Cursor of the previous page, skip is ignored")
+        ] = None,
+        fields: Annotated[
+            tuple[str, ...] | None, Depends(parse_fields)
+        ] = None,
+        if_none_match: Annotated[str | None, Header()] = None
+) -> Response:
     """
     Retrieve a list of users with pagination options.
 
+    Users are ordered by ``filters.sort_by``, creation time by default.
+    When a full page is returned, the cursor of its last user is sent in
+    the ``X-Next-Cursor`` header.
+
     Args:
         session (AsyncSession): The database session.
+        filters (UserFilterParams): Filters and sort order.
         skip (int): Number of users to skip.
         limit (int): Maximum number of users to return.
+        after (str | None): Opaque cursor of the previous page.
+        fields (tuple[str, ...] | None): Sparse fieldset, only these
+            fields are read and returned.
+        if_none_match (str | None): ETag of the copy held by the client.
+
+    Returns:
+        Response: List of public user data.
+
+    Raises:
+        HTTPException: 400 Bad Request if the cursor or a field
+        is invalid.
+        HTTPException: 401 Unauthorized if credentials are invalid.
+    """
+    etag = None
+    if if_none_match:
+        # The page version is read before the page itself, so a
+        # concurrent write can only make the ETag older than the body,
+        # never newer.
+        versions = await get_page_versions(
+            session, filters, skip=skip, limit=limit, after=after
+        )
+        etag = _page_etag(versions, fields)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag)
+    rows = await get_user_rows(
+        session, fields or PUBLIC_FIELDS, filters,
+        skip=skip, limit=limit, after=after
+    )
+    page = _users_page(rows, fields or PUBLIC_FIELDS, filters, limit)
+    page.headers["ETag"] = etag or _page_etag(rows, fields)
+    return page
+
+
+def _page_etag(rows: Sequence[Row], fields: tuple[str, ...] | None) -> str:
+    """ETag of a page from the ``id`` and ``updated_at`` of its rows."""
+    return make_etag(*(f"{row.id}@{row.updated_at}" for row in rows), fields)
+
+
+def _users_page(
+        rows: Sequence[Row],
+        fields: tuple[str, ...],
+        filters: UserFilterParams,
+        limit: int
+) -> Response:
+    response = ORJSONResponse([to_payload(row, fields) for row in rows])
+    if len(rows) == limit:
+        last = rows[-1]._mapping
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            filters.sort_by, last[filters.sort_by], last["id"]
+        )
+    return response
+
+
+@router.get(
+    '/search',
+    summary="Search users",
+    description="Type-ahead search over first name, last name, username "
+                "and email. Every word of the query is matched as a "
+                "prefix and the best matches are returned first.",
+    dependencies=[Depends(verify_access_token)],
+    response_model=list[UserPublic],
+    responses={
+        200: {"description": "Matching users, best matches first"},
+        401: {"description": "Unauthorized, invalid or missing credentials"},
+    }
+)
+async def search_users_list(
+        session: Annotated[AsyncSession, Depends(get_session)],
+        q: Annotated[
+            str,
+            Query(description="Search query", min_length=1, max_length=100)
+        ],
+        limit: Annotated[
+            int,
+            Query(description="Maximum number of users to return", ge=1, le=50)
+        ] = 10
+) -> Response:
+    """
+    Search users by name, username and email.
+
+    Args:
+        session (AsyncSession): The database session.
+        q (str): The search query.
+        limit (int): Maximum number of users to return.
+
+    Returns:
+        Response: Matching users, best matches first.
+
+    Raises:
+        HTTPException: 401 Unauthorized if credentials are invalid.
+    """
+    return ORJSONResponse(await search_users(q, limit, session))
+
+
+EXPORT_FORMATS = {
+    "ndjson": (ndjson_chunks, "application/x-ndjson"),
+    "csv": (csv_chunks, "text/csv"),
+}
+
+
+async def _export_body(
+        session: AsyncSession, fmt: str
+) -> AsyncIterator[bytes]:
+    # The body is sent after the request dependencies are torn down, so
+    # the stream releases the session connection itself when it is done.
+    encode, _ = EXPORT_FORMATS[fmt]
+    try:
+        partitions = stream_users(session, settings.EXPORT_CHUNK_SIZE)
+        async for chunk in encode(partitions):
+            yield chunk
+    finally:
+        await session.close()
+
+
+@router.get(
+    '/export',
+    summary="Export all users",
+    description="Stream every user as NDJSON (one JSON object per line) "
+                "or CSV. Rows are read in chunks through a server-side "
+                "cursor, so the export starts immediately and memory "
+                "use does not depend on the number of users.",
+    dependencies=[Depends(verify_access_token)],
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "description": "Successful export of users",
+            "content": {"application/x-ndjson": {}, "text/csv": {}}
+        },
+        401: {"description": "Unauthorized, invalid or missing credentials"},
+    }
+)
+async def export_users(
+        session: Annotated[AsyncSession, Depends(get_session)],
+        fmt: Annotated[
+            Literal["ndjson", "csv"],
+            Query(alias="format", description="Output format")
+        ] = "ndjson"
+) -> StreamingResponse:
+    """
+    Stream all users as NDJSON or CSV.
+
+    Args:
+        session (AsyncSession): The database session.
+        fmt (str): Output format, ``ndjson`` or ``csv``.
 
     Returns:
-        list[UserPublic]: List of public user data.
+        StreamingResponse: The users, sent chunk by chunk.
 
     Raises:
         HTTPException: 401 Unauthorized if credentials are invalid.
     """
-    items = await get_users(session)
-    return items[skip: skip + limit]
+    _, media_type = EXPORT_FORMATS[fmt]
+    return StreamingResponse(
+        _export_body(session, fmt),
+        media_type=media_type,
+        headers={
+            "Content-Disposition": f'attachment; filename="users.{fmt}"'
+        }
+    )
+
+
+def _user_not_found() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_404_NOT_FOUND,
+        detail="User not found"
+    )
 
 
 @router.get(
     '/{user_id}',
     dependencies=[Depends(verify_access_token)],
+    response_model=UserPublic,
     summary="Retrieve a user by ID",
-    description="Get a user by ID. Only accessible by logged in users.",
+    description="Get a user by ID. Only accessible by logged in users. "
+                "Send the ETag back in If-None-Match to get 304 Not "
+                "Modified while the user is unchanged.",
     responses={
         200: {"description": "Successful retrieval of user"},
+        304: {"description": "User not modified"},
         401: {"description": "Unauthorized, invalid or missing credentials"},
         404: {"description": "User not found"}
     }
 )
 async def get_user(
         user_id: Annotated[UUID, Path(description="The ID of the user")],
-        session: Annotated[AsyncSession, Depends(get_session)]
-) -> UserPublic:
+        session: Annotated[AsyncSession, Depends(get_session)],
+        fields: Annotated[
+            tuple[str, ...] | None, Depends(parse_fields)
+        ] = None,
+        if_none_match: Annotated[str | None, Header()] = None
+) -> Response:
     """
     Retrieve a user by ID. Only accessible by logged in users.
 
     Args:
         user_id (UUID): The ID of the user.
         session (AsyncSession): The database session.
+        fields (tuple[str, ...] | None): Sparse fieldset, only these
+            fields are read and returned.
+        if_none_match (str | None): ETag of the copy held by the client.
 
     Returns:
-        UserPublic: The public representation of the user.
+        Response: The public representation of the user.
 
     Raises:
+        HTTPException: 400 Bad Request if a field is unknown.
         HTTPException: 401 Unauthorized if credentials are invalid.
         HTTPException: 404 Not Found if the user does not exist.
     """
-    user_db = await get_user_by_id(user_id, session)
-    if not user_db:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-    user = UserPublic(**user_db.to_dict())
-    return user
+    user = await get_cached_user(user_id, session)
+    if user is None:
+        raise _user_not_found()
+    etag = make_etag(user_id, user.version, fields)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return cached_user_response(user, fields, headers={"ETag": etag})
 
 
 @router.post(
     '/create',
+    response_model=UserPublic,
     summary="Create a new user",
     description="Create a new user. Only accessible by admins.",
     responses={
@@ -128,7 +344,7 @@ async def create_new_user(
         user_data: Annotated[UserCreate, UserCreate],
         current_user: Annotated[TokenData, Depends(verify_access_token)],
         session: Annotated[AsyncSession, Depends(get_session)]
-) -> UserPublic:
+) -> Response:
     """
     Create a new user. Only accessible by admins.
 
@@ -138,7 +354,7 @@ async def create_new_user(
         session (AsyncSession): The database session.
 
     Returns:
-        UserPublic: The public representation of the created user.
+        Response: The public representation of the created user.
 
     Raises:
         HTTPException: 403 Forbidden if the user is not an admin.
@@ -149,11 +365,198 @@ async def create_new_user(
             detail="You do not have permission to create users"
         )
     user = await create_user(user_data, session)
-    return user
+    return user_response(user)
+
+
+@router.post(
+    '/bulk',
+    response_model=BulkInsertResult,
+    summary="Create users in bulk",
+    description="Create many users at once. Only accessible by admins. "
+                "The body is a JSON array of users, or newline-delimited "
+                "JSON (`application/x-ndjson`), optionally gzip-compressed "
+                "with `Content-Encoding: gzip`. Users whose email or "
+                "username is taken are skipped, the status of every user "
+                "is reported in body order.",
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": {
+                    "type": "array",
+                    "items": {"$ref": "#/components/schemas/UserCreate"}
+                }},
+                "application/x-ndjson": {"schema": {
+                    "$ref": "#/components/schemas/UserCreate"
+                }},
+            }
+        }
+    },
+    responses={
+        200: {"description": "Status of every user"},
+        400: {"description": "Bad request, the body cannot be decoded"},
+        401: {"description": "Unauthorized, invalid or missing credentials"},
+        403: {"description": "Forbidden, not enough permissions"},
+        413: {"description": "Too many users or too large body"},
+        422: {"description": "A user is invalid"},
+    }
+)
+async def create_users_bulk(
+        request: Request,
+        current_user: Annotated[TokenData, Depends(verify_access_token)],
+        session: Annotated[AsyncSession, Depends(get_session)]
+) -> Response:
+    """
+    Create users in bulk. Only accessible by admins.
+
+    All users are validated before any is created, passwords are hashed
+    concurrently and the users are inserted with batched multi-row
+    statements.
+
+    Args:
+        request (Request): The request, its body holds the users.
+        current_user (TokenData): The current authenticated user.
+        session (AsyncSession): The database session.
+
+    Returns:
+        Response: The ``BulkInsertResult`` of the users.
+
+    Raises:
+        HTTPException: 403 Forbidden if the user is not an admin.
+    """
+    if current_user.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to create users"
+        )
+    users = await prepare_users(await read_users(request))
+    return ORJSONResponse(await create_user_bulk(users, session))
+
+
+BULK_PROGRESS_DESCRIPTION = (
+    "The users are processed in chunks of `BULK_CHUNK_SIZE`, each in its "
+    "own transaction. The progress is streamed as newline-delimited "
+    "JSON: one line per chunk with the number of users processed so far, "
+    "the total and the status of every user of the chunk, then a last "
+    "line with the totals and `\"done\": true`."
+)
+
+
+def _require_admin(current_user: TokenData, action: str) -> None:
+    if current_user.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"You do not have permission to {action} users"
+        )
+
+
+def _progress_response(
+        selection: BulkSelection,
+        action: ChunkAction,
+        done_status: str,
+        session: AsyncSession
+) -> StreamingResponse:
+    check_selection(selection)
+    return StreamingResponse(
+        bulk_progress(selection, action, done_status, session),
+        media_type="application/x-ndjson"
+    )
+
+
+BULK_RESPONSES = {
+    200: {
+        "description": "Progress of the chunks, then the totals",
+        "content": {"application/x-ndjson": {}}
+    },
+    401: {"description": "Unauthorized, invalid or missing credentials"},
+    403: {"description": "Forbidden, not enough permissions"},
+    413: {"description": "Too many user IDs"},
+    422: {"description": "Invalid selection or changes"},
+}
+
+
+@router.patch(
+    '/bulk',
+    summary="Update users in bulk",
+    description="Set the same fields on many users, selected by `ids` or "
+                "by `filters` (at least one filter besides the sort "
+                "order). Only accessible by admins. "
+                + BULK_PROGRESS_DESCRIPTION,
+    response_class=StreamingResponse,
+    responses=BULK_RESPONSES
+)
+async def update_users_bulk(
+        update_data: BulkUpdateRequest,
+        current_user: Annotated[TokenData, Depends(verify_access_token)],
+        session: Annotated[AsyncSession, Depends(get_session)]
+) -> StreamingResponse:
+    """
+    Update users in bulk. Only accessible by admins.
+
+    Args:
+        update_data (BulkUpdateRequest): The users and the changes.
+        current_user (TokenData): The current authenticated user.
+        session (AsyncSession): The database session.
+
+    Returns:
+        StreamingResponse: The progress, one JSON line per chunk.
+
+    Raises:
+        HTTPException: 403 Forbidden if the user is not an admin.
+        HTTPException: 413 Request Entity Too Large if more than
+        ``BULK_MAX_RECORDS`` IDs are given.
+    """
+    _require_admin(current_user, "update")
+
+    async def apply(
+            user_ids: list[str], chunk_session: AsyncSession
+    ) -> set[str]:
+        return await update_users_chunk(
+            user_ids, update_data.changes, chunk_session
+        )
+
+    return _progress_response(update_data, apply, "updated", session)
+
+
+@router.delete(
+    '/bulk',
+    summary="Delete users in bulk",
+    description="Delete many users, selected by `ids` or by `filters` (at "
+                "least one filter besides the sort order). Only "
+                "accessible by admins. " + BULK_PROGRESS_DESCRIPTION,
+    response_class=StreamingResponse,
+    responses=BULK_RESPONSES
+)
+async def delete_users_bulk(
+        selection: BulkSelection,
+        current_user: Annotated[TokenData, Depends(verify_access_token)],
+        session: Annotated[AsyncSession, Depends(get_session)]
+) -> StreamingResponse:
+    """
+    Delete users in bulk. Only accessible by admins.
+
+    Args:
+        selection (BulkSelection): The users to delete.
+        current_user (TokenData): The current authenticated user.
+        session (AsyncSession): The database session.
+
+    Returns:
+        StreamingResponse: The progress, one JSON line per chunk.
+
+    Raises:
+        HTTPException: 403 Forbidden if the user is not an admin.
+        HTTPException: 413 Request Entity Too Large if more than
+        ``BULK_MAX_RECORDS`` IDs are given.
+    """
+    _require_admin(current_user, "delete")
+    return _progress_response(
+        selection, delete_users_chunk, "deleted", session
+    )
 
 
 @router.put(
     "/{user_id}",
+    response_model=UserPublic,
     summary="Update a user",
     description="Update a user. Only accessible by admins or the user themselves.", # noqa
     responses={
@@ -169,7 +572,7 @@ async def update_user_endpoint(
     update_data: UserUpdate,
     current_user: Annotated[TokenData, Depends(verify_access_token)],
     session: Annotated[AsyncSession, Depends(get_session)]
-) -> UserPublic:
+) -> Response:
     """
     Update a user. Only accessible by admins or the user themselves.
 
@@ -180,7 +583,7 @@ async def update_user_endpoint(
         session (AsyncSession): The database session.
 
     Returns:
-        UserPublic: The public representation of the updated user.
+        Response: The public representation of the updated user.
 
     Raises:
         HTTPException: 403 Forbidden if the user does not have permission.
@@ -192,11 +595,12 @@ async def update_user_endpoint(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="You do not have permission to update this user"
             )
-    return await update_user(user_id, update_data, session)
+    return user_response(await update_user(user_id, update_data, session))
 
 
 @router.delete(
     "/{user_id}",
+    response_model=UserPublic,
     summary="Delete a user",
     description="Delete a user. Only accessible by admins or the user themselves.", # noqa
     responses={
@@ -210,7 +614,7 @@ async def delete_user_endpoint(
         user_id: UUID,
         current_user: Annotated[TokenData, Depends(verify_access_token)],
         session: Annotated[AsyncSession, Depends(get_session)]
-) -> UserPublic:
+) -> Response:
     """
     Delete a user. Only accessible by admins or the user themselves.
 
@@ -220,20 +624,12 @@ async def delete_user_endpoint(
         session (AsyncSession): The database session.
 
     Returns:
-        UserPublic: The public representation of the deleted user.
+        Response: The public representation of the deleted user.
 
     Raises:
         HTTPException: 403 Forbidden if the user does not have permission.
         HTTPException: 404 Not Found if the user does not exist.
     """
-    user = await get_user_by_id(user_id, session)
-
-    if not user:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="User not found"
-        )
-
     if current_user.role != 'admin':
         if current_user.id != str(user_id):
             raise HTTPException(
@@ -241,6 +637,7 @@ async def delete_user_endpoint(
                 detail="You do not have permission to delete this user"
             )
 
-    await session.delete(user)
-    await session.commit()
-    return UserPublic(**user.to_dict())
+    user = await delete_user(user_id, session)
+    if user is None:
+        raise _user_not_found()
+    return user_response(user)
@@ -0,0 +1,164 @@
+import functools
+import operator
+import re
+from typing import Any
+from sqlalchemy import (
+    ColumnElement, CompoundSelect, Select, and_, func, or_, literal_column,
+    table, column, select, union
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from fast_python_api.core.projection import (
+    PUBLIC_FIELDS, select_fields, to_payload
+)
+from fast_python_api.models import User, Login, Name
+from fast_python_api.settings import settings
+
+
+#: Columns searched by :func:`search_users`.
+SEARCH_COLUMNS = (Name.first_name, Name.last_name, Login.username, User.email)
+
+#: Searched columns with the user ID column of their table.
+SEARCH_KEYS = (
+    (Name.first_name, Name.user_id),
+    (Name.last_name, Name.user_id),
+    (Login.username, Login.uuid),
+    (User.email, User.id),
+)
+
+#: Shortest word with a trigram of its own, shorter ones only match as a
+#: prefix.
+TRIGRAM_MIN_LENGTH = 3
+
+#: FTS5 shadow table maintained by triggers on SQLite, see ``models``.
+users_fts = table("users_fts", column("rowid"))
+
+
+def _like_prefix(term: str) -> str:
+    escaped = re.sub(r"([\\%_])", r"\\\1", term)
+    return f"{escaped}%"
+
+
+def _base_query() -> Select:
+    return select_fields(PUBLIC_FIELDS)
+
+
+def _words(term: str) -> list[str]:
+    return re.findall(r"\w+", term)
+
+
+def _postgresql_match(col: Any, word: str) -> ColumnElement[bool]:
+    # Words shorter than a trigram would scan the whole trigram index,
+    # they use the text_pattern_ops index on the lowercased column
+    if len(word) < TRIGRAM_MIN_LENGTH:
+        return func.lower(col).like(_like_prefix(word.lower()), escape="\\")
+    return or_(col.ilike(_like_prefix(word), escape="\\"), col.op("%")(word))
+
+
+def _postgresql_matches(word: str) -> CompoundSelect:
+    """
+    IDs of the users with a column starting with or similar to ``word``.
+
+    One select per column, joined by ``UNION``, so each one is served by
+    the ``gin_trgm_ops`` index of its column, or by its prefix index for
+    words of one or two characters.
+    """
+    return union(*(
+        select(key).where(_postgresql_match(col, word))
+        for col, key in SEARCH_KEYS
+    ))
+
+
+def _postgresql_query(term: str) -> Select | None:
+    """
+    Match every word of ``term`` as a prefix or by trigram similarity,
+    users matching every word as a prefix first, then by similarity.
+
+    Only the first ``SEARCH_CANDIDATES`` matches are ranked, so a broad
+    term does not compute the similarities of the whole table.
+    """
+    words = _words(term)
+    if not words:
+        return None
+    prefix_match = and_(*(
+        or_(*(
+            col.ilike(_like_prefix(word), escape="\\")
+            for col in SEARCH_COLUMNS
+        ))
+        for word in words
+    ))
+    rank = functools.reduce(operator.add, (
+        func.greatest(*(func.similarity(col, word) for col in SEARCH_COLUMNS))
+        for word in words
+    ))
+    candidates = (
+        select(User.id)
+        .where(*(User.id.in_(_postgresql_matches(word)) for word in words))
+        .limit(settings.SEARCH_CANDIDATES)
+    )
+    return (
+        _base_query()
+        .where(User.id.in_(candidates.scalar_subquery()))
+        .order_by(prefix_match.desc(), rank.desc(), User.id)
+    )
+
+
+def _sqlite_query(term: str) -> Select | None:
+    """
+    Match every word of ``term`` as a prefix in the FTS5 shadow table,
+    ranked by ``bm25``.
+    """
+    words = _words(term)
+    if not words:
+        return None
+    match = " ".join(f'"{word}"*' for word in words)
+    fts = literal_column("users_fts")
+    return (
+        _base_query()
+        .join(users_fts, users_fts.c.rowid == Name.id)
+        .where(fts.op("MATCH")(match))
+        .order_by(func.bm25(fts), User.id)
+    )
+
+
+def _fallback_query(term: str) -> Select:
+    pattern = _like_prefix(term)
+    prefix_match = (
+        col.ilike(pattern, escape="\\") for col in SEARCH_COLUMNS
+    )
+    return (
+        _base_query()
+        .where(or_(*prefix_match))
+        .order_by(Login.username, User.id)
+    )
+
+
+async def search_users(
+        term: str,
+        limit: int,
+        session: AsyncSession
+) -> list[dict[str, Any]]:
+    """
+    Search users by first name, last name, username and email.
+
+    PostgreSQL uses the trigram indexes, SQLite the FTS5 shadow table and
+    any other backend falls back to a plain prefix match.
+
+    Args:
+        term: The search query typed by the user.
+        limit: Maximum number of users to return.
+        session: The database session.
+
+    Returns:
+        ``UserPublic`` payloads of the matches, best matches first.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == "postgresql":
+        query = _postgresql_query(term)
+    elif dialect == "sqlite":
+        query = _sqlite_query(term)
+    else:
+        query = _fallback_query(term)
+    if query is None:
+        return []
+    result = await session.execute(query.limit(limit))
+    return [to_payload(row, PUBLIC_FIELDS) for row in result]
@@ -1,74 +1,232 @@
+from typing import Any
 from fastapi import HTTPException, status
-from sqlalchemy import select
-from sqlalchemy.orm import joinedload
-from fast_python_api.chemas.user_crud import UserPublic, UserCreate, UserUpdate
+from pydantic import BaseModel
+from sqlalchemy import (
+    Insert, RowMapping, Select, Update, delete, insert, select, update
+)
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.exc import IntegrityError
+from fast_python_api.chemas.user_crud import (
+    BulkUserChanges, UserCreate, UserUpdate
+)
+from fast_python_api.chemas.user_db import UserInDB
 from fast_python_api.models import User, Login, Name
-from fast_python_api.auth.hashing import get_password_hash
-from fast_python_api.core.user_db import (
-    email_exists, username_exists, get_user_by_id
+from fast_python_api.auth.hashing import get_password_hash_async
+from fast_python_api.core.cache import user_cache
+from fast_python_api.core.projection import (
+    PUBLIC_FIELDS, related_columns, returning_columns, to_payload
 )
 import uuid
 from uuid import UUID
+from datetime import datetime, timezone
 from sqlalchemy.ext.asyncio import AsyncSession
 
 
-async def create_user(
-        user_data: UserCreate,
-        session: AsyncSession
-) -> UserPublic:
+#: Error messages of the unique constraints a user can violate.
+EMAIL_TAKEN = "User with this email already exists"
+USERNAME_TAKEN = "Username already taken"
+
+
+async def _returning(
+        statement: Insert | Update,
+        session: AsyncSession,
+        duplicate_detail: str
+) -> RowMapping | None:
     """
-    Create a new user.
+    Execute an ``INSERT`` or ``UPDATE ... RETURNING`` of at most one row.
 
     Args:
-        user_data: The data to create the user with.
+        statement: The insert or update.
         session: The database session to use.
+        duplicate_detail: Error message if a unique constraint is
+            violated.
 
     Returns:
-        The created user.
+        The returned row, or None if no row was written.
+
+    Raises:
+        HTTPException: 400 Bad Request with ``duplicate_detail``, the
+        transaction is rolled back.
     """
-    if await email_exists(user_data.email, session):
+    try:
+        result = await session.execute(statement)
+    except IntegrityError:
+        await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="User with this email already exists"
+            detail=duplicate_detail
         )
+    return result.mappings().one_or_none()
+
 
-    if await username_exists(user_data.login.username, session):
+#: Unique constraint of usernames, by the default PostgreSQL name.
+USERNAME_KEY = "logins_username_key"
+
+
+def _user_inserts(
+        user_uuid: str, user_data: UserCreate, password: str
+) -> tuple[Insert, Insert, Insert]:
+    """
+    The ``INSERT ... RETURNING`` statements of a new user, its login and
+    its name, each returning its part of the public representation.
+    """
+    return (
+        insert(User)
+        .values(id=user_uuid, **user_data.model_dump(exclude={"login", "name"}))
+        .returning(*returning_columns(User, PUBLIC_FIELDS)),
+        insert(Login)
+        .values(
+            uuid=user_uuid,
+            username=user_data.login.username,
+            password=password
+        )
+        .returning(*returning_columns(Login, PUBLIC_FIELDS)),
+        insert(Name)
+        .values(user_id=user_uuid, **user_data.name.model_dump())
+        .returning(*returning_columns(Name, PUBLIC_FIELDS)),
+    )
+
+
+def _combined_insert(inserts: tuple[Insert, Insert, Insert]) -> Select:
+    """
+    One statement running ``inserts`` as data-modifying CTEs and
+    selecting their returned rows side by side. PostgreSQL only.
+    """
+    user, login, name = (
+        statement.cte(alias) for statement, alias in zip(inserts, "uln")
+    )
+    return select(user, login, name)
+
+
+async def _insert_combined(
+        inserts: tuple[Insert, Insert, Insert], session: AsyncSession
+) -> RowMapping:
+    try:
+        result = await session.execute(_combined_insert(inserts))
+    except IntegrityError as error:
+        await session.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Username already taken"
+            detail=USERNAME_TAKEN if USERNAME_KEY in str(error.orig)
+            else EMAIL_TAKEN
         )
+    return result.mappings().one()
+
+
+async def _insert_in_turn(
+        inserts: tuple[Insert, Insert, Insert], session: AsyncSession
+) -> dict[str, Any]:
+    user, login, name = inserts
+    user = await _returning(user, session, EMAIL_TAKEN)
+    login = await _returning(login, session, USERNAME_TAKEN)
+    name = await session.execute(name)
+    return {**user, **login, **name.mappings().one()}
+
+
+async def create_user(
+        user_data: UserCreate,
+        session: AsyncSession
+) -> dict[str, Any]:
+    """
+    Create a new user.
+
+    The user, its login and its name are inserted in one transaction,
+    each ``INSERT`` returns its part of the public representation. On
+    PostgreSQL they run as one statement of data-modifying CTEs, a single
+    round trip; elsewhere one after the other, the email being checked
+    first as its row is inserted first. Duplicates are detected by the
+    unique constraints rather than by queries beforehand, so concurrent
+    signups cannot both succeed.
+
+    Args:
+        user_data: The data to create the user with.
+        session: The database session to use.
+
+    Returns:
+        The created user as a ``UserPublic`` payload.
+
+    Raises:
+        HTTPException: 400 Bad Request if the email or the username is
+        already taken.
+    """
     user_uuid = str(uuid.uuid4())
+    password = await get_password_hash_async(user_data.login.password)
+    inserts = _user_inserts(user_uuid, user_data, password)
+    if session.get_bind().dialect.name == "postgresql":
+        row = await _insert_combined(inserts, session)
+    else:
+        row = await _insert_in_turn(inserts, session)
+    await session.commit()
+    await user_cache.invalidate(user_uuid)
+    return to_payload(row, PUBLIC_FIELDS)
 
-    user = User(
-        id=user_uuid,
-        **user_data.model_dump(exclude={"login", "name"}),
 
+def _changes(
+        data: BaseModel | None, exclude: set[str] = frozenset()
+) -> dict[str, Any]:
+    """The fields set in ``data``, skipping nulls and ``exclude``."""
+    if data is None:
+        return {}
+    return {
+        key: value
+        for key, value in data.model_dump(exclude_unset=True).items()
+        if value is not None and key not in exclude
+    }
+
+
+async def _update_name(
+        user_id: str, changes: dict[str, Any], session: AsyncSession
+) -> RowMapping:
+    result = await session.execute(
+        update(Name)
+        .where(Name.user_id == user_id)
+        .values(**changes)
+        .returning(*returning_columns(Name, PUBLIC_FIELDS))
     )
-    name = Name(
-        user_id=user_uuid,
-        **user_data.name.model_dump()
-    )
-    login = Login(
-        uuid=user_uuid,
-        username=user_data.login.username,
-        password=get_password_hash(user_data.login.password)
-    )
+    name = result.mappings().one_or_none()
+    if name is None:
+        # Users created without a name get one
+        result = await session.execute(
+            insert(Name)
+            .values(user_id=user_id, **changes)
+            .returning(*returning_columns(Name, PUBLIC_FIELDS))
+        )
+        name = result.mappings().one()
+    return name
 
-    session.add_all([
-        user, login, name
-    ])
-    await session.commit()
-    await session.refresh(user)
-    return UserPublic(**user.to_dict())
 
+async def _update_login(
+        user_id: str, changes: dict[str, Any], session: AsyncSession
+) -> RowMapping:
+    login = await _returning(
+        update(Login)
+        .where(Login.uuid == user_id)
+        .values(**changes)
+        .returning(*returning_columns(Login, PUBLIC_FIELDS)),
+        session,
+        USERNAME_TAKEN
+    )
+    if login is None:
+        await session.rollback()
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="User has no login data"
+        )
+    return login
 
-async def update_user( # noqa C901
+
+async def update_user(
         user_id: UUID,
         update_data: UserUpdate,
         session: AsyncSession
-) -> UserPublic:
+) -> dict[str, Any]:
     """Update a user
 
+    Only the tables with changed fields are updated, every ``UPDATE``
+    returns its part of the public representation. The ``users`` row is
+    always updated to bump its version, its ``RETURNING`` clause also
+    reads the untouched name and login.
+
     Args:
     - user_id (UUID): The ID of the user to update
     - update_data (UserUpdate): The data to update the user with
@@ -78,49 +236,270 @@ async def update_user( # noqa C901
     - HTTPException: 404 if the user is not found
     - HTTPException: 400 if the user has no login data and login data is
     tried to be updated
+    - HTTPException: 400 if the email or the username is already taken
 
     Returns:
-        The updated user.
+        The updated user as a ``UserPublic`` payload.
     """
-    user = await get_user_by_id(user_id, session)
-
-    if not user:
+    user_id = str(user_id)
+    name_changes = _changes(update_data.name)
+    # The role is not changed here, or users could promote themselves
+    login_changes = _changes(update_data.login, exclude={"role"})
+    if "password" in login_changes:
+        # Hashed before the first statement, so no row lock is held
+        # while it runs
+        login_changes["password"] = await get_password_hash_async(
+            login_changes["password"]
+        )
+    untouched = {
+        model for model, changes in ((Name, name_changes),
+                                     (Login, login_changes))
+        if not changes
+    }
+    # Name and login changes do not touch the users row, bump the
+    # version explicitly so ETags change with them
+    user = await _returning(
+        update(User)
+        .where(User.id == user_id)
+        .values(
+            **_changes(update_data, exclude={"name", "login"}),
+            updated_at=datetime.now(timezone.utc)
+        )
+        .returning(
+            *returning_columns(User, PUBLIC_FIELDS),
+            *related_columns(untouched, PUBLIC_FIELDS, user_id)
+        ),
+        session,
+        EMAIL_TAKEN
+    )
+    if user is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
+    payload = dict(user)
+    if name_changes:
+        payload.update(await _update_name(user_id, name_changes, session))
+    if login_changes:
+        payload.update(await _update_login(user_id, login_changes, session))
+    await session.commit()
+    await user_cache.invalidate(user_id)
+    return to_payload(payload, PUBLIC_FIELDS)
+
+
+async def delete_user(
+        user_id: UUID, session: AsyncSession
+) -> dict[str, Any] | None:
+    """
+    Delete a user with a single ``DELETE ... RETURNING``.
+
+    The name and the login are removed by ``ON DELETE CASCADE`` of their
+    foreign keys, and returned by subqueries of the ``RETURNING`` clause.
+    On SQLite they are read by a query before.
+
+    Args:
+        user_id: The ID of the user to delete.
+        session: The database session to use.
+
+    Returns:
+        The deleted user as a ``UserPublic`` payload, or None if the
+        user does not exist.
+    """
+    user_id = str(user_id)
+    related = related_columns((Name, Login), PUBLIC_FIELDS, user_id)
+    children: dict[str, Any] = {}
+    if session.get_bind().dialect.name == "sqlite":
+        # SQLite cascades before the subqueries of RETURNING run, read
+        # the name and the login beforehand
+        result = await session.execute(select(*related))
+        children, related = dict(result.mappings().one()), []
+    result = await session.execute(
+        delete(User)
+        .where(User.id == user_id)
+        .returning(*returning_columns(User, PUBLIC_FIELDS), *related)
+    )
+    user = result.mappings().one_or_none()
+    if user is None:
+        return None
+    await session.commit()
+    await user_cache.invalidate(user_id)
+    return to_payload({**children, **user}, PUBLIC_FIELDS)
+
+
+#: ``INSERT`` constructs supporting ``ON CONFLICT DO NOTHING``, by dialect.
+CONFLICT_INSERTS = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+#: Details of skipped users, by the table whose insert skipped them.
+SKIP_DETAILS = {
+    "users": "User with this ID or email already exists",
+    "logins": USERNAME_TAKEN,
+}
+
+
+async def _insert_new(
+        model: type, rows: list[dict[str, Any]], session: AsyncSession
+) -> set[str]:
+    """
+    Insert ``rows`` with ``ON CONFLICT DO NOTHING`` as batched multi-row
+    ``INSERT`` statements.
+
+    Args:
+        model: ``User`` or ``Login``.
+        rows: Column values of the rows to insert.
+        session: The database session.
+
+    Returns:
+        The user IDs of the rows that were inserted.
+    """
+    if not rows:
+        return set()
+    key = model.__table__.primary_key.columns[0]
+    insert_new = CONFLICT_INSERTS[session.get_bind().dialect.name]
+    result = await session.execute(
+        insert_new(model.__table__).on_conflict_do_nothing().returning(key),
+        rows
+    )
+    return set(result.scalars().all())
+
+
+async def create_user_bulk(
+        users: list[UserInDB], session: AsyncSession
+) -> dict[str, Any]:
+    """
+    Insert users in bulk, skipping the ones that conflict.
+
+    Users, logins and names are inserted table by table with batched
+    multi-row ``INSERT ... ON CONFLICT DO NOTHING RETURNING``. A user
+    whose login is skipped has its ``users`` row deleted again, so only
+    complete users are kept. Everything happens in one transaction.
+
+    Args:
+        users: The users to insert. Of several users with the same ID,
+            only the first one is inserted.
+        session: The database session.
+
+    Returns:
+        dict: The ``BulkInsertResult`` payload.
+    """
+    unique = list({user.id: user for user in reversed(users)}.values())
+    unique.reverse()
+    new_users = await _insert_new(User, [
+        user.model_dump(exclude={"name", "login"}, exclude_none=True)
+        for user in unique
+    ], session)
+    new_logins = await _insert_new(Login, [
+        user.login.model_dump() for user in unique if user.id in new_users
+    ], session)
+    if new_users - new_logins:
+        await session.execute(
+            delete(User).where(User.id.in_(new_users - new_logins))
+        )
+    if new_logins:
+        await session.execute(insert(Name), [
+            {**user.name.model_dump(), "user_id": user.id} for user in unique
+            if user.id in new_logins
+        ])
+    await session.commit()
+    await user_cache.invalidate(*new_logins)
+    return _bulk_result(users, new_users, new_logins)
 
-    for key, value in update_data.model_dump(exclude_unset=True).items():
-        if key not in ["name", "login"]:
-            setattr(user, key, value)
 
-    if update_data.name:
-        if not user.name:
-            user.name = Name(user_id=user.id, **update_data.name.model_dump())
-        else:
-            for key, value in update_data.name.model_dump(
-                    exclude_unset=True
-            ).items():
-                setattr(user.name, key, value)
+def _bulk_result(
+        users: list[UserInDB], new_users: set[str], new_logins: set[str]
+) -> dict[str, Any]:
+    statuses = []
+    reported = set()
+    for user in users:
+        entry = {
+            "id": user.id,
+            "username": user.login.username,
+            "email": user.email,
+            "status": "skipped",
+            "detail": SKIP_DETAILS["users"],
+        }
+        if user.id in new_logins and user.id not in reported:
+            entry.update(status="inserted", detail=None)
+        elif user.id in new_users and user.id not in reported:
+            entry["detail"] = SKIP_DETAILS["logins"]
+        reported.add(user.id)
+        statuses.append(entry)
+    return {
+        "inserted": len(new_logins),
+        "skipped": len(users) - len(new_logins),
+        "users": statuses,
+    }
 
-    if update_data.login:
-        if not user.login:
-            raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail="User has no login data"
-            )
 
-        if update_data.login.username:
-            user.login.username = update_data.login.username
+async def update_users_chunk(
+        user_ids: list[str],
+        changes: BulkUserChanges,
+        session: AsyncSession
+) -> set[str]:
+    """
+    Apply the same changes to a chunk of users in one short transaction.
 
-        if update_data.login.password:
-            user.login.password = get_password_hash(update_data.login.password)
+    Every table is updated with a single ``UPDATE ... WHERE id IN``, the
+    ``users`` rows always to bump their version. Users without a name
+    keep having none.
 
+    Args:
+        user_ids: IDs of the users to update.
+        changes: The fields to set.
+        session: The database session.
+
+    Returns:
+        The IDs of the users that exist and were updated.
+    """
+    result = await session.execute(
+        update(User)
+        .where(User.id.in_(user_ids))
+        .values(
+            **_changes(changes, exclude={"name", "role"}),
+            updated_at=datetime.now(timezone.utc)
+        )
+        .returning(User.id)
+    )
+    updated = set(result.scalars().all())
+    name_changes = _changes(changes.name)
+    if updated and name_changes:
+        await session.execute(
+            update(Name)
+            .where(Name.user_id.in_(updated))
+            .values(**name_changes)
+        )
+    if updated and changes.role is not None:
+        await session.execute(
+            update(Login)
+            .where(Login.uuid.in_(updated))
+            .values(role=changes.role)
+        )
     await session.commit()
+    await user_cache.invalidate(*updated)
+    return updated
+
+
+async def delete_users_chunk(
+        user_ids: list[str], session: AsyncSession
+) -> set[str]:
+    """
+    Delete a chunk of users in one short transaction.
+
+    Names and logins are removed by ``ON DELETE CASCADE``.
+
+    Args:
+        user_ids: IDs of the users to delete.
+        session: The database session.
+
+    Returns:
+        The IDs of the users that existed and were deleted.
+    """
     result = await session.execute(
-        select(User).options(joinedload(User.name),
-                             joinedload(User.login)
-                             ).where(User.id == str(user_id))
+        delete(User).where(User.id.in_(user_ids)).returning(User.id)
     )
-    user = result.scalars().first()
-    return UserPublic(**user.to_dict())
+    deleted = set(result.scalars().all())
+    await session.commit()
+    await user_cache.invalidate(*deleted)
+    return deleted
@@ -1,114 +1,277 @@
-from fastapi import Depends
-from sqlalchemy import select
-from sqlalchemy.orm import joinedload
-from typing import Annotated
-from fast_python_api.chemas.user_crud import UserPublic
-from fast_python_api.models import User, Login
-from pydantic import EmailStr
-from sqlalchemy.sql import exists
+import operator
+from fastapi import Depends, HTTPException, status
+from sqlalchemy import Select, select, tuple_, ColumnElement
+from typing import Annotated, Any, AsyncIterator, Sequence
+from fast_python_api.chemas.params import UserFilterParams
+from fast_python_api.core.pagination import decode_cursor
+from fast_python_api.core.cache import CachedUser, user_cache
+from fast_python_api.core.projection import (
+    CACHED_FIELDS, IN_DB_FIELDS, PUBLIC_FIELDS, select_fields, to_payload
+)
+from fast_python_api.models import User, Login, Name
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.engine import Row
 import uuid
+from datetime import date, datetime
 
 
-async def get_user_by_username(
-        username: Annotated[str, Depends()],
-        session: AsyncSession
-) -> User | None:
-    """Retrieve a user by username.
+async def _load_user(
+        condition: ColumnElement, session: AsyncSession
+) -> CachedUser | None:
+    """Read the ``CACHED_FIELDS`` of one user and cache them."""
+    generation = await user_cache.generation()
+    query = select_fields(CACHED_FIELDS).where(condition)
+    result = await session.execute(query)
+    row = result.first()
+    if row is None:
+        return None
+    return await user_cache.put(dict(row._mapping), generation)
+
+
+async def get_cached_user(
+        user_uuid: uuid.UUID | str, session: AsyncSession
+) -> CachedUser | None:
+    """Retrieve the cache entry of a user, loading it on a miss.
 
     Args:
-        username: The username of the user.
+        user_uuid: The UUID of the user.
         session: The database session.
 
     Returns:
-        The User object if found, otherwise None.
+        The entry if the user exists, otherwise None.
     """
-    query = (
-        select(User)
-        .join(Login, User.id == Login.uuid)
-        .options(joinedload(User.login), joinedload(User.name))
-        .where(Login.username == username)
+    user_id = str(user_uuid)
+    user = await user_cache.get_by_id(user_id)
+    if user is None:
+        user = await _load_user(User.id == user_id, session)
+    return user
+
+
+async def get_user_in_db(
+        condition: ColumnElement, session: AsyncSession
+) -> dict[str, Any] | None:
+    """Read the ``IN_DB_FIELDS`` of one user, bypassing ``user_cache``.
+
+    The password hash is never cached, this is the only way to read it.
+
+    Args:
+        condition: Selects the user, e.g. ``Login.username == username``.
+        session: The database session.
+
+    Returns:
+        The ``UserInDB`` payload if found, otherwise None.
+    """
+    result = await session.execute(
+        select_fields(IN_DB_FIELDS).where(condition)
     )
-    result = await session.execute(query)
-    return result.scalars().first()
+    row = result.first()
+    return to_payload(row, IN_DB_FIELDS) if row is not None else None
 
 
 async def get_user_by_id(
         user_uuid: Annotated[uuid.UUID, Depends()],
-        session: AsyncSession
-) -> User | None:
+        session: AsyncSession,
+        fields: Sequence[str] = PUBLIC_FIELDS
+) -> dict[str, Any] | None:
     """Retrieve a user by ID.
 
+    Served from ``user_cache`` when possible. On a miss only plain columns
+    are read, no ORM objects are built.
+
     Args:
         user_uuid: The UUID of the user.
         session: The database session.
+        fields: Fields to return, the ``UserPublic`` ones by default.
 
     Returns:
-        The User object if found, otherwise None.
+        The user payload if found, otherwise None.
     """
-    query = (
-        select(User)
-        .join(Login, User.id == Login.uuid)
-        .options(joinedload(User.login), joinedload(User.name))
-        .where(User.id == str(user_uuid))
-    )
-    result = await session.execute(query)
-    return result.scalars().first()
+    user = await get_cached_user(user_uuid, session)
+    return to_payload(user.snapshot, fields) if user is not None else None
+
+
+#: Columns that ``UserFilterParams.sort_by`` may refer to.
+SORT_COLUMNS = {
+    "created_at": User.created_at,
+    "dob": User.dob,
+    "city": User.city,
+    "email": User.email,
+}
+
+#: ``UserFilterParams`` field, column and comparison it compiles to.
+FILTERS = (
+    ("city", User.city, operator.eq),
+    ("role", Login.role, operator.eq),
+    ("dob_from", User.dob, operator.ge),
+    ("dob_to", User.dob, operator.le),
+    ("created_from", User.created_at, operator.ge),
+    ("created_to", User.created_at, operator.le),
+)
 
 
-async def get_users(session: AsyncSession) -> list[UserPublic]:
+def filter_conditions(filters: UserFilterParams) -> list[ColumnElement]:
     """
-    Retrieve a list of users.
+    Compile the filters that are set into SQL conditions.
 
     Args:
-        session: The database session.
+        filters: The requested filters.
 
     Returns:
-        A list of UserPublic objects.
+        A list of conditions to pass to ``Select.where``.
     """
+    return [
+        compare(column, getattr(filters, field))
+        for field, column, compare in FILTERS
+        if getattr(filters, field) is not None
+    ]
+
+
+def _keyset_condition(
+        filters: UserFilterParams, after: str
+) -> ColumnElement:
+    """Build the condition that selects users past the ``after`` cursor."""
+    column = SORT_COLUMNS[filters.sort_by]
+    raw_value, user_id = decode_cursor(after, filters.sort_by)
+    python_type = column.type.python_type
+    try:
+        value = (
+            python_type.fromisoformat(raw_value)
+            if python_type in (date, datetime) else raw_value
+        )
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid cursor"
+        )
+    position = tuple_(column, User.id)
+    if filters.order == "desc":
+        return position < tuple_(value, user_id)
+    return position > tuple_(value, user_id)
+
+
+def _page(
+        query: Select,
+        filters: UserFilterParams,
+        skip: int,
+        limit: int,
+        after: str | None
+) -> Select:
+    """Apply filters, ordering and pagination to a users select."""
+    column = SORT_COLUMNS[filters.sort_by]
+    order = [column, User.id]
+    if filters.order == "desc":
+        order = [column.desc(), User.id.desc()]
     query = (
-        select(User)
-        .join(Login, User.id == Login.uuid)
-        .options(joinedload(User.login), joinedload(User.name))
+        query
+        .where(*filter_conditions(filters))
+        .order_by(*order)
+        .limit(limit)
     )
-    result = await session.execute(query)
-    users_db = result.scalars().all()
-    return [UserPublic(**user.to_dict()) for user in users_db]
+    if after is not None:
+        return query.where(_keyset_condition(filters, after))
+    return query.offset(skip)
 
 
-async def email_exists(
-        email: EmailStr,
-        session: AsyncSession
-) -> bool:
+async def get_user_rows(
+        session: AsyncSession,
+        fields: Sequence[str],
+        filters: UserFilterParams | None = None,
+        skip: int = 0,
+        limit: int = 5,
+        after: str | None = None
+) -> Sequence[Row]:
     """
-    Check if an email exists in the database.
+    Retrieve a filtered page of users ordered by ``(sort_by, id)``,
+    selecting only the columns behind ``fields``.
+
+    Filtering, sorting and pagination are all applied in the query. When
+    ``after`` is given, the page starts right after that cursor (keyset
+    pagination) and ``skip`` is ignored, so deep pages cost the same as
+    the first one.
+
+    Besides the requested fields every row carries ``id``, the sort key
+    and ``updated_at``, so the caller can build the next cursor and the
+    ETag of the page.
 
     Args:
-        email: The email to check.
         session: The database session.
+        fields: Fields to select, see ``projection.FIELD_COLUMNS``.
+        filters: Filters and sort order, defaults to no filters.
+        skip: Number of users to skip.
+        limit: Maximum number of users to return.
+        after: Cursor of the last user of the previous page.
 
     Returns:
-        True if the email exists, otherwise False.
+        Rows keyed by public field names.
     """
-    query = select(exists().where(User.email == email))
+    filters = filters or UserFilterParams()
+    query = select_fields(fields, "id", filters.sort_by, "updated_at")
+    query = _page(query, filters, skip, limit, after)
     result = await session.execute(query)
-    return result.scalar()
+    return result.all()
 
 
-async def username_exists(
-        username: str,
-        session: AsyncSession
-) -> bool:
+async def get_page_versions(
+        session: AsyncSession,
+        filters: UserFilterParams | None = None,
+        skip: int = 0,
+        limit: int = 5,
+        after: str | None = None
+) -> Sequence[Row]:
     """
-    Check if a username exists in the database.
+    Retrieve ``(id, updated_at)`` of the users on a page.
+
+    Selects the same page as :func:`get_user_rows`, with the same joins,
+    but only these two columns, so the version of a page is cheap to
+    compute.
 
     Args:
-        username: The username to check.
         session: The database session.
+        filters: Filters and sort order, defaults to no filters.
+        skip: Number of users to skip.
+        limit: Maximum number of users to return.
+        after: Cursor of the last user of the previous page.
 
     Returns:
-        True if the username exists, otherwise False.
+        Rows of ``(id, updated_at)`` in page order.
     """
-    query = select(exists().where(Login.username == username))
+    filters = filters or UserFilterParams()
+    query = _page(
+        select_fields(("id", "updated_at")), filters, skip, limit, after
+    )
     result = await session.execute(query)
-    return result.scalar()
+    return result.all()
+
+
+async def stream_users(
+        session: AsyncSession,
+        chunk_size: int
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Stream all users as flat rows, ``chunk_size`` rows at a time.
+
+    Only plain columns are selected, so no ORM objects are built, and the
+    result is read through a server-side cursor where the driver supports
+    it. Memory use is bounded by one chunk regardless of the table size.
+
+    Args:
+        session: The database session.
+        chunk_size: Number of rows fetched per round trip.
+
+    Yields:
+        Chunks of rows ordered by ``(created_at, id)``.
+    """
+    query = (
+        select(
+            User.id, User.email, User.dob, User.city, User.created_at,
+            Name.title, Name.first_name, Name.last_name,
+            Login.username, Login.role
+        )
+        .join(Name, User.id == Name.user_id)
+        .join(Login, User.id == Login.uuid)
+        .order_by(User.created_at, User.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    result = await session.stream(query)
+    async for partition in result.partitions():
+        yield partition
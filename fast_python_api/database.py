@@ -1,14 +1,32 @@
 import sys
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, event
 from fast_python_api.settings import settings
 from sqlalchemy.ext.asyncio import (
     AsyncSession, create_async_engine, async_sessionmaker
 )
 
 
+def enable_sqlite_foreign_keys(engine: Engine) -> None:
+    """
+    Enforce foreign keys on every SQLite connection of ``engine``.
+
+    SQLite ignores them, including ``ON DELETE CASCADE``, unless enabled
+    per connection. Other databases are left untouched.
+    """
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def set_foreign_keys(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
 # asynchronous engine
 async_engine = create_async_engine(settings.DATABASE_URL, echo=True)
+enable_sqlite_foreign_keys(async_engine.sync_engine)
 
 # Factory for sessions
 async_session = async_sessionmaker(
@@ -1,21 +1,55 @@
-from fastapi import FastAPI, Depends, Response
+from fastapi import FastAPI, Depends, Header, HTTPException, Response, status
 from starlette.responses import JSONResponse
-from typing import Annotated
-from fast_python_api.chemas.user_db import UserInDB
-from fast_python_api.auth.user_auth import get_current_user
+from contextlib import asynccontextmanager
+from typing import Annotated, AsyncIterator
+from fast_python_api.auth.user_auth import (
+    get_current_user_entry, verify_access_token
+)
+from fast_python_api.auth import throttling
+from fast_python_api.auth.hashing import (
+    bulk_hashing_executor, hashing_executor
+)
+from fast_python_api.auth.revocation import revocation_list
+from fast_python_api.chemas.token import TokenData
+from fast_python_api.core.cache import CachedUser, user_cache
+from fast_python_api.core.etag import make_etag, etag_matches, not_modified
 from fast_python_api.chemas.user_crud import UserPublic
+from fast_python_api.responses import (
+    ORJSONResponse, cached_user_response
+)
 from fast_python_api.settings import settings
 from fast_python_api.services import routes as external_api
+from fast_python_api.services.http import http_client
+from fast_python_api.services.jobs import import_jobs
 from fast_python_api.auth import routes as auth_routes
 from fast_python_api.core import routes as users_router
 
 
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """Start and stop the resources shared by all requests."""
+    await user_cache.backend.start()
+    revocation_list.start(settings.REVOCATION_SYNC_INTERVAL)
+    http_client.start()
+    await import_jobs.start(settings.IMPORT_JOB_WORKERS)
+    yield
+    # Running jobs are queued again, the next start resumes them
+    await import_jobs.close()
+    await http_client.close()
+    await revocation_list.close()
+    await user_cache.backend.close()
+    hashing_executor.shutdown()
+    bulk_hashing_executor.shutdown()
+
+
 app = FastAPI(
     title="Fast Python API",
     description="This API integrates external data sources, "
                 "supports user management, and JWT authentication. "
                 "For detailed documentation, visit /docs.",
-    version=settings.APP_VERSION
+    version=settings.APP_VERSION,
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
 )
 
 app.include_router(external_api.router)
@@ -64,6 +98,7 @@ async def homepage_head():
 @app.get(
     "/me",
     tags=["Current User"],
+    response_model=UserPublic,
     description="Get information about the current user",
     responses={
         200: {
@@ -89,21 +124,28 @@ async def homepage_head():
                 }
             }
         },
+        304: {"description": "Current user not modified"},
         401: {"description": "Unauthorized, invalid or missing credentials"},
         500: {"description": "Internal server error"}
     }
 )
 async def read_users_me(
-        current_user: Annotated[UserInDB, Depends(get_current_user)]
-) -> UserPublic:
+        user: Annotated[CachedUser, Depends(get_current_user_entry)],
+        if_none_match: Annotated[str | None, Header()] = None
+) -> Response:
     """
     Retrieve the current user's public information.
 
+    The user is found by the ID claim of the token and served from the
+    user cache, the database is only queried on a miss. The ETag matches
+    the one of ``GET /users/{id}`` for the same user.
+
     Args:
-        current_user (UserInDB): The currently authenticated user.
+        user (CachedUser): Cache entry of the current user.
+        if_none_match (str | None): ETag of the copy held by the client.
 
     Returns:
-        UserPublic: The public representation of the current user.
+        Response: The public representation of the current user.
 
     Raises:
         HTTPException: 401 Unauthorized if the user is not authenticated.
@@ -113,4 +155,49 @@ async def read_users_me(
     Example:
         curl -X GET http://localhost:8000/me -H "Authorization: Bearer <token>"
     """
-    return UserPublic(**current_user.model_dump())
+    etag = make_etag(user.snapshot["id"], user.version, None)
+    if etag_matches(if_none_match, etag):
+        return not_modified(etag)
+    return cached_user_response(user, headers={"ETag": etag})
+
+
+@app.get(
+    "/metrics",
+    tags=["Metrics"],
+    description="Get runtime counters of the service. "
+                "Only accessible by admins.",
+    responses={
+        200: {"description": "Current counters"},
+        401: {"description": "Unauthorized, invalid or missing credentials"},
+        403: {"description": "Forbidden, not enough permissions"}
+    }
+)
+async def read_metrics(
+        token: Annotated[TokenData, Depends(verify_access_token)]
+) -> dict:
+    """
+    Retrieve runtime counters, e.g. to size the user cache.
+
+    Args:
+        token (TokenData): Claims of the access token.
+
+    Returns:
+        dict: Counters grouped by component.
+
+    Raises:
+        HTTPException: 403 Forbidden if the user is not an admin.
+    """
+    if token.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to read metrics"
+        )
+    return {
+        "user_cache": user_cache.stats(),
+        "hashing": hashing_executor.stats(),
+        "bulk_hashing": bulk_hashing_executor.stats(),
+        "login": throttling.stats(),
+        "revoked_tokens": revocation_list.stats(),
+        "http": http_client.stats(),
+        "import_jobs": import_jobs.stats(),
+    }
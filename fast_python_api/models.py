@@ -1,8 +1,10 @@
-from sqlalchemy import Column, Integer, String, DateTime, Date, ForeignKey
+from sqlalchemy import (
+    BigInteger, Column, Integer, JSON, String, DateTime, Date, Float,
+    ForeignKey, Index, DDL, event, func
+)
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime, timezone
-from typing import Any
 import uuid
 
 
@@ -16,6 +18,19 @@ class User(Base):
     email and etc.
     """
     __tablename__ = 'users'
+    __table_args__ = (
+        # Back the (sort key, id) orderings used by keyset pagination
+        # and the range filters of the users list
+        Index('ix_users_created_at_id', 'created_at', 'id'),
+        Index('ix_users_city_created_at_id', 'city', 'created_at', 'id'),
+        Index('ix_users_city_id', 'city', 'id'),
+        Index('ix_users_dob_id', 'dob', 'id'),
+        Index(
+            'ix_users_email_trgm', 'email',
+            postgresql_using='gin',
+            postgresql_ops={'email': 'gin_trgm_ops'},
+        ).ddl_if(dialect='postgresql'),
+    )
 
     id = Column(
         String,
@@ -32,6 +47,15 @@ class User(Base):
         nullable=False,
         default=lambda: datetime.now(timezone.utc)
     )
+    # Bumped on every change of the user, its name or its login. Serves
+    # as the row version behind ETags.
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        server_default=func.now()
+    )
 
     # Связываем с Name
     name = relationship(
@@ -50,26 +74,6 @@ class User(Base):
         cascade="all, delete-orphan"
     )
 
-    def to_dict(self) -> dict[str, Any]:
-        return {
-            "id": self.id,
-            "dob": self.dob,
-            "city": self.city,
-            "email": self.email,
-            "created_at": self.created_at,
-            "name": {
-                "title": self.name.title,
-                "first_name": self.name.first_name,
-                "last_name": self.name.last_name,
-            },
-            "login": {
-                "uuid": self.login.uuid,
-                "role": self.login.role,
-                "username": self.login.username,
-                "password": self.login.password,
-            },
-        }
-
     def __repr__(self):
         name_repr = (
             f'{self.name.title} {self.name.first_name} {self.name.last_name}'
@@ -90,6 +94,18 @@ class Name(Base):
     last name and etc.
     """
     __tablename__ = 'names'
+    __table_args__ = (
+        Index(
+            'ix_names_first_name_trgm', 'first_name',
+            postgresql_using='gin',
+            postgresql_ops={'first_name': 'gin_trgm_ops'},
+        ).ddl_if(dialect='postgresql'),
+        Index(
+            'ix_names_last_name_trgm', 'last_name',
+            postgresql_using='gin',
+            postgresql_ops={'last_name': 'gin_trgm_ops'},
+        ).ddl_if(dialect='postgresql'),
+    )
 
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(
@@ -119,6 +135,14 @@ class Login(Base):
     Contains information about a user such as username, password and etc.
     """
     __tablename__ = 'logins'
+    __table_args__ = (
+        Index('ix_logins_role_uuid', 'role', 'uuid'),
+        Index(
+            'ix_logins_username_trgm', 'username',
+            postgresql_using='gin',
+            postgresql_ops={'username': 'gin_trgm_ops'},
+        ).ddl_if(dialect='postgresql'),
+    )
 
     uuid = Column(
         String,
@@ -136,3 +160,155 @@ class Login(Base):
 
     def __repr__(self):
         return f"Login(uuid={self.uuid})"
+
+
+class RevokedToken(Base):
+    """
+    Represents a refresh token that can no longer be used.
+    A refresh token is revoked once it is exchanged for a new pair or on
+    logout. Rows are kept until the token would have expired anyway.
+    """
+    __tablename__ = 'revoked_tokens'
+
+    jti = Column(String, primary_key=True)
+    # JWT ``exp`` claim, seconds since the epoch
+    expires_at = Column(BigInteger, nullable=False, index=True)
+
+    def __repr__(self):
+        return f"RevokedToken(jti={self.jti})"
+
+
+class ImportJob(Base):
+    """
+    Represents a background import of users from the external API.
+    The counters are updated after every stored page, so a job that was
+    interrupted can resume with the users it has not fetched yet.
+    """
+    __tablename__ = 'import_jobs'
+
+    id = Column(
+        String,
+        primary_key=True,
+        default=lambda: str(uuid.uuid4())
+    )
+    # queued, running, done, failed or cancelled
+    status = Column(String(20), nullable=False, default="queued", index=True)
+    # ``ImportParams`` of the job
+    params = Column(JSON, nullable=False)
+    requested = Column(Integer, nullable=False)
+    fetched = Column(Integer, nullable=False, default=0)
+    inserted = Column(Integer, nullable=False, default=0)
+    skipped = Column(Integer, nullable=False, default=0)
+    error = Column(String, nullable=True)
+    # Bumped whenever a worker claims the job, a worker only writes to
+    # the job while the version is the one it claimed
+    version = Column(Integer, nullable=False, default=0)
+    created_by = Column(String, nullable=True)
+    created_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc)
+    )
+    started_at = Column(DateTime(timezone=True), nullable=True)
+    # Heartbeat of the running worker
+    updated_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(timezone.utc)
+    )
+    finished_at = Column(DateTime(timezone=True), nullable=True)
+    # Time the job spent held by workers, without the pauses between runs
+    run_seconds = Column(Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f"ImportJob(id={self.id}, status={self.status})"
+
+
+# Search indexes.
+#
+# On PostgreSQL the trigram GIN indexes declared above serve the search
+# queries and only need the pg_trgm extension. Words of one or two
+# characters have no trigram to look up, they are matched as a prefix of
+# the lowercased column through these text_pattern_ops indexes.
+for _column in (Name.first_name, Name.last_name, Login.username, User.email):
+    Index(
+        f'ix_{_column.table.name}_{_column.name}_prefix',
+        func.lower(_column).label(_column.name),
+        postgresql_ops={_column.name: 'text_pattern_ops'},
+    ).ddl_if(dialect='postgresql')
+
+# SQLite has no trigram indexes, so an FTS5 shadow table is kept in sync
+# with users, names and logins by triggers. Its rowid is ``names.id``, the
+# only stable integer key with exactly one row per user.
+USERS_FTS_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+        first_name, last_name, username, email, prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_names_ai
+    AFTER INSERT ON names BEGIN
+        INSERT INTO users_fts(rowid, first_name, last_name, username, email)
+        VALUES (
+            new.id, new.first_name, new.last_name,
+            (SELECT username FROM logins WHERE uuid = new.user_id),
+            (SELECT email FROM users WHERE id = new.user_id)
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_names_au
+    AFTER UPDATE OF first_name, last_name ON names BEGIN
+        UPDATE users_fts
+        SET first_name = new.first_name, last_name = new.last_name
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_names_ad
+    AFTER DELETE ON names BEGIN
+        DELETE FROM users_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_logins_ai
+    AFTER INSERT ON logins BEGIN
+        UPDATE users_fts SET username = new.username
+        WHERE rowid = (SELECT id FROM names WHERE user_id = new.uuid);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_logins_au
+    AFTER UPDATE OF username ON logins BEGIN
+        UPDATE users_fts SET username = new.username
+        WHERE rowid = (SELECT id FROM names WHERE user_id = new.uuid);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_users_au
+    AFTER UPDATE OF email ON users BEGIN
+        UPDATE users_fts SET email = new.email
+        WHERE rowid = (SELECT id FROM names WHERE user_id = new.id);
+    END
+    """,
+)
+
+event.listen(
+    Base.metadata,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(
+        dialect='postgresql'
+    )
+)
+for statement in USERS_FTS_DDL:
+    event.listen(
+        Base.metadata,
+        'after_create',
+        DDL(statement).execute_if(dialect='sqlite')
+    )
+event.listen(
+    Base.metadata,
+    'before_drop',
+    DDL('DROP TABLE IF EXISTS users_fts').execute_if(dialect='sqlite')
+)
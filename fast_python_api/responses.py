@@ -0,0 +1,84 @@
+"""
+Responses
+---------
+
+Fast serialization of API responses.
+
+User models are validated straight from ORM objects through a cached
+``TypeAdapter`` and dumped to JSON bytes by pydantic-core.
+The result is returned as a ready ``Response``, so FastAPI does not
+validate and serialize it a second time against the ``response_model``.
+Plain payloads are rendered with orjson.
+
+"""
+
+
+from typing import Any, Sequence
+import orjson
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from fast_python_api.chemas.user_crud import UserPublic
+from fast_python_api.core.cache import CachedUser
+from fast_python_api.core.projection import to_payload
+
+
+#: Shared adapter, building it is far more expensive than using them.
+user_adapter = TypeAdapter(UserPublic)
+
+
+class ORJSONResponse(JSONResponse):
+    """
+    JSON response rendered by orjson.
+
+    Dates, datetimes and UUIDs are serialized natively, UTC datetimes
+    end with ``Z`` like in pydantic output.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(
+            content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+        )
+
+
+def user_response(user: Any, **kwargs: Any) -> Response:
+    """
+    Serialize one user into a JSON response.
+
+    Args:
+        user: A ``User`` ORM object or any object with the same attributes.
+        **kwargs: Extra arguments for ``Response``, e.g. ``headers``.
+
+    Returns:
+        Response: The ``UserPublic`` representation of the user.
+    """
+    model = user_adapter.validate_python(user, from_attributes=True)
+    return Response(
+        user_adapter.dump_json(model),
+        media_type="application/json",
+        **kwargs
+    )
+
+
+def cached_user_response(
+        user: CachedUser,
+        fields: Sequence[str] | None = None,
+        **kwargs: Any
+) -> Response:
+    """
+    Build a response from a cache entry.
+
+    The full representation is sent as the stored bytes, a sparse
+    fieldset is projected from the snapshot.
+
+    Args:
+        user: The cache entry of the user.
+        fields: Sparse fieldset, or None for the full representation.
+        **kwargs: Extra arguments for ``Response``, e.g. ``headers``.
+
+    Returns:
+        Response: The public representation of the user.
+    """
+    if fields:
+        return ORJSONResponse(to_payload(user.snapshot, fields), **kwargs)
+    return Response(user.body, media_type="application/json", **kwargs)
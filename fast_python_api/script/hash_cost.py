@@ -0,0 +1,150 @@
+"""
+Password hash cost
+------------------
+
+Measure how long hashing and verifying a password takes on this host for
+every supported scheme and cost, and recommend the highest cost whose
+verification fits the login latency budget.
+
+Usage::
+
+    python -m fast_python_api.script.hash_cost [--target-ms 250]
+        [--scheme bcrypt] [--samples 3] [--write-env .env]
+
+With ``--write-env`` the recommendation is stored as ``HASH_SCHEME`` and
+``HASH_ROUNDS`` in that env file. Stored hashes migrate to the new cost
+on the next login of every user.
+
+Costs below ``MIN_COSTS`` are never recommended. If no cost of the scheme
+from the minimum up fits the budget, the script exits with status 1 and
+writes nothing.
+
+"""
+
+
+import argparse
+import os
+import statistics
+import time
+from typing import Iterator
+from fast_python_api.auth.hashing import SCHEMES, make_context
+
+
+#: Costs tried per scheme, cheapest first.
+COSTS = {
+    "bcrypt": range(4, 17),
+    "pbkdf2_sha256": [10000 * 2 ** power for power in range(9)],
+}
+
+#: Lowest cost recommended per scheme, cheaper ones are only measured.
+MIN_COSTS = {
+    "bcrypt": 10,
+    "pbkdf2_sha256": 160000,
+}
+
+
+def measure(scheme: str, rounds: int, samples: int) -> tuple[float, float]:
+    """
+    Time hashing and verifying a password.
+
+    Args:
+        scheme: The scheme to measure.
+        rounds: Its cost.
+        samples: Number of measurements, the median is kept.
+
+    Returns:
+        The hash and verify time in milliseconds.
+    """
+    context = make_context(scheme, rounds)
+    hash_times, verify_times = [], []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hashed = context.hash("benchmark-password")
+        hash_times.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        context.verify("benchmark-password", hashed)
+        verify_times.append(time.perf_counter() - start)
+    return (
+        statistics.median(hash_times) * 1000,
+        statistics.median(verify_times) * 1000
+    )
+
+
+def sweep(
+        scheme: str, target_ms: float, samples: int
+) -> Iterator[tuple[int, float, float]]:
+    """
+    Measure the costs of ``scheme`` until one exceeds twice the target.
+
+    Yields:
+        Tuples of cost, hash time and verify time in milliseconds.
+    """
+    # Load the backend of the scheme before the first measurement
+    make_context(scheme).hash("warm-up")
+    for rounds in COSTS[scheme]:
+        hash_ms, verify_ms = measure(scheme, rounds, samples)
+        yield rounds, hash_ms, verify_ms
+        if verify_ms > 2 * target_ms:
+            return
+
+
+def write_env(path: str, values: dict[str, str]) -> None:
+    """
+    Set ``values`` in the env file at ``path``, keeping its other lines.
+
+    Args:
+        path: The env file, created if missing.
+        values: Variables to set.
+    """
+    lines = []
+    if os.path.exists(path):
+        with open(path, encoding="utf-8") as env_file:
+            lines = env_file.read().splitlines()
+    lines = [
+        line for line in lines
+        if line.split("=", 1)[0].strip() not in values
+    ]
+    lines.extend(f"{name}={value}" for name, value in values.items())
+    with open(path, "w", encoding="utf-8") as env_file:
+        env_file.write("\n".join(lines) + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[4])
+    parser.add_argument("--target-ms", type=float, default=250.0)
+    parser.add_argument("--scheme", choices=SCHEMES, default=SCHEMES[0])
+    parser.add_argument("--samples", type=int, default=3)
+    parser.add_argument("--write-env", metavar="PATH")
+    args = parser.parse_args()
+
+    recommended = {}
+    print(f"{'scheme':>14} {'cost':>8} {'hash ms':>9} {'verify ms':>10}")
+    for scheme in SCHEMES:
+        for rounds, hash_ms, verify_ms in sweep(
+                scheme, args.target_ms, args.samples
+        ):
+            print(
+                f"{scheme:>14} {rounds:>8} {hash_ms:>9.1f} {verify_ms:>10.1f}"
+            )
+            if verify_ms <= args.target_ms and rounds >= MIN_COSTS[scheme]:
+                recommended[scheme] = rounds
+
+    if args.scheme not in recommended:
+        parser.exit(1, (
+            f"No {args.scheme} cost of at least {MIN_COSTS[args.scheme]} "
+            f"verifies within {args.target_ms:g} ms, nothing recommended\n"
+        ))
+    rounds = recommended[args.scheme]
+    print(
+        f"Recommended for {args.target_ms:g} ms: "
+        f"HASH_SCHEME={args.scheme} HASH_ROUNDS={rounds}"
+    )
+    if args.write_env:
+        write_env(args.write_env, {
+            "HASH_SCHEME": args.scheme, "HASH_ROUNDS": str(rounds)
+        })
+        print(f"Written to {args.write_env}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,8 @@ async def init_user(data: dict, session: AsyncSession) -> None:
         user_uuid=data['login']['uuid'], session=session
     )
     if existing_user:
-        print(f'User {existing_user.login.username} already exists')
+        username = existing_user['login']['username']
+        print(f'User {username} already exists')
         return
 
     user_data = UserInDB(
@@ -1,13 +1,72 @@
-from typing import AsyncGenerator
-from aiohttp import ClientSession
+from typing import Any, AsyncGenerator
+from aiohttp import ClientSession, ClientTimeout, TCPConnector
+from fast_python_api.settings import settings
+
+
+class HttpClient:
+    """
+    The ``aiohttp`` session shared by all requests to external services.
+
+    One session, and so one connection pool, lives as long as the app:
+    connections are kept alive between requests and DNS answers are
+    cached, so only the first request to a host pays for the lookup and
+    the TCP and TLS handshakes. Limits, keep-alive and timeouts come from
+    the ``HTTP_*`` settings.
+    """
+
+    def __init__(self) -> None:
+        self.session: ClientSession | None = None
+        self.sessions_created = 0
+
+    def _new_session(self) -> ClientSession:
+        self.sessions_created += 1
+        return ClientSession(
+            connector=TCPConnector(
+                limit=settings.HTTP_POOL_LIMIT,
+                limit_per_host=settings.HTTP_POOL_LIMIT_PER_HOST,
+                keepalive_timeout=settings.HTTP_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=settings.HTTP_DNS_CACHE_TTL,
+            ),
+            timeout=ClientTimeout(
+                total=settings.HTTP_TIMEOUT,
+                connect=settings.HTTP_CONNECT_TIMEOUT,
+            ),
+        )
+
+    def start(self) -> None:
+        """Open the shared session, called from the app lifespan."""
+        if self.session is None:
+            self.session = self._new_session()
+
+    async def close(self) -> None:
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "shared": self.session is not None,
+            "sessions_created": self.sessions_created,
+        }
+
+
+#: Shared HTTP session, opened and closed by the app lifespan.
+http_client = HttpClient()
 
 
 async def get_http_session() -> AsyncGenerator[ClientSession, None]:
     """
     Get an aiohttp ClientSession that can be used to make HTTP requests.
 
+    The shared session of ``http_client`` is used once the app lifespan
+    has started it. Without a lifespan, e.g. in tests, every request gets
+    a session of its own, closed after the request.
+
     Yields:
         ClientSession: An aiohttp ClientSession.
     """
-    async with ClientSession() as session:
+    if http_client.session is not None:
+        yield http_client.session
+        return
+    async with http_client._new_session() as session:
         yield session
@@ -0,0 +1,354 @@
+import asyncio
+from contextlib import aclosing, asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable
+from fastapi import HTTPException
+from sqlalchemy import ColumnElement, and_, func, or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from fast_python_api.chemas.import_job import ImportJobStatus
+from fast_python_api.chemas.params import ImportParams
+from fast_python_api.core.user_crud import create_user_bulk
+from fast_python_api.database import async_session
+from fast_python_api.logging_config import logger
+from fast_python_api.models import ImportJob
+from fast_python_api.services.http import get_http_session
+from fast_python_api.services.utils import fetch_user_pages
+from fast_python_api.settings import settings
+
+
+#: Statuses of jobs that are waiting for or held by a worker.
+ACTIVE = ("queued", "running")
+
+#: Statuses a job can be resumed from, besides a stale ``running``.
+RESUMABLE = ("failed", "cancelled")
+
+http_session = asynccontextmanager(get_http_session)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+def _aware(value: datetime) -> datetime:
+    # SQLite returns naive datetimes, they are stored in UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def _orphaned() -> ColumnElement[bool]:
+    """Running jobs whose worker has not saved progress for a while."""
+    stale = _now() - timedelta(seconds=settings.IMPORT_JOB_STALE_AFTER)
+    return and_(ImportJob.status == "running", ImportJob.updated_at < stale)
+
+
+def job_payload(job: ImportJob) -> dict[str, Any]:
+    """
+    Build the ``ImportJobStatus`` payload of a job.
+
+    Args:
+        job: The job.
+
+    Returns:
+        The payload, with the throughput over the time the job ran.
+    """
+    payload = ImportJobStatus.model_validate(job).model_dump(mode="json")
+    elapsed = job.run_seconds or 0.0
+    if job.status == "running":
+        elapsed += (_now() - _aware(job.updated_at)).total_seconds()
+    if elapsed > 0:
+        payload["users_per_second"] = round(job.fetched / elapsed, 1)
+    return payload
+
+
+class ImportJobQueue:
+    """
+    In-process pool of workers running background imports.
+
+    Jobs live in the ``import_jobs`` table, the queue only passes their
+    IDs to the workers. A worker claims a job by bumping its version and
+    only writes to it while the version is still the one it claimed, so
+    a job cancelled or resumed elsewhere is left alone. Counters are
+    saved after every stored page. Jobs still queued or running when the
+    app stops are picked up again by :meth:`start`, with the users they
+    have not fetched yet. Running jobs left behind by a worker that died
+    are picked up once they are stale, by a sweep every
+    ``IMPORT_JOB_STALE_AFTER`` seconds.
+
+    Args:
+        session_factory: Opens the database sessions of the workers.
+    """
+
+    def __init__(
+            self, session_factory: Callable[[], AsyncSession] = async_session
+    ) -> None:
+        self.session_factory = session_factory
+        self.queue: asyncio.Queue | None = None
+        self._workers: list[asyncio.Task] = []
+        self._sweeper: asyncio.Task | None = None
+        # When each held job last had its run time saved
+        self._beats: dict[str, datetime] = {}
+        self.completed = 0
+
+    def submit(self, job_id: str, version: int) -> None:
+        """
+        Hand a job to the workers. Without started workers it stays
+        queued in the table until the next :meth:`start`.
+        """
+        if self.queue is not None:
+            self.queue.put_nowait((job_id, version))
+
+    async def create(
+            self,
+            params: ImportParams,
+            created_by: str | None,
+            session: AsyncSession
+    ) -> ImportJob:
+        """
+        Store a new job and queue it.
+
+        Args:
+            params: What to import.
+            created_by: ID of the admin importing.
+            session: The database session.
+
+        Returns:
+            The queued job.
+        """
+        job = ImportJob(
+            params=params.model_dump(),
+            requested=params.results,
+            created_by=created_by
+        )
+        session.add(job)
+        await session.commit()
+        self.submit(job.id, job.version)
+        return job
+
+    async def cancel(self, job: ImportJob, session: AsyncSession) -> bool:
+        """
+        Cancel a queued or running job. A running job stops after the
+        page it is storing.
+
+        Returns:
+            False if the job had already finished.
+        """
+        now = _now()
+        result = await session.execute(
+            update(ImportJob)
+            .where(ImportJob.id == job.id, ImportJob.status.in_(ACTIVE))
+            .values(status="cancelled", finished_at=now, updated_at=now)
+        )
+        await session.commit()
+        return result.rowcount == 1
+
+    async def resume(self, job: ImportJob, session: AsyncSession) -> bool:
+        """
+        Queue a failed or cancelled job again, for its remaining users.
+        So is a running job whose worker has not saved progress for
+        ``IMPORT_JOB_STALE_AFTER`` seconds, e.g. after a crash. ``job`` is
+        refreshed before it is handed to the workers.
+
+        Returns:
+            False if the job is not in a resumable state.
+        """
+        result = await session.execute(
+            update(ImportJob)
+            .where(
+                ImportJob.id == job.id,
+                or_(ImportJob.status.in_(RESUMABLE), _orphaned())
+            )
+            .values(
+                status="queued",
+                error=None,
+                finished_at=None,
+                version=ImportJob.version + 1,
+                updated_at=_now()
+            )
+            .returning(ImportJob.version)
+        )
+        version = result.scalar_one_or_none()
+        await session.commit()
+        if version is None:
+            return False
+        await session.refresh(job)
+        self.submit(job.id, version)
+        return True
+
+    async def _claim(
+            self, job_id: str, version: int, session: AsyncSession
+    ) -> ImportJob | None:
+        now = _now()
+        result = await session.execute(
+            update(ImportJob)
+            .where(
+                ImportJob.id == job_id,
+                ImportJob.version == version,
+                ImportJob.status.in_(ACTIVE)
+            )
+            .values(
+                status="running",
+                version=version + 1,
+                started_at=func.coalesce(ImportJob.started_at, now),
+                updated_at=now
+            )
+            .returning(ImportJob)
+        )
+        job = result.scalars().one_or_none()
+        await session.commit()
+        if job is not None:
+            self._beats[job.id] = now
+        return job
+
+    async def _save(
+            self, job: ImportJob, session: AsyncSession, **values: Any
+    ) -> bool:
+        """Update a job the worker holds, False if it lost the job."""
+        now = _now()
+        ran = (now - self._beats.get(job.id, now)).total_seconds()
+        self._beats[job.id] = now
+        result = await session.execute(
+            update(ImportJob)
+            .where(
+                ImportJob.id == job.id,
+                ImportJob.version == job.version,
+                ImportJob.status == "running"
+            )
+            .values(
+                updated_at=now,
+                run_seconds=ImportJob.run_seconds + ran,
+                **values
+            )
+            # The loaded job may be stale, it must not be updated blindly
+            .execution_options(synchronize_session=False)
+        )
+        await session.commit()
+        return result.rowcount == 1
+
+    async def _import(self, job: ImportJob, session: AsyncSession) -> None:
+        params = ImportParams.model_validate(job.params).model_copy(
+            update={"results": max(job.requested - job.fetched, 0)}
+        )
+        async with http_session() as client, aclosing(fetch_user_pages(
+                client, params,
+                settings.IMPORT_PAGE_SIZE, settings.IMPORT_CONCURRENCY
+        )) as pages:
+            async for users in pages:
+                page = await create_user_bulk(users, session)
+                if not await self._save(
+                        job, session,
+                        fetched=ImportJob.fetched + len(users),
+                        inserted=ImportJob.inserted + page["inserted"],
+                        skipped=ImportJob.skipped + page["skipped"]
+                ):
+                    return
+        await self._save(job, session, status="done", finished_at=_now())
+
+    async def run(self, job_id: str, version: int) -> None:
+        """
+        Claim and run a job, unless it was claimed, cancelled or resumed
+        since it was queued with ``version``.
+        """
+        async with self.session_factory() as session:
+            job = await self._claim(job_id, version, session)
+            if job is None:
+                return
+            try:
+                await self._import(job, session)
+            except asyncio.CancelledError:
+                # The app is stopping, the next start resumes the job
+                await session.rollback()
+                await self._save(job, session, status="queued")
+                raise
+            except HTTPException as error:
+                await session.rollback()
+                await self._fail(job, str(error.detail), session)
+            except Exception as error:
+                logger.exception("Import job %s failed", job_id)
+                await session.rollback()
+                await self._fail(job, str(error), session)
+            finally:
+                self._beats.pop(job_id, None)
+
+    async def _fail(
+            self, job: ImportJob, error: str, session: AsyncSession
+    ) -> None:
+        await self._save(
+            job, session, status="failed", error=error, finished_at=_now()
+        )
+
+    async def _work(self) -> None:
+        while True:
+            job_id, version = await self.queue.get()
+            try:
+                await self.run(job_id, version)
+            except Exception:
+                logger.exception("Import job %s failed", job_id)
+            finally:
+                self.completed += 1
+                self.queue.task_done()
+
+    async def resume_interrupted(self, queued: bool = True) -> None:
+        """
+        Queue the running jobs whose worker has not saved progress for
+        ``IMPORT_JOB_STALE_AFTER`` seconds, and unless ``queued`` is False
+        the jobs left queued.
+        """
+        interrupted = _orphaned()
+        if queued:
+            interrupted = or_(ImportJob.status == "queued", interrupted)
+        async with self.session_factory() as session:
+            rows = await session.execute(
+                select(ImportJob.id, ImportJob.version)
+                .where(interrupted)
+                .order_by(ImportJob.created_at)
+            )
+            interrupted = rows.all()
+        for job_id, version in interrupted:
+            self.submit(job_id, version)
+
+    async def _sweep(self) -> None:
+        # A job whose worker died shortly before a restart is not stale
+        # yet when the app starts, it is picked up by a later sweep. Jobs
+        # left queued are already in the queue.
+        while True:
+            await asyncio.sleep(settings.IMPORT_JOB_STALE_AFTER)
+            try:
+                await self.resume_interrupted(queued=False)
+            except Exception:
+                logger.exception("Resuming import jobs failed")
+
+    async def start(self, workers: int) -> None:
+        """Start ``workers`` workers and resume interrupted jobs."""
+        self.queue = asyncio.Queue()
+        self._workers = [
+            asyncio.create_task(self._work()) for _ in range(workers)
+        ]
+        self._sweeper = asyncio.create_task(self._sweep())
+        try:
+            await self.resume_interrupted()
+        except Exception:
+            logger.exception("Resuming import jobs failed")
+
+    async def join(self) -> None:
+        """Wait until every queued job has been run."""
+        if self.queue is not None:
+            await self.queue.join()
+
+    async def close(self) -> None:
+        tasks = [*self._workers, *filter(None, [self._sweeper])]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers, self._sweeper, self.queue = [], None, None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "workers": len(self._workers),
+            "queued": self.queue.qsize() if self.queue is not None else 0,
+            "completed": self.completed,
+        }
+
+
+#: Background import jobs, started by the app lifespan.
+import_jobs = ImportJobQueue()
@@ -1,18 +1,23 @@
+from contextlib import aclosing
 from typing import Annotated
 from aiohttp import ClientSession
 from fast_python_api.settings import settings
 from sqlalchemy.ext.asyncio import AsyncSession
+from fast_python_api.chemas.import_job import ImportJobStatus
 from fast_python_api.chemas.token import TokenData
-from fast_python_api.chemas.user_db import UserInDB
-from fast_python_api.chemas.user_crud import UserPublic
-from fast_python_api.chemas.params import RandomUserParams
-from fast_python_api.services.utils import get_http_session
-from fastapi import APIRouter, Depends, HTTPException, status
+from fast_python_api.chemas.user_crud import BulkInsertResult
+from fast_python_api.chemas.params import ImportParams, RandomUserParams
+from fast_python_api.services.http import get_http_session
+from fastapi import (
+    APIRouter, Depends, HTTPException, Path, Query, Response, status
+)
 from fast_python_api.auth.user_auth import verify_access_token
 from fast_python_api.database import get_session as get_db_session
-from fast_python_api.services.utils import (
-    fetch_random_user, create_user_bulk
-)
+from fast_python_api.responses import ORJSONResponse
+from fast_python_api.services.utils import fetch_user_pages
+from fast_python_api.core.user_crud import create_user_bulk
+from fast_python_api.models import ImportJob
+from fast_python_api.services.jobs import import_jobs, job_payload
 
 
 router = APIRouter(tags=["External API"])
@@ -128,42 +133,65 @@ async def external_api_test(
             or returns an error.
     """
     q_params = params.model_dump(exclude_unset=True, exclude_none=True)
-    response = await session.get(
+    # TODO: Следует предусмотреть случай когда сервис не доступен
+    # The connection goes back to the shared pool when the block exits
+    async with session.get(
         settings.test_service_url, params=q_params
-    )  # TODO: Следует предусмотреть случай когда сервис не доступен
-    return await response.json()
+    ) as response:
+        return await response.json()
+
+
+def _require_admin(current_user: TokenData) -> None:
+    if current_user.role != 'admin':
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="You do not have permission to import users"
+        )
 
 
 @router.post(
     '/import',
+    response_model=BulkInsertResult,
     summary="Import users from external API",
-    description="Import users from external API, only accessible by admins.",
+    description="Import users from external API, only accessible by admins. "
+                "Large counts are fetched in concurrent pages, each page "
+                "is stored as soon as it arrives. Users conflicting with "
+                "existing ones are skipped, the status of every user is "
+                "reported. With `background=true` the import runs as a "
+                "job instead, its status is returned at once and can be "
+                "polled at `/import/jobs/{job_id}`.",
     responses={
         200: {
             "description": "Users imported successfully.",
             "content": {
                 "application/json": {
-                    "example": [
-                        {
-                            "name": {
-                                "title": "string",
-                                "first_name": "string",
-                                "last_name": "string"
-                            },
-                            "login": {
+                    "example": {
+                        "inserted": 1,
+                        "skipped": 1,
+                        "users": [
+                            {
+                                "id": "string",
                                 "username": "string",
-                                "role": "string",
-                                "uuid": "string"
+                                "email": "string",
+                                "status": "inserted",
+                                "detail": None
                             },
-                            "dob": "string",
-                            "city": "string",
-                            "email": "string",
-                            "created_at": "string"
-                        }
-                    ]
+                            {
+                                "id": "string",
+                                "username": "string",
+                                "email": "string",
+                                "status": "skipped",
+                                "detail": "Username already taken"
+                            }
+                        ]
+                    }
                 }
             }
         },
+        202: {
+            "description": "Import job queued.",
+            "model": ImportJobStatus,
+        },
         400: {
             "description": "The input parameters are invalid.",
         },
@@ -177,37 +205,200 @@ async def external_api_test(
     }
 )
 async def import_users(
-        params: Annotated[RandomUserParams, Depends()],
+        params: Annotated[ImportParams, Depends()],
         current_user: Annotated[TokenData, Depends(verify_access_token)],
         db_session: Annotated[AsyncSession, Depends(get_db_session)],
-        http_session: Annotated[ClientSession, Depends(get_http_session)]
-
-) -> list[UserPublic]:
+        http_session: Annotated[ClientSession, Depends(get_http_session)],
+        background: Annotated[
+            bool, Query(description="Run the import as a background job")
+        ] = False
+) -> Response:
     """
     Import users from an external API.
 
     This endpoint allows admins to import users from an external API.
     It checks the role of the current user and raises a 403 Forbidden
-    error if the user is not an admin. The function fetches user data
-    and creates users in bulk in the database.
+    error if the user is not an admin. The users are fetched in pages of
+    ``IMPORT_PAGE_SIZE``, up to ``IMPORT_CONCURRENCY`` at a time, and
+    every page is inserted in bulk as soon as it arrives. Pages stored
+    before a failing one are kept. With ``background`` the import is
+    queued as a job on the worker pool instead.
 
     Args:
-        params (RandomUserParams): Parameters for fetching random users.
+        params (ImportParams): Parameters for fetching random users.
         current_user (TokenData): The currently authenticated user.
         db_session (AsyncSession): The database session
             for database operations.
         http_session (ClientSession): The HTTP session
             for making API requests.
+        background (bool): Whether to queue a job instead.
 
     Returns:
-        list[UserPublic]: A list of public user data
-            after successful import.
+        Response: The inserted or skipped status of every user, or the
+        status of the queued job.
     """
-    if current_user.role != 'admin':
+    _require_admin(current_user)
+    if background:
+        job = await import_jobs.create(params, current_user.id, db_session)
+        return ORJSONResponse(
+            job_payload(job), status_code=status.HTTP_202_ACCEPTED
+        )
+    result = {"inserted": 0, "skipped": 0, "users": []}
+    # Closing the pages cancels the fetches still running when a page
+    # fails to store
+    async with aclosing(fetch_user_pages(
+            http_session, params,
+            settings.IMPORT_PAGE_SIZE, settings.IMPORT_CONCURRENCY
+    )) as pages:
+        async for users_data in pages:
+            page = await create_user_bulk(users_data, db_session)
+            result["inserted"] += page["inserted"]
+            result["skipped"] += page["skipped"]
+            result["users"].extend(page["users"])
+    return ORJSONResponse(result)
+
+
+JOB_RESPONSES = {
+    200: {"description": "Status of the job"},
+    401: {"description": "Unauthorized, invalid or missing credentials"},
+    403: {"description": "Forbidden, not enough permissions"},
+    404: {"description": "Import job not found"},
+}
+
+
+async def _get_job(job_id: str, session: AsyncSession) -> ImportJob:
+    job = await session.get(ImportJob, job_id, populate_existing=True)
+    if job is None:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You do not have permission to import users"
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Import job not found"
+        )
+    return job
+
+
+@router.get(
+    '/import/jobs/{job_id}',
+    response_model=ImportJobStatus,
+    summary="Get an import job",
+    description="Progress of a background import: users fetched, "
+                "inserted and skipped, throughput and error. Only "
+                "accessible by admins.",
+    responses=JOB_RESPONSES
+)
+async def get_import_job(
+        job_id: Annotated[str, Path(description="The ID of the job")],
+        current_user: Annotated[TokenData, Depends(verify_access_token)],
+        db_session: Annotated[AsyncSession, Depends(get_db_session)]
+) -> Response:
+    """
+    Get the status of an import job. Only accessible by admins.
+
+    Args:
+        job_id (str): The ID of the job.
+        current_user (TokenData): The currently authenticated user.
+        db_session (AsyncSession): The database session.
+
+    Returns:
+        Response: The ``ImportJobStatus`` of the job.
+
+    Raises:
+        HTTPException: 403 Forbidden if the user is not an admin.
+        HTTPException: 404 Not Found if the job does not exist.
+    """
+    _require_admin(current_user)
+    return ORJSONResponse(job_payload(await _get_job(job_id, db_session)))
+
+
+@router.post(
+    '/import/jobs/{job_id}/cancel',
+    response_model=ImportJobStatus,
+    summary="Cancel an import job",
+    description="Cancel a queued or running import. A running import "
+                "stops after the page it is storing, the users stored "
+                "so far are kept. Only accessible by admins.",
+    responses={
+        **JOB_RESPONSES,
+        409: {"description": "The job has already finished"},
+    }
+)
+async def cancel_import_job(
+        job_id: Annotated[str, Path(description="The ID of the job")],
+        current_user: Annotated[TokenData, Depends(verify_access_token)],
+        db_session: Annotated[AsyncSession, Depends(get_db_session)]
+) -> Response:
+    """
+    Cancel an import job. Only accessible by admins.
+
+    Args:
+        job_id (str): The ID of the job.
+        current_user (TokenData): The currently authenticated user.
+        db_session (AsyncSession): The database session.
+
+    Returns:
+        Response: The ``ImportJobStatus`` of the cancelled job.
+
+    Raises:
+        HTTPException: 403 Forbidden if the user is not an admin.
+        HTTPException: 404 Not Found if the job does not exist.
+        HTTPException: 409 Conflict if the job has already finished.
+    """
+    _require_admin(current_user)
+    job = await _get_job(job_id, db_session)
+    if not await import_jobs.cancel(job, db_session):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Import job has already finished"
+        )
+    return ORJSONResponse(job_payload(await _get_job(job_id, db_session)))
+
+
+@router.post(
+    '/import/jobs/{job_id}/resume',
+    response_model=ImportJobStatus,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Resume an import job",
+    description="Queue a failed, cancelled or stalled import again, for "
+                "the users it has not fetched yet. A running job is "
+                "stalled when its worker has not saved progress for "
+                "`IMPORT_JOB_STALE_AFTER` seconds. Only accessible by "
+                "admins.",
+    responses={
+        **JOB_RESPONSES,
+        202: {"description": "Import job queued"},
+        409: {"description": "The job is not failed, cancelled or stalled"},
+    }
+)
+async def resume_import_job(
+        job_id: Annotated[str, Path(description="The ID of the job")],
+        current_user: Annotated[TokenData, Depends(verify_access_token)],
+        db_session: Annotated[AsyncSession, Depends(get_db_session)]
+) -> Response:
+    """
+    Resume a failed, cancelled or stalled import job. Only accessible by
+    admins.
+
+    Args:
+        job_id (str): The ID of the job.
+        current_user (TokenData): The currently authenticated user.
+        db_session (AsyncSession): The database session.
+
+    Returns:
+        Response: The ``ImportJobStatus`` of the queued job.
+
+    Raises:
+        HTTPException: 403 Forbidden if the user is not an admin.
+        HTTPException: 404 Not Found if the job does not exist.
+        HTTPException: 409 Conflict if the job is not failed, cancelled
+        or stalled.
+    """
+    _require_admin(current_user)
+    job = await _get_job(job_id, db_session)
+    if not await import_jobs.resume(job, db_session):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Only failed, cancelled or stalled import jobs can be "
+                   "resumed"
         )
-    users_data: list[UserInDB] = await fetch_random_user(http_session, params)
-    users: list[UserInDB] = await create_user_bulk(users_data, db_session)
-    return [UserPublic(**user.model_dump()) for user in users]
+    return ORJSONResponse(
+        job_payload(job), status_code=status.HTTP_202_ACCEPTED
+    )
@@ -1,17 +1,13 @@
-from typing import Annotated
+import asyncio
+from typing import Annotated, AsyncIterator
 from aiohttp import ClientSession
-from sqlalchemy.ext.asyncio import AsyncSession
 from fast_python_api.chemas.user_db import UserInDB, NameInDB, LoginInDB
 from fast_python_api.settings import settings
 from fast_python_api.services.http import get_http_session
 from fastapi import Depends
-from fast_python_api.models import User, Login, Name
-from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from fastapi import HTTPException, status
 from fast_python_api.chemas.params import RandomUserParams
 from datetime import datetime
-from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
 
 
 async def get_formated_users(data: list[dict]) -> list[UserInDB]:
@@ -54,50 +50,6 @@ async def get_formated_users(data: list[dict]) -> list[UserInDB]:
     return result  # TODO: Добавить проверку наличия ключей
 
 
-async def create_user_bulk(
-        users: list[UserInDB], session: AsyncSession
-) -> list[UserInDB]:
-
-    users_data = []
-    logins_data = []
-    names_data = []
-
-    for user in users:
-        name = Name(**user.name.model_dump())
-        login = Login(**user.login.model_dump())
-        user = User(**user.model_dump(exclude={"name", "login"}))
-
-        names_data.append(name)
-        logins_data.append(login)
-        users_data.append(user)
-
-    try:
-        session.add_all(users_data + logins_data + names_data)
-        await session.commit()
-
-        result = await session.execute(
-            select(User)
-            .options(joinedload(User.name), joinedload(User.login))
-            .where(User.id.in_([u.id for u in users_data]))
-        )
-        users_data = result.scalars().all()
-
-        return [UserInDB(**user.to_dict()) for user in users_data]
-
-    except IntegrityError as e:
-        await session.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Integrity error: {str(e.orig)}"
-        )
-    except SQLAlchemyError as e:
-        await session.rollback()
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Database error: {str(e)}"
-        )
-
-
 async def fetch_random_user(
         session: Annotated[ClientSession, Depends(get_http_session)],
         params: RandomUserParams
@@ -147,3 +99,66 @@ async def fetch_random_user(
         users_data = data['results']
         formated_users = await get_formated_users(users_data)
         return formated_users
+
+
+def page_sizes(results: int, page_size: int) -> list[int]:
+    """
+    Split ``results`` users into pages of at most ``page_size`` users.
+
+    Args:
+        results (int): Number of users to fetch.
+        page_size (int): Maximum number of users per page.
+
+    Returns:
+        list[int]: The number of users of every page.
+    """
+    full, rest = divmod(results, page_size)
+    return [page_size] * full + ([rest] if rest else [])
+
+
+async def fetch_user_pages(
+        session: ClientSession,
+        params: RandomUserParams,
+        page_size: int,
+        concurrency: int
+) -> AsyncIterator[list[UserInDB]]:
+    """
+    Fetch ``params.results`` users from the external API in pages.
+
+    The pages are requested concurrently, at most ``concurrency`` at a
+    time, and every page is yielded as soon as it arrives, so the caller
+    can store it while the next ones are still being fetched. If a page
+    fails, the pending ones are cancelled and the error is raised.
+
+    Args:
+        session (ClientSession): ClientSession to perform the requests.
+        params (RandomUserParams): Parameters of the requests.
+        page_size (int): Maximum number of users per request.
+        concurrency (int): Maximum number of requests in flight.
+
+    Yields:
+        list[UserInDB]: The users of one page, in arrival order.
+
+    Raises:
+        HTTPException: If the external API returns an error status code,
+            or if the response format is invalid.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch_page(size: int) -> list[UserInDB]:
+        async with semaphore:
+            return await fetch_random_user(
+                session, params.model_copy(update={"results": size})
+            )
+
+    pages = [
+        asyncio.create_task(fetch_page(size))
+        for size in page_sizes(params.results, page_size)
+    ]
+    try:
+        for page in asyncio.as_completed(pages):
+            yield await page
+    finally:
+        for page in pages:
+            page.cancel()
+        await asyncio.gather(*pages, return_exceptions=True)
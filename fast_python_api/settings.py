@@ -1,7 +1,7 @@
 import os
 import dotenv
 from pydantic import Field
-from typing import Any, Dict
+from typing import Any, Dict, Literal
 from pydantic_settings import BaseSettings
 
 
@@ -27,7 +27,53 @@ class Settings(BaseSettings):
     SECRET_KEY: str
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 30
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 7
+    REVOCATION_SYNC_INTERVAL: float = 30.0
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_CACHE_TTL: float = 300.0
     APP_VERSION: str = "1.0.0"
+    HTTP_POOL_LIMIT: int = 100
+    HTTP_POOL_LIMIT_PER_HOST: int = 20
+    HTTP_KEEPALIVE_TIMEOUT: float = 30.0
+    HTTP_DNS_CACHE_TTL: int = 300
+    HTTP_CONNECT_TIMEOUT: float = 5.0
+    HTTP_TIMEOUT: float = 30.0
+    IMPORT_MAX_RESULTS: int = 10000
+    IMPORT_PAGE_SIZE: int = 20
+    IMPORT_CONCURRENCY: int = 8
+    IMPORT_JOB_WORKERS: int = 2
+    IMPORT_JOB_STALE_AFTER: float = 120.0
+    EXPORT_CHUNK_SIZE: int = 1000
+    SEARCH_CANDIDATES: int = 1000
+    BULK_MAX_RECORDS: int = 50000
+    BULK_MAX_BYTES: int = 64 * 1024 * 1024
+    BULK_CHUNK_SIZE: int = 1000
+    USER_CACHE_SIZE: int = 10000
+    USER_CACHE_TTL: float = 60.0
+    USER_CACHE_NEAR_TTL: float = 5.0
+    CACHE_BACKEND: Literal["memory", "redis"] = "memory"
+    REDIS_URL: str = "redis://localhost:6379/0"
+    HASH_SCHEME: Literal["bcrypt", "pbkdf2_sha256"] = "bcrypt"
+    HASH_ROUNDS: int | None = None
+    HASH_EXECUTOR: Literal["thread", "process"] = "thread"
+    HASH_WORKERS: int = Field(default_factory=lambda: os.cpu_count() or 1)
+    BULK_HASH_WORKERS: int = Field(
+        default_factory=lambda: max((os.cpu_count() or 1) // 2, 1)
+    )
+    BULK_HASH_SLICE: int = 32
+    LOGIN_CONCURRENCY: int = Field(
+        default_factory=lambda: os.cpu_count() or 1
+    )
+    LOGIN_QUEUE_SIZE: int = 32
+    LOGIN_QUEUE_TIMEOUT: float = 2.0
+    LOGIN_RETRY_AFTER: int = 1
+    LOGIN_IP_RATE_PER_MINUTE: float = 60
+    LOGIN_IP_BURST: int = 20
+    LOGIN_USERNAME_RATE_PER_MINUTE: float = 10
+    LOGIN_USERNAME_BURST: int = 5
+    # Addresses or networks of the reverse proxies in front of the app,
+    # only their X-Forwarded-For header is trusted
+    TRUSTED_PROXIES: list[str] = Field(default_factory=list)
 
 
 settings = Settings()
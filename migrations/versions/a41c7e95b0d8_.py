@@ -0,0 +1,119 @@
+"""add user search indexes
+
+Revision ID: a41c7e95b0d8
+Revises: 8d2e6a0f5c43
+Create Date: 2026-10-18 12:40:09.117342
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a41c7e95b0d8'
+down_revision: Union[str, None] = '8d2e6a0f5c43'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRGM_INDEXES = (
+    ('ix_names_first_name_trgm', 'names', 'first_name'),
+    ('ix_names_last_name_trgm', 'names', 'last_name'),
+    ('ix_logins_username_trgm', 'logins', 'username'),
+    ('ix_users_email_trgm', 'users', 'email'),
+)
+
+# Kept in sync with USERS_FTS_DDL in fast_python_api/models.py
+USERS_FTS_DDL = (
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS users_fts USING fts5(
+        first_name, last_name, username, email, prefix='2 3'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_names_ai
+    AFTER INSERT ON names BEGIN
+        INSERT INTO users_fts(rowid, first_name, last_name, username, email)
+        VALUES (
+            new.id, new.first_name, new.last_name,
+            (SELECT username FROM logins WHERE uuid = new.user_id),
+            (SELECT email FROM users WHERE id = new.user_id)
+        );
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_names_au
+    AFTER UPDATE OF first_name, last_name ON names BEGIN
+        UPDATE users_fts
+        SET first_name = new.first_name, last_name = new.last_name
+        WHERE rowid = new.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_names_ad
+    AFTER DELETE ON names BEGIN
+        DELETE FROM users_fts WHERE rowid = old.id;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_logins_ai
+    AFTER INSERT ON logins BEGIN
+        UPDATE users_fts SET username = new.username
+        WHERE rowid = (SELECT id FROM names WHERE user_id = new.uuid);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_logins_au
+    AFTER UPDATE OF username ON logins BEGIN
+        UPDATE users_fts SET username = new.username
+        WHERE rowid = (SELECT id FROM names WHERE user_id = new.uuid);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS users_fts_users_au
+    AFTER UPDATE OF email ON users BEGIN
+        UPDATE users_fts SET email = new.email
+        WHERE rowid = (SELECT id FROM names WHERE user_id = new.id);
+    END
+    """,
+    """
+    INSERT INTO users_fts(rowid, first_name, last_name, username, email)
+    SELECT names.id, names.first_name, names.last_name,
+           logins.username, users.email
+    FROM names
+    JOIN users ON users.id = names.user_id
+    LEFT JOIN logins ON logins.uuid = names.user_id
+    """,
+)
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for name, table, column in TRGM_INDEXES:
+            op.create_index(
+                name, table, [column], unique=False,
+                postgresql_using='gin',
+                postgresql_ops={column: 'gin_trgm_ops'},
+            )
+    elif dialect == 'sqlite':
+        for statement in USERS_FTS_DDL:
+            op.execute(statement)
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for name, table, _ in TRGM_INDEXES:
+            op.drop_index(name, table_name=table)
+    elif dialect == 'sqlite':
+        for trigger in (
+            'users_fts_names_ai', 'users_fts_names_au', 'users_fts_names_ad',
+            'users_fts_logins_ai', 'users_fts_logins_au',
+            'users_fts_users_au',
+        ):
+            op.execute(f'DROP TRIGGER IF EXISTS {trigger}')
+        op.execute('DROP TABLE IF EXISTS users_fts')
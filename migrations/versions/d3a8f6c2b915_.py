@@ -0,0 +1,43 @@
+"""add user search prefix indexes
+
+Revision ID: d3a8f6c2b915
+Revises: b7f2d9e4a1c3
+Create Date: 2026-10-19 00:31:52.640183
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3a8f6c2b915'
+down_revision: Union[str, None] = 'b7f2d9e4a1c3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PREFIX_INDEXES = (
+    ('ix_names_first_name_prefix', 'names', 'first_name'),
+    ('ix_names_last_name_prefix', 'names', 'last_name'),
+    ('ix_logins_username_prefix', 'logins', 'username'),
+    ('ix_users_email_prefix', 'users', 'email'),
+)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name, table, column in PREFIX_INDEXES:
+        op.create_index(
+            name, table, [sa.text(f'lower({column}) text_pattern_ops')],
+            unique=False,
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name, table, _ in PREFIX_INDEXES:
+        op.drop_index(name, table_name=table)
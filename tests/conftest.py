@@ -7,14 +7,32 @@ from datetime import date, datetime
 from fast_python_api.main import app
 from httpx import AsyncClient, ASGITransport
 from fast_python_api.settings import settings
-from fast_python_api.database import get_session
+from fast_python_api.database import get_session, enable_sqlite_foreign_keys
+from fast_python_api.core.cache import user_cache
+from fast_python_api.auth.throttling import ip_limiter, username_limiter
+from fast_python_api.auth.user_auth import token_cache
+from fast_python_api.auth.revocation import revocation_list
 from fast_python_api.models import Base, User, Name, Login
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import (
     AsyncSession, create_async_engine, async_sessionmaker
 )
 
 
 test_engine = create_async_engine(settings.TEST_DATABASE_URL, echo=True)
+enable_sqlite_foreign_keys(test_engine.sync_engine)
+
+
+# Let SQLAlchemy emit BEGIN itself, the driver's own transaction handling
+# breaks the savepoints every test session runs in
+@event.listens_for(test_engine.sync_engine, "connect")
+def disable_driver_transactions(dbapi_connection, connection_record):
+    dbapi_connection.isolation_level = None
+
+
+@event.listens_for(test_engine.sync_engine, "begin")
+def begin_transaction(connection):
+    connection.exec_driver_sql("BEGIN")
 
 
 TestSessionLocal = async_sessionmaker(
@@ -73,7 +91,18 @@ def setup_test_db():
 async def test_session():
     connection = await test_engine.connect()
     transaction = await connection.begin()
-    session = AsyncSession(bind=connection, expire_on_commit=False)
+    # Commits and rollbacks of the code under test only end a savepoint
+    session = AsyncSession(
+        bind=connection,
+        expire_on_commit=False,
+        join_transaction_mode="create_savepoint"
+    )
+    # Every test rolls back, so snapshots cached by one must not leak
+    await user_cache.clear()
+    ip_limiter.clear()
+    username_limiter.clear()
+    token_cache.clear()
+    revocation_list.clear()
     yield session
     await session.close()
     await transaction.rollback()
@@ -0,0 +1,271 @@
+import gzip
+import json
+import pytest
+from httpx import AsyncClient
+from fast_python_api.auth import hashing
+from fast_python_api.auth.hashing import make_context, verify_password
+from fast_python_api.models import Login
+from fast_python_api.settings import settings
+from tests.test_token import generate_valid_token
+
+
+headers_admin = {"Authorization": f"Bearer {generate_valid_token()}"}
+
+headers_user = {"Authorization": f"Bearer {generate_valid_token(
+    username='alice_smith',
+    role='user',
+    user_id='c647e0c3-d0fb-47fd-bbea-c61b3cd999dd'
+)}"}
+
+
+def make_user(i: int, **overrides) -> dict:
+    user = {
+        "name": {"title": "Mx", "first_name": f"Bulk{i}", "last_name": "User"},
+        "login": {"username": f"bulk{i}", "password": f"secret{i}"},
+        "dob": "1990-01-01",
+        "city": "Oslo",
+        "email": f"bulk{i}@example.com",
+    }
+    user.update(overrides)
+    return user
+
+
+@pytest.fixture
+def fast_hashing(monkeypatch):
+    monkeypatch.setattr(hashing, "pwd_context", make_context("bcrypt", 4))
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_json(
+        test_client: AsyncClient, test_session, fast_hashing
+):
+    users = [make_user(i) for i in range(3)]
+    users.append(make_user(3, email="testuser@example.com"))
+    users.append(make_user(4, login={"username": "bulk0", "password": "x"}))
+
+    response = await test_client.post(
+        "/users/bulk", json=users, headers=headers_admin
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["inserted"], data["skipped"]) == (3, 2)
+    assert [user["status"] for user in data["users"]] == [
+        "inserted", "inserted", "inserted", "skipped", "skipped"
+    ]
+    assert data["users"][4]["detail"] == "Username already taken"
+
+    login = await test_session.get(Login, data["users"][1]["id"])
+    assert login.username == "bulk1"
+    assert verify_password("secret1", login.password)
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_gzip_ndjson(
+        test_client: AsyncClient, test_session, fast_hashing
+):
+    body = gzip.compress(
+        b"\n".join(json.dumps(make_user(i)).encode() for i in range(10))
+    )
+    response = await test_client.post(
+        "/users/bulk", content=body, headers={
+            **headers_admin,
+            "Content-Type": "application/x-ndjson",
+            "Content-Encoding": "gzip",
+        }
+    )
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 10
+
+    response = await test_client.get(
+        f"/users/{response.json()['users'][9]['id']}", headers=headers_admin
+    )
+    assert response.json()["login"]["username"] == "bulk9"
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_rejects_invalid_records(
+        test_client: AsyncClient, test_session, monkeypatch
+):
+    users = [make_user(0), make_user(1, email="invalid-email")]
+    response = await test_client.post(
+        "/users/bulk", json=users, headers=headers_admin
+    )
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][:2] == ["body", 1]
+
+    response = await test_client.post(
+        "/users/bulk", json={"not": "a list"}, headers=headers_admin
+    )
+    assert response.status_code == 400
+
+    monkeypatch.setattr(settings, "BULK_MAX_RECORDS", 1)
+    response = await test_client.post(
+        "/users/bulk", json=[make_user(0), make_user(1)],
+        headers=headers_admin
+    )
+    assert response.status_code == 413
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_body_too_large(
+        monkeypatch, test_client: AsyncClient, test_session
+):
+    monkeypatch.setattr(settings, "BULK_MAX_BYTES", 100)
+    body = json.dumps([make_user(i) for i in range(5)]).encode()
+    response = await test_client.post(
+        "/users/bulk", content=body, headers=headers_admin
+    )
+    assert response.status_code == 413
+
+    sent = []
+
+    async def chunks():
+        # Without Content-Length, reading stops at the chunk over the limit
+        for start in range(0, len(body), 64):
+            sent.append(start)
+            yield body[start:start + 64]
+
+    response = await test_client.post(
+        "/users/bulk", content=chunks(), headers=headers_admin
+    )
+    assert response.status_code == 413
+    assert len(sent) < len(body) // 64
+
+
+@pytest.mark.asyncio
+async def test_bulk_create_forbidden_for_user(
+        test_client: AsyncClient, test_session
+):
+    response = await test_client.post(
+        "/users/bulk", json=[make_user(0)], headers=headers_user
+    )
+    assert response.status_code == 403
+
+
+CHYDOVO = [
+    "3812c095-6042-4fbd-8b53-51b2194ea915",
+    "7a3c5117-a4d1-44e7-9b32-4a9a11fc6a4d",
+    "bd4e3920-0740-4bd4-a943-f0278491c013",
+]
+
+
+def read_lines(response) -> list[dict]:
+    return [json.loads(line) for line in response.text.splitlines()]
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_by_filter(
+        test_client: AsyncClient, test_session, monkeypatch
+):
+    monkeypatch.setattr(settings, "BULK_CHUNK_SIZE", 2)
+    # Cached before the update, must not be served stale afterwards
+    await test_client.get(f"/users/{CHYDOVO[0]}", headers=headers_admin)
+
+    response = await test_client.patch("/users/bulk", json={
+        "filters": {"city": "Chydovo"},
+        "changes": {"city": "Oslo", "role": "moderator",
+                    "name": {"title": "Dr"}},
+    }, headers=headers_admin)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    first, second, summary = read_lines(response)
+    assert (first["processed"], first["total"]) == (2, 3)
+    assert [result["id"] for result in first["results"]] == CHYDOVO[:2]
+    assert second["results"] == [{"id": CHYDOVO[2], "status": "updated"}]
+    assert summary == {
+        "processed": 3, "total": 3, "updated": 3, "not_found": 0,
+        "done": True
+    }
+
+    response = await test_client.get(
+        f"/users/{CHYDOVO[0]}", headers=headers_admin
+    )
+    user = response.json()
+    assert user["city"] == "Oslo"
+    assert user["login"]["role"] == "moderator"
+    assert user["name"]["title"] == "Dr"
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_by_ids(
+        test_client: AsyncClient, test_session, monkeypatch
+):
+    monkeypatch.setattr(settings, "BULK_CHUNK_SIZE", 2)
+    missing = "00000000-0000-4000-8000-000000000000"
+    alice = "c647e0c3-d0fb-47fd-bbea-c61b3cd999dd"
+    bob = "52cc33c2-7b60-4f8b-bc92-3aa92573c1dd"
+
+    response = await test_client.request("DELETE", "/users/bulk", json={
+        "ids": [alice, missing, bob, alice]
+    }, headers=headers_admin)
+    assert response.status_code == 200
+    *chunks, summary = read_lines(response)
+    assert [result for chunk in chunks for result in chunk["results"]] == [
+        {"id": alice, "status": "deleted"},
+        {"id": missing, "status": "not_found"},
+        {"id": bob, "status": "deleted"},
+    ]
+    assert (summary["deleted"], summary["not_found"]) == (2, 1)
+
+    assert await test_session.get(Login, alice) is None
+    response = await test_client.get(f"/users/{bob}", headers=headers_admin)
+    assert response.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_bulk_delete_reports_failed_chunk(
+        test_client: AsyncClient, test_session, monkeypatch
+):
+    from fast_python_api.core import routes
+
+    monkeypatch.setattr(settings, "BULK_CHUNK_SIZE", 2)
+    delete_users_chunk = routes.delete_users_chunk
+    calls = []
+
+    async def fail_second_chunk(ids, session):
+        calls.append(ids)
+        if len(calls) == 2:
+            raise RuntimeError("connection lost")
+        return await delete_users_chunk(ids, session)
+
+    monkeypatch.setattr(routes, "delete_users_chunk", fail_second_chunk)
+    response = await test_client.request(
+        "DELETE", "/users/bulk", json={"ids": CHYDOVO},
+        headers=headers_admin
+    )
+    assert response.status_code == 200
+    first, last = read_lines(response)
+    assert first["processed"] == 2
+    assert last == {
+        "processed": 2, "total": 3, "error": "Bulk operation failed",
+        "done": False
+    }
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_and_delete_validation(
+        test_client: AsyncClient, test_session, monkeypatch
+):
+    changes = {"city": "Oslo"}
+    for selection in (
+            {},
+            {"ids": CHYDOVO, "filters": {"city": "Chydovo"}},
+            {"filters": {"sort_by": "dob"}},
+    ):
+        response = await test_client.patch(
+            "/users/bulk", json={**selection, "changes": changes},
+            headers=headers_admin
+        )
+        assert response.status_code == 422
+
+    response = await test_client.request(
+        "DELETE", "/users/bulk", json={"ids": CHYDOVO}, headers=headers_user
+    )
+    assert response.status_code == 403
+
+    monkeypatch.setattr(settings, "BULK_MAX_RECORDS", 2)
+    response = await test_client.request(
+        "DELETE", "/users/bulk", json={"ids": CHYDOVO}, headers=headers_admin
+    )
+    assert response.status_code == 413
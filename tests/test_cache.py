@@ -0,0 +1,229 @@
+import asyncio
+import pytest
+from fakeredis import FakeAsyncRedis, FakeServer
+from httpx import AsyncClient
+from fast_python_api.core.cache import (
+    TTLCache, UserCache, MemoryBackend, RedisBackend, user_cache
+)
+from tests.test_token import generate_valid_token
+
+
+headers_admin = {"Authorization": f"Bearer {generate_valid_token()}"}
+
+headers_user = {"Authorization": f"Bearer {generate_valid_token(
+    username='alice_smith',
+    role='user',
+    user_id='c647e0c3-d0fb-47fd-bbea-c61b3cd999dd'
+)}"}
+
+alice_uuid = "c647e0c3-d0fb-47fd-bbea-c61b3cd999dd"
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_evicts_least_recently_used():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats.as_dict() == {
+        "hits": 3, "misses": 1, "evictions": 1, "expirations": 0
+    }
+
+
+def test_ttl_cache_expires_entries():
+    timer = FakeTimer()
+    cache = TTLCache(maxsize=10, ttl=5, timer=timer)
+    cache.set("a", 1)
+    timer.now = 4.9
+    assert cache.get("a") == 1
+    timer.now = 5
+    assert cache.get("a") is None
+    assert len(cache) == 0
+    assert cache.stats.expirations == 1
+
+
+def make_snapshot(user_id: str, username: str) -> dict:
+    return {
+        "id": user_id,
+        "name.title": "Ms",
+        "name.first_name": "Alice",
+        "name.last_name": "Smith",
+        "login.username": username,
+        "login.role": "user",
+        "login.uuid": user_id,
+        "dob": "1992-03-15",
+        "city": "New York",
+        "email": "alice@example.com",
+        "created_at": "2025-02-04T21:00:00",
+    }
+
+
+@pytest.mark.asyncio
+async def test_user_cache_ignores_stale_username():
+    cache = UserCache(MemoryBackend(maxsize=10, ttl=60))
+    await cache.put(make_snapshot("1", "old"))
+    await cache.put(make_snapshot("1", "new"))
+
+    assert await cache.get_by_username("old") is None
+    user = await cache.get_by_username("new")
+    assert user.snapshot["id"] == "1"
+    assert b'"password"' not in user.body
+
+
+@pytest.mark.asyncio
+async def test_redis_backend_broadcasts_invalidation():
+    server = FakeServer()
+    worker_a = RedisBackend(
+        FakeAsyncRedis(server=server), ttl=60, near_cache=TTLCache(10, 60)
+    )
+    worker_b = RedisBackend(
+        FakeAsyncRedis(server=server), ttl=60, near_cache=TTLCache(10, 60)
+    )
+    await worker_a.start()
+    try:
+        cache_a, cache_b = UserCache(worker_a), UserCache(worker_b)
+        await cache_b.put(make_snapshot("1", "alice"))
+        assert (await cache_a.get_by_id("1")).snapshot["city"] == "New York"
+        assert len(worker_a.near_cache) == 1
+
+        await cache_b.invalidate("1")
+        for _ in range(100):
+            if len(worker_a.near_cache) == 0:
+                break
+            await asyncio.sleep(0.01)
+
+        assert await cache_a.get_by_id("1") is None
+    finally:
+        await worker_a.close()
+        await worker_b.close()
+
+
+@pytest.mark.asyncio
+async def test_read_user_is_cached(test_client: AsyncClient, test_session):
+    await test_client.get(f"/users/{alice_uuid}", headers=headers_admin)
+    hits = user_cache.lookups.hits
+    response = await test_client.get(
+        f"/users/{alice_uuid}", headers=headers_admin
+    )
+    assert response.status_code == 200
+    assert response.json()["email"] == "alice@example.com"
+    assert user_cache.lookups.hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_update_invalidates_cache(test_client: AsyncClient, test_session):
+    await test_client.get(f"/users/{alice_uuid}", headers=headers_admin)
+    response = await test_client.put(
+        f"/users/{alice_uuid}", json={"city": "Chicago"},
+        headers=headers_admin
+    )
+    assert response.status_code == 200
+
+    response = await test_client.get(
+        f"/users/{alice_uuid}", headers=headers_admin
+    )
+    assert response.json()["city"] == "Chicago"
+
+
+@pytest.mark.asyncio
+async def test_delete_invalidates_cache(test_client: AsyncClient, test_session):
+    await test_client.get(f"/users/{alice_uuid}", headers=headers_admin)
+    response = await test_client.delete(
+        f"/users/{alice_uuid}", headers=headers_admin
+    )
+    assert response.status_code == 200
+    assert await user_cache.get_by_id(alice_uuid) is None
+
+
+@pytest.mark.asyncio
+async def test_read_metrics(test_client: AsyncClient, test_session):
+    response = await test_client.get("/metrics", headers=headers_admin)
+    assert response.status_code == 200
+    stats = response.json()["user_cache"]
+    assert {"hits", "misses"} <= set(stats)
+    assert stats["backend"]["type"] == "memory"
+    assert "queue_depth" in response.json()["hashing"]
+
+
+@pytest.mark.asyncio
+async def test_read_metrics_forbidden_for_user(
+        test_client: AsyncClient, test_session
+):
+    response = await test_client.get("/metrics", headers=headers_user)
+    assert response.status_code == 403
+
+
+@pytest.mark.asyncio
+async def test_me_is_cached(test_client: AsyncClient, test_session):
+    response = await test_client.get("/me", headers=headers_user)
+    assert response.status_code == 200
+    hits = user_cache.lookups.hits
+
+    response = await test_client.get("/me", headers=headers_user)
+    assert response.status_code == 200
+    assert response.json()["login"]["username"] == "alice_smith"
+    assert user_cache.lookups.hits == hits + 1
+
+
+@pytest.mark.asyncio
+async def test_me_deleted_user_unauthorized(
+        test_client: AsyncClient, test_session
+):
+    await test_client.get("/me", headers=headers_user)
+    await test_client.delete(f"/users/{alice_uuid}", headers=headers_admin)
+
+    response = await test_client.get("/me", headers=headers_user)
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_password_hash_is_not_cached(
+        test_client: AsyncClient, test_session
+):
+    response = await test_client.post("/users/create/", json={
+        "name": {"title": "Mr", "first_name": "No", "last_name": "Hash"},
+        "login": {"username": "nohash", "password": "secret"},
+        "dob": "1990-01-01",
+        "city": "Oslo",
+        "email": "nohash@example.com"
+    }, headers=headers_admin)
+    user_id = response.json()["login"]["uuid"]
+    await test_client.get(f"/users/{user_id}", headers=headers_admin)
+
+    form = {"username": "nohash", "password": "secret"}
+    response = await test_client.post("/token", data=form)
+    assert response.status_code == 200
+
+    user = await user_cache.get_by_id(user_id)
+    assert "login.password" not in user.snapshot
+    assert b"$2b$" not in user.entry
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("redis", [False, True])
+async def test_user_cache_skips_put_read_before_invalidate(redis):
+    if redis:
+        backend = RedisBackend(FakeAsyncRedis(server=FakeServer()), ttl=60)
+    else:
+        backend = MemoryBackend(maxsize=10, ttl=60)
+    cache = UserCache(backend)
+    generation = await cache.generation()
+    # A writer invalidates the user while the snapshot is being read
+    await cache.invalidate("1")
+    await cache.put(make_snapshot("1", "alice"), generation)
+    assert await cache.get_by_id("1") is None
+
+    await cache.put(make_snapshot("1", "alice"), await cache.generation())
+    assert (await cache.get_by_id("1")).snapshot["city"] == "New York"
@@ -1,5 +1,8 @@
 import pytest
 from httpx import AsyncClient
+from sqlalchemy.dialects import postgresql
+from fast_python_api.chemas.user_crud import UserCreate
+from fast_python_api.core.user_crud import _combined_insert, _user_inserts
 from tests.test_token import generate_valid_token
 
 
@@ -117,3 +120,53 @@ async def test_create_user_missing_fields(test_client: AsyncClient):
         "/users/create/", json=user_data, headers=headers
     )
     assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_create_user_duplicate_username_rolls_back(
+        test_client: AsyncClient, test_session
+):
+    user_data = {
+        "name": {"title": "Ms", "first_name": "Una", "last_name": "Ique"},
+        "login": {"username": "johndoe", "password": "secret"},
+        "dob": "1995-06-10",
+        "city": "Chicago",
+        "email": "unique@example.com"
+    }
+
+    response = await test_client.post(
+        "/users/create/", json=user_data, headers=headers
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Username already taken"
+
+    # The users row of the failed attempt was rolled back
+    user_data["login"]["username"] = "unique"
+    response = await test_client.post(
+        "/users/create/", json=user_data, headers=headers
+    )
+    assert response.status_code == 200
+    data = response.json()
+    assert data["email"] == "unique@example.com"
+    assert data["login"]["role"] == "user"
+    assert data["name"]["first_name"] == "Una"
+
+
+def test_postgresql_create_user_is_one_statement():
+    user_data = UserCreate.model_validate({
+        "name": {"title": "Ms", "first_name": "Una", "last_name": "Ique"},
+        "login": {"username": "unique", "password": "secret"},
+        "dob": "1995-06-10",
+        "city": "Chicago",
+        "email": "unique@example.com"
+    })
+    query = _combined_insert(_user_inserts("id", user_data, "hash"))
+    sql = str(query.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("WITH u AS \n(INSERT INTO users")
+    assert "l AS \n(INSERT INTO logins" in sql
+    assert "n AS \n(INSERT INTO names" in sql
+    assert sql.endswith("FROM u, l, n")
+    assert set(query.selected_columns.keys()) == {
+        "login.uuid", "dob", "city", "email", "created_at", "login.username",
+        "login.role", "name.title", "name.first_name", "name.last_name"
+    }
@@ -1,5 +1,7 @@
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select
+from fast_python_api.models import Login, Name
 from tests.test_token import generate_valid_token
 
 
@@ -38,6 +40,26 @@ async def test_delete_user_by_admin(
     assert response.status_code == 404
 
 
+@pytest.mark.asyncio
+async def test_delete_cascades_to_name_and_login(
+        test_client: AsyncClient, test_session
+):
+    user_uuid = 'c647e0c3-d0fb-47fd-bbea-c61b3cd999dd'
+    response = await test_client.delete(
+        f"/users/{user_uuid}/", headers=headers_admin
+    )
+    assert response.status_code == 200
+
+    names = await test_session.scalars(
+        select(Name).where(Name.user_id == user_uuid)
+    )
+    assert names.first() is None
+    logins = await test_session.scalars(
+        select(Login).where(Login.uuid == user_uuid)
+    )
+    assert logins.first() is None
+
+
 @pytest.mark.asyncio
 async def test_user_delete_this_data(
         test_client: AsyncClient, test_session
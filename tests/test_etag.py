@@ -0,0 +1,131 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy import event
+from tests.test_token import generate_valid_token
+
+
+headers = {"Authorization": f"Bearer {generate_valid_token()}"}
+user_uuid = "c647e0c3-d0fb-47fd-bbea-c61b3cd999dd"
+
+
+@pytest.mark.asyncio
+async def test_user_not_modified(test_client: AsyncClient, test_session):
+    response = await test_client.get(f"/users/{user_uuid}", headers=headers)
+    etag = response.headers["ETag"]
+
+    response = await test_client.get(
+        f"/users/{user_uuid}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["ETag"] == etag
+    assert response.content == b""
+
+
+@pytest.mark.asyncio
+async def test_user_etag_changes_on_update(
+        test_client: AsyncClient, test_session
+):
+    response = await test_client.get(f"/users/{user_uuid}", headers=headers)
+    etag = response.headers["ETag"]
+
+    await test_client.put(
+        f"/users/{user_uuid}/",
+        json={"name": {"first_name": "Alicia"}},
+        headers=headers
+    )
+    response = await test_client.get(
+        f"/users/{user_uuid}", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert response.json()["name"]["first_name"] == "Alicia"
+
+
+@pytest.mark.asyncio
+async def test_user_etag_depends_on_fields(
+        test_client: AsyncClient, test_session
+):
+    response = await test_client.get(f"/users/{user_uuid}", headers=headers)
+    etag = response.headers["ETag"]
+
+    response = await test_client.get(
+        f"/users/{user_uuid}?fields=email",
+        headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_users_page_not_modified(test_client: AsyncClient, test_session):
+    response = await test_client.get("/users?limit=3", headers=headers)
+    etag = response.headers["ETag"]
+
+    response = await test_client.get(
+        "/users?limit=3", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+
+    response = await test_client.get(
+        "/users?limit=4", headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+
+
+@pytest.mark.asyncio
+async def test_users_page_etag_without_extra_query(
+        test_client: AsyncClient, test_session
+):
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement.split()[0])
+
+    connection = (await test_session.connection()).sync_connection
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        response = await test_client.get(
+            "/users?limit=3&role=user", headers=headers
+        )
+        assert statements.count("SELECT") == 1
+        response = await test_client.get(
+            "/users?limit=3&role=user",
+            headers={**headers, "If-None-Match": response.headers["ETag"]}
+        )
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+    assert response.status_code == 304
+    assert statements.count("SELECT") == 2
+
+
+@pytest.mark.asyncio
+async def test_users_page_etag_changes_on_delete(
+        test_client: AsyncClient, test_session
+):
+    response = await test_client.get(
+        "/users?limit=3&city=New York", headers=headers
+    )
+    etag = response.headers["ETag"]
+
+    await test_client.delete(f"/users/{user_uuid}/", headers=headers)
+    response = await test_client.get(
+        "/users?limit=3&city=New York",
+        headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == 1
+
+
+@pytest.mark.asyncio
+async def test_me_shares_user_etag(test_client: AsyncClient, test_session):
+    admin_uuid = "6c3b3609-6fae-4a71-a9fd-94eaabf12c9a"
+    response = await test_client.get(f"/users/{admin_uuid}", headers=headers)
+    etag = response.headers["ETag"]
+
+    response = await test_client.get("/me", headers=headers)
+    assert response.headers["ETag"] == etag
+
+    response = await test_client.get(
+        "/me", headers={**headers, "If-None-Match": f'W/{etag}'}
+    )
+    assert response.status_code == 304
@@ -0,0 +1,56 @@
+import csv
+import io
+import json
+import pytest
+from httpx import AsyncClient
+from tests.test_token import generate_valid_token
+
+
+headers = {"Authorization": f"Bearer {generate_valid_token()}"}
+
+
+@pytest.mark.asyncio
+async def test_export_ndjson(test_client: AsyncClient, test_session):
+    response = await test_client.get("/users/export", headers=headers)
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+
+    lines = response.text.splitlines()
+    assert len(lines) == 18
+    users = [json.loads(line) for line in lines]
+
+    listed = await test_client.get("/users?limit=18", headers=headers)
+    assert users == listed.json()
+
+
+@pytest.mark.asyncio
+async def test_export_csv(test_client: AsyncClient, test_session):
+    response = await test_client.get(
+        "/users/export?format=csv", headers=headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert len(rows) == 18
+    alice = next(row for row in rows if row["username"] == "alice_smith")
+    assert alice["id"] == "c647e0c3-d0fb-47fd-bbea-c61b3cd999dd"
+    assert alice["email"] == "alice@example.com"
+    assert alice["dob"] == "1992-03-15"
+    assert alice["last_name"] == "Smith"
+
+
+@pytest.mark.asyncio
+async def test_export_invalid_format(test_client: AsyncClient, test_session):
+    response = await test_client.get(
+        "/users/export?format=xml", headers=headers
+    )
+    assert response.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_export_without_access_token(
+        test_client: AsyncClient, test_session
+):
+    response = await test_client.get("/users/export")
+    assert response.status_code == 401
@@ -0,0 +1,136 @@
+import asyncio
+import pytest
+from httpx import AsyncClient
+from fast_python_api.auth import hashing
+from fast_python_api.auth.hashing import (
+    HashingExecutor, get_password_hash, verify_password,
+    get_password_hash_async, verify_password_async, make_context,
+    needs_rehash, get_password_hashes_async
+)
+from fast_python_api.models import Login
+from tests.test_token import generate_valid_token
+
+
+headers = {"Authorization": f"Bearer {generate_valid_token()}"}
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify_async():
+    hashed = await get_password_hash_async("secret")
+    assert await verify_password_async("secret", hashed)
+    assert not await verify_password_async("wrong", hashed)
+
+
+@pytest.mark.asyncio
+async def test_hashing_does_not_block_event_loop():
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            await asyncio.sleep(0.01)
+            ticks += 1
+
+    task = asyncio.create_task(ticker())
+    await get_password_hash_async("secret")
+    task.cancel()
+    assert ticks > 0
+
+
+@pytest.mark.asyncio
+async def test_bulk_hashing_leaves_login_pool_free(monkeypatch):
+    monkeypatch.setattr(hashing, "pwd_context", make_context("bcrypt", 4))
+    monkeypatch.setattr(hashing.settings, "BULK_HASH_SLICE", 4)
+    bulk = HashingExecutor("thread", 2)
+    monkeypatch.setattr(hashing, "bulk_hashing_executor", bulk)
+    completed = hashing.hashing_executor.completed
+    in_flight = []
+    run = bulk.run
+
+    async def record(*args):
+        in_flight.append(bulk.in_flight)
+        return await run(*args)
+
+    monkeypatch.setattr(bulk, "run", record)
+    passwords = [f"secret{i}" for i in range(40)]
+    hashes = await get_password_hashes_async(passwords)
+    bulk.shutdown()
+
+    assert len(hashes) == 40 and verify_password("secret7", hashes[7])
+    assert len(in_flight) == 10 and max(in_flight) < bulk.workers
+    assert hashing.hashing_executor.completed == completed
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("kind", ["thread", "process"])
+async def test_executor_stats(kind):
+    executor = HashingExecutor(kind, workers=1)
+    try:
+        hashed = get_password_hash("secret")
+        results = await asyncio.gather(*(
+            executor.run(verify_password, "secret", hashed) for _ in range(3)
+        ))
+    finally:
+        executor.shutdown()
+
+    assert results == [True, True, True]
+    stats = executor.stats()
+    assert stats["completed"] == 3
+    assert stats["in_flight"] == 0
+    assert stats["queue_depth"] == 0
+    assert stats["wait_max_ms"] > 0
+
+
+def test_needs_rehash_for_other_cost_or_scheme(monkeypatch):
+    monkeypatch.setattr(hashing, "pwd_context", make_context("bcrypt", 5))
+    assert not needs_rehash(get_password_hash("secret"))
+    assert needs_rehash(make_context("bcrypt", 4).hash("secret"))
+    assert needs_rehash(make_context("pbkdf2_sha256").hash("secret"))
+    assert verify_password("secret", make_context("bcrypt", 4).hash("secret"))
+
+
+@pytest.mark.asyncio
+async def test_login_rehashes_in_background(
+        monkeypatch, test_client: AsyncClient, test_session
+):
+    from fast_python_api.auth import user_auth
+
+    monkeypatch.setattr(hashing, "pwd_context", make_context("bcrypt", 4))
+    response = await test_client.post("/users/create/", json={
+        "name": {"title": "Ms", "first_name": "Re", "last_name": "Hash"},
+        "login": {"username": "rehashed", "password": "secret"},
+        "dob": "1990-01-01",
+        "city": "Oslo",
+        "email": "rehashed@example.com"
+    }, headers=headers)
+    user_id = response.json()["login"]["uuid"]
+
+    scheduled = []
+
+    async def record(*args):
+        scheduled.append(args)
+
+    monkeypatch.setattr(user_auth, "rehash_password_in_background", record)
+    monkeypatch.setattr(hashing, "pwd_context", make_context("bcrypt", 5))
+    form = {"username": "rehashed", "password": "secret"}
+    response = await test_client.post("/token", data=form)
+    assert response.status_code == 200
+    [(scheduled_id, password, old_hash)] = scheduled
+    assert (scheduled_id, password) == (user_id, "secret")
+    assert old_hash.startswith("$2b$04$")
+
+    assert await user_auth.rehash_password(
+        user_id, password, old_hash, test_session
+    )
+    login = await test_session.get(Login, user_id)
+    await test_session.refresh(login)
+    assert login.password.startswith("$2b$05$")
+    assert verify_password("secret", login.password)
+    # The hash changed meanwhile, it is kept
+    assert not await user_auth.rehash_password(
+        user_id, password, old_hash, test_session
+    )
+
+    response = await test_client.post("/token", data=form)
+    assert response.status_code == 200
+    assert len(scheduled) == 1
@@ -0,0 +1,241 @@
+import asyncio
+import os
+import re
+import copy
+import json
+import uuid
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from aioresponses import CallbackResult, aioresponses
+from fast_python_api.chemas.params import ImportParams
+from fast_python_api.models import ImportJob
+from fast_python_api.services.jobs import _now, import_jobs, job_payload
+from fast_python_api.settings import settings
+from tests.test_token import generate_valid_token
+
+
+headers_admin = {"Authorization": f"Bearer {generate_valid_token()}"}
+headers_user = {"Authorization": f"Bearer {generate_valid_token(
+    username='alice_smith',
+    role='user',
+    user_id='c647e0c3-d0fb-47fd-bbea-c61b3cd999dd'
+)}"}
+
+FIXTURES_SERVICE_PATH = os.path.join(
+    os.getcwd(), "tests", "fixtures", "service_response.json"
+)
+
+SERVICE_URL = re.compile(rf"^{re.escape(settings.test_service_url)}\?")
+
+
+class Service:
+    """Stand-in for the external API, failing the requests in ``fail``."""
+
+    def __init__(self, fail: tuple[int, ...] = ()) -> None:
+        with open(FIXTURES_SERVICE_PATH, "r") as f:
+            self.template = json.load(f)["results"][0]
+        self.fail = fail
+        self.calls = 0
+
+    def __call__(self, url, **kwargs) -> CallbackResult:
+        self.calls += 1
+        if self.calls in self.fail:
+            return CallbackResult(status=500)
+        users = []
+        for _ in range(int(url.query["results"])):
+            user = copy.deepcopy(self.template)
+            user_id = str(uuid.uuid4())
+            user["login"].update(uuid=user_id, username=user_id)
+            user["email"] = f"{user_id}@example.com"
+            users.append(user)
+        return CallbackResult(payload={"results": users})
+
+
+@pytest.fixture(autouse=True)
+def small_pages(monkeypatch, test_session):
+    monkeypatch.setattr(settings, "IMPORT_PAGE_SIZE", 20)
+    monkeypatch.setattr(settings, "IMPORT_CONCURRENCY", 1)
+    # The workers share the session of the test, its database is the
+    # in-memory one of the test connection
+    monkeypatch.setattr(import_jobs, "session_factory", lambda: test_session)
+
+
+@pytest_asyncio.fixture
+async def workers():
+    await import_jobs.start(1)
+    yield import_jobs
+    await import_jobs.close()
+
+
+async def get_job(test_client: AsyncClient, job_id: str) -> dict:
+    response = await test_client.get(
+        f"/import/jobs/{job_id}", headers=headers_admin
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_background_import(
+        test_client: AsyncClient, test_session, workers
+):
+    with aioresponses() as mocked:
+        mocked.get(SERVICE_URL, callback=Service(), repeat=True)
+        response = await test_client.post(
+            "/import?results=45&background=true", headers=headers_admin
+        )
+        assert response.status_code == 202
+        assert response.json()["status"] == "queued"
+        await workers.join()
+
+    job = await get_job(test_client, response.json()["id"])
+    assert job["status"] == "done"
+    assert (job["fetched"], job["inserted"], job["skipped"]) == (45, 45, 0)
+    assert job["users_per_second"] > 0
+    assert job["finished_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_failed_import_resumes_remaining_users(
+        test_client: AsyncClient, test_session, workers
+):
+    service = Service(fail=(2,))
+    with aioresponses() as mocked:
+        mocked.get(SERVICE_URL, callback=service, repeat=True)
+        response = await test_client.post(
+            "/import?results=45&background=true", headers=headers_admin
+        )
+        job_id = response.json()["id"]
+        await workers.join()
+
+        job = await get_job(test_client, job_id)
+        assert (job["status"], job["error"]) == ("failed", "External API error")
+        assert job["fetched"] == 20
+
+        response = await test_client.post(
+            f"/import/jobs/{job_id}/resume", headers=headers_admin
+        )
+        assert response.status_code == 202
+        await workers.join()
+
+    job = await get_job(test_client, job_id)
+    assert job["status"] == "done"
+    assert (job["fetched"], job["inserted"], job["error"]) == (45, 45, None)
+
+    response = await test_client.post(
+        f"/import/jobs/{job_id}/resume", headers=headers_admin
+    )
+    assert response.status_code == 409
+
+
+@pytest.mark.asyncio
+async def test_cancelled_job_resumes_after_restart(
+        test_client: AsyncClient, test_session
+):
+    # Without workers, as before the app has started, the job stays queued
+    response = await test_client.post(
+        "/import?results=5&background=true", headers=headers_admin
+    )
+    job_id = response.json()["id"]
+
+    response = await test_client.post(
+        f"/import/jobs/{job_id}/cancel", headers=headers_admin
+    )
+    assert response.json()["status"] == "cancelled"
+    response = await test_client.post(
+        f"/import/jobs/{job_id}/cancel", headers=headers_admin
+    )
+    assert response.status_code == 409
+
+    response = await test_client.post(
+        f"/import/jobs/{job_id}/resume", headers=headers_admin
+    )
+    assert response.json()["status"] == "queued"
+
+    with aioresponses() as mocked:
+        mocked.get(SERVICE_URL, callback=Service(), repeat=True)
+        await import_jobs.start(1)
+        await import_jobs.join()
+        await import_jobs.close()
+
+    job = await test_session.get(ImportJob, job_id, populate_existing=True)
+    assert (job.status, job.inserted) == ("done", 5)
+
+
+@pytest.mark.asyncio
+async def test_stale_claims_are_ignored(test_session):
+    job = await import_jobs.create(
+        ImportParams(results=5), None, test_session
+    )
+    version = job.version
+    assert await import_jobs.resume(job, test_session) is False
+    assert await import_jobs.cancel(job, test_session)
+
+    # Queued before it was cancelled, the job is not run
+    with aioresponses() as mocked:
+        service = Service()
+        mocked.get(SERVICE_URL, callback=service, repeat=True)
+        await import_jobs.run(job.id, version)
+    assert service.calls == 0
+
+    job = await test_session.get(ImportJob, job.id)
+    assert await import_jobs.resume(job, test_session)
+    # Only the version handed out by the resume can claim the job
+    await import_jobs.run(job.id, version)
+    job = await test_session.get(ImportJob, job.id, populate_existing=True)
+    assert (job.status, job.fetched) == ("queued", 0)
+
+
+@pytest.mark.asyncio
+async def test_orphaned_running_job_is_resumed(test_session, monkeypatch):
+    monkeypatch.setattr(settings, "IMPORT_JOB_STALE_AFTER", 0.2)
+    job = await import_jobs.create(
+        ImportParams(results=5), None, test_session
+    )
+    # Its worker died just before the app restarted
+    job.status, job.updated_at = "running", _now()
+    await test_session.commit()
+    assert await import_jobs.resume(job, test_session) is False
+
+    with aioresponses() as mocked:
+        mocked.get(SERVICE_URL, callback=Service(), repeat=True)
+        completed = import_jobs.completed
+        await import_jobs.start(1)
+        # Not stale yet when the app starts, a later sweep picks it up
+        for _ in range(50):
+            if import_jobs.completed > completed:
+                break
+            await asyncio.sleep(0.05)
+        await import_jobs.join()
+        await import_jobs.close()
+
+    job = await test_session.get(ImportJob, job.id, populate_existing=True)
+    assert (job.status, job.inserted) == ("done", 5)
+
+
+def test_throughput_leaves_out_pauses():
+    job = ImportJob(
+        id=str(uuid.uuid4()), status="failed", requested=100, fetched=60,
+        inserted=60, skipped=0, created_at=_now(), started_at=_now(),
+        finished_at=_now(), run_seconds=3.0
+    )
+    assert job_payload(job)["users_per_second"] == 20.0
+
+
+@pytest.mark.asyncio
+async def test_import_jobs_require_admin(
+        test_client: AsyncClient, test_session
+):
+    response = await test_client.post(
+        "/import?background=true", headers=headers_user
+    )
+    assert response.status_code == 403
+    response = await test_client.get(
+        "/import/jobs/unknown", headers=headers_user
+    )
+    assert response.status_code == 403
+    response = await test_client.get(
+        "/import/jobs/unknown", headers=headers_admin
+    )
+    assert response.status_code == 404
@@ -1,9 +1,12 @@
 import os
 import re
+import copy
 import json
+import uuid
+import asyncio
 import pytest
 from httpx import AsyncClient
-from aioresponses import aioresponses
+from aioresponses import CallbackResult, aioresponses
 from tests.test_token import generate_valid_token
 from fast_python_api.settings import settings
 from fast_python_api.logging_config import logger
@@ -38,7 +41,11 @@ async def test_import_users_success(test_client: AsyncClient, test_session):
         response = await test_client.post("/import", headers=headers_admin)
 
     assert response.status_code == 200
-    assert len(response.json()) == 5
+    assert response.json()["inserted"] == 5
+    assert response.json()["skipped"] == 0
+    assert [user["status"] for user in response.json()["users"]] == [
+        "inserted"
+    ] * 5
 
 
 @pytest.mark.asyncio
@@ -90,3 +97,92 @@ async def test_import_users_server_error(
         response = await test_client.post("/import", headers=headers_admin)
 
     assert response.status_code == 500
+
+
+@pytest.mark.asyncio
+async def test_import_users_skips_conflicts(
+        test_client: AsyncClient, test_session
+):
+    with open(FIXTURES_SERVICE_PATH, "r") as f:
+        mocked_payload = json.load(f)
+    results = mocked_payload["results"]
+    # Clashes with johndoe, and with the first user of the batch
+    results[1]["login"]["username"] = "johndoe"
+    results[2]["login"]["uuid"] = results[0]["login"]["uuid"]
+
+    expected_url = f"{settings.test_service_url}?results=5"
+    with aioresponses() as mocked:
+        mocked.get(expected_url, payload=mocked_payload)
+        mocked.get(expected_url, payload=mocked_payload)
+        response = await test_client.post("/import", headers=headers_admin)
+        again = await test_client.post("/import", headers=headers_admin)
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["inserted"], data["skipped"]) == (3, 2)
+    statuses = [(user["status"], user["detail"]) for user in data["users"]]
+    assert statuses[1] == ("skipped", "Username already taken")
+    assert statuses[2][0] == "skipped"
+    assert [status for status, _ in statuses] == [
+        "inserted", "skipped", "skipped", "inserted", "inserted"
+    ]
+
+    response = await test_client.get(
+        f"/users/{results[1]['login']['uuid']}", headers=headers_admin
+    )
+    assert response.status_code == 404
+
+    assert again.json()["inserted"] == 0
+    assert again.json()["skipped"] == 5
+
+
+@pytest.mark.asyncio
+async def test_import_users_in_concurrent_pages(
+        test_client: AsyncClient, test_session, monkeypatch
+):
+    monkeypatch.setattr(settings, "IMPORT_PAGE_SIZE", 20)
+    monkeypatch.setattr(settings, "IMPORT_CONCURRENCY", 2)
+    with open(FIXTURES_SERVICE_PATH, "r") as f:
+        template = json.load(f)["results"][0]
+    requested = []
+    in_flight = 0
+    max_in_flight = 0
+
+    async def service(url, **kwargs):
+        nonlocal in_flight, max_in_flight
+        size = int(url.query["results"])
+        requested.append(size)
+        in_flight += 1
+        max_in_flight = max(max_in_flight, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        users = []
+        for _ in range(size):
+            user = copy.deepcopy(template)
+            user_id = str(uuid.uuid4())
+            user["login"].update(uuid=user_id, username=user_id)
+            user["email"] = f"{user_id}@example.com"
+            users.append(user)
+        return CallbackResult(payload={"results": users})
+
+    with aioresponses() as mocked:
+        mocked.get(
+            re.compile(rf"^{re.escape(settings.test_service_url)}\?"),
+            callback=service, repeat=True
+        )
+        response = await test_client.post(
+            "/import?results=45", headers=headers_admin
+        )
+
+    assert response.status_code == 200
+    data = response.json()
+    assert (data["inserted"], data["skipped"]) == (45, 0)
+    assert len({user["id"] for user in data["users"]}) == 45
+    assert sorted(requested) == [5, 20, 20]
+    assert max_in_flight == 2
+
+    response = await test_client.post(
+        f"/import?results={settings.IMPORT_MAX_RESULTS + 1}",
+        headers=headers_admin
+    )
+    assert response.status_code == 422
@@ -1,6 +1,7 @@
 from fastapi.testclient import TestClient
 from aioresponses import aioresponses
 from fast_python_api.main import app
+from fast_python_api.services.http import http_client
 from fast_python_api.settings import settings
 
 
@@ -54,3 +55,25 @@ def test_external_api_test():
     assert response.status_code == 200
     data = response.json()
     assert data == mocked_payload
+
+
+def test_external_api_shares_one_session():
+    url = f"{settings.test_service_url}?results=5"
+    created = http_client.sessions_created
+    with TestClient(app) as lifespan_client, aioresponses() as mock:
+        mock.get(url, payload={"results": []}, repeat=True)
+        shared = http_client.session
+        for _ in range(3):
+            response = lifespan_client.get("/test")
+            assert response.status_code == 200
+        assert http_client.session is shared
+        assert http_client.sessions_created == created + 1
+    assert shared.closed
+    assert http_client.session is None
+
+    # Without the lifespan every request gets a session of its own
+    with aioresponses() as mock:
+        mock.get(url, payload={"results": []}, repeat=True)
+        client.get("/test")
+        client.get("/test")
+    assert http_client.sessions_created == created + 3
@@ -1,5 +1,8 @@
 import pytest
+from datetime import date
 from httpx import AsyncClient
+from fast_python_api.chemas.user_crud import UserPublic
+from fast_python_api.models import User
 from tests.test_token import generate_valid_token
 
 
@@ -20,6 +23,117 @@ async def test_read_limit_users(test_client: AsyncClient, test_session):
     assert len(response.json()) == 5
 
 
+@pytest.mark.asyncio
+async def test_read_users_skip(test_client: AsyncClient, test_session):
+    response = await test_client.get("/users?limit=18", headers=headers)
+    all_users = response.json()
+    response = await test_client.get(
+        "/users?skip=5&limit=3", headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json() == all_users[5:8]
+
+
+@pytest.mark.asyncio
+async def test_read_users_cursor(test_client: AsyncClient, test_session):
+    response = await test_client.get("/users?limit=18", headers=headers)
+    all_users = response.json()
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"limit": 5} if cursor is None else {
+            "limit": 5, "after": cursor
+        }
+        response = await test_client.get(
+            "/users", params=params, headers=headers
+        )
+        assert response.status_code == 200
+        seen.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+    assert seen == all_users
+    assert len(seen) == 18
+
+
+@pytest.mark.asyncio
+async def test_read_users_invalid_cursor(
+        test_client: AsyncClient, test_session
+):
+    response = await test_client.get(
+        "/users?after=not-a-cursor", headers=headers
+    )
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_read_users_filter_city(test_client: AsyncClient, test_session):
+    response = await test_client.get(
+        "/users?city=New York&limit=18", headers=headers
+    )
+    assert response.status_code == 200
+    emails = {user["email"] for user in response.json()}
+    assert emails == {"alice@example.com", "testuser@example.com"}
+
+
+@pytest.mark.asyncio
+async def test_read_users_filter_dob_range_and_role(
+        test_client: AsyncClient, test_session
+):
+    response = await test_client.get(
+        "/users",
+        params={
+            "dob_from": "1985-01-01",
+            "dob_to": "1990-12-31",
+            "role": "user",
+            "sort_by": "dob",
+            "order": "desc",
+            "limit": 18,
+        },
+        headers=headers
+    )
+    assert response.status_code == 200
+    dobs = [user["dob"] for user in response.json()]
+    assert dobs == sorted(dobs, reverse=True)
+    assert dobs[0] == "1990-11-05"
+    assert dobs[-1] == "1985-07-22"
+    assert len(dobs) == 8
+
+
+@pytest.mark.asyncio
+async def test_read_users_cursor_sorted_desc(
+        test_client: AsyncClient, test_session
+):
+    params = {"sort_by": "email", "order": "desc", "limit": 18}
+    response = await test_client.get("/users", params=params, headers=headers)
+    all_users = response.json()
+
+    params["limit"] = 4
+    seen = []
+    while True:
+        response = await test_client.get(
+            "/users", params=params, headers=headers
+        )
+        seen.extend(response.json())
+        if "X-Next-Cursor" not in response.headers:
+            break
+        params["after"] = response.headers["X-Next-Cursor"]
+    assert seen == all_users
+
+
+@pytest.mark.asyncio
+async def test_read_users_cursor_other_sort(
+        test_client: AsyncClient, test_session
+):
+    response = await test_client.get("/users?limit=2", headers=headers)
+    cursor = response.headers["X-Next-Cursor"]
+    response = await test_client.get(
+        f"/users?limit=2&sort_by=dob&after={cursor}", headers=headers
+    )
+    assert response.status_code == 400
+
+
 @pytest.mark.asyncio
 async def test_read_user(test_client: AsyncClient, test_session):
     user_uuid = "c647e0c3-d0fb-47fd-bbea-c61b3cd999dd"
@@ -36,6 +150,90 @@ async def test_read_user(test_client: AsyncClient, test_session):
     assert response.json()["name"]["last_name"] == "Smith"
 
 
+@pytest.mark.asyncio
+async def test_read_users_public_shape(test_client: AsyncClient, test_session):
+    response = await test_client.get("/users?limit=18", headers=headers)
+    assert response.status_code == 200
+    for user in response.json():
+        public = UserPublic.model_validate(user).model_dump(mode="json")
+        assert user == public
+        assert "password" not in user["login"]
+
+
+@pytest.mark.asyncio
+async def test_read_user_fields(test_client: AsyncClient, test_session):
+    user_uuid = "c647e0c3-d0fb-47fd-bbea-c61b3cd999dd"
+    response = await test_client.get(
+        f"/users/{user_uuid}/?fields=id,email,name.last_name",
+        headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json() == {
+        "id": user_uuid,
+        "email": "alice@example.com",
+        "name": {"last_name": "Smith"},
+    }
+
+
+@pytest.mark.asyncio
+async def test_read_users_fields(test_client: AsyncClient, test_session):
+    full = await test_client.get("/users?limit=18", headers=headers)
+    response = await test_client.get(
+        "/users?limit=18&fields=login,dob", headers=headers
+    )
+    assert response.status_code == 200
+    assert response.json() == [
+        {"login": user["login"], "dob": user["dob"]} for user in full.json()
+    ]
+
+
+@pytest.mark.asyncio
+async def test_read_users_fields_same_users_as_full(
+        test_client: AsyncClient, test_session
+):
+    # A user without a name row is missing from the full listing
+    test_session.add(User(
+        id="0d1f5b2e-1111-4c1e-9a1a-000000000001", dob=date(1990, 1, 1),
+        city="Oslo", email="nameless@example.com"
+    ))
+    await test_session.commit()
+
+    full = await test_client.get("/users?limit=50", headers=headers)
+    response = await test_client.get(
+        "/users?limit=50&fields=id", headers=headers
+    )
+    assert response.json() == [
+        {"id": user["login"]["uuid"]} for user in full.json()
+    ]
+    assert "nameless@example.com" not in str(full.json())
+
+
+@pytest.mark.asyncio
+async def test_read_users_fields_cursor_and_role(
+        test_client: AsyncClient, test_session
+):
+    params = {"fields": "email", "role": "user", "limit": 10}
+    response = await test_client.get("/users", params=params, headers=headers)
+    assert response.status_code == 200
+    page = response.json()
+    assert page[0] == {"email": "alice@example.com"}
+
+    params["after"] = response.headers["X-Next-Cursor"]
+    response = await test_client.get("/users", params=params, headers=headers)
+    emails = [user["email"] for user in page + response.json()]
+    assert len(emails) == 17
+    assert "testuser@example.com" not in emails
+
+
+@pytest.mark.asyncio
+async def test_read_user_unknown_field(test_client: AsyncClient, test_session):
+    response = await test_client.get(
+        "/users?fields=email,password", headers=headers
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Unknown field: password"
+
+
 @pytest.mark.asyncio
 async def test_read_user_not_found(test_client: AsyncClient, test_session):
     user_uuid = "c647e0c3-d0fb-47fd-bbea-c61b3cd999cc"
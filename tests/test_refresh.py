@@ -0,0 +1,99 @@
+import pytest
+from httpx import AsyncClient
+from fast_python_api.auth.revocation import RevocationList, revocation_list
+from tests.test_token import generate_valid_token
+
+
+headers = {"Authorization": f"Bearer {generate_valid_token()}"}
+
+
+async def login(test_client: AsyncClient) -> dict:
+    user_data = {
+        "name": {"title": "Mr", "first_name": "Reo", "last_name": "Fresh"},
+        "login": {"username": "refresher", "password": "secret"},
+        "dob": "1990-01-01",
+        "city": "Oslo",
+        "email": "refresher@example.com"
+    }
+    response = await test_client.post(
+        "/users/create/", json=user_data, headers=headers
+    )
+    assert response.status_code == 200
+    response = await test_client.post(
+        "/token", data={"username": "refresher", "password": "secret"}
+    )
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_tokens(test_client: AsyncClient, test_session):
+    tokens = await login(test_client)
+
+    response = await test_client.post(
+        "/token/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 200
+    refreshed = response.json()
+    assert refreshed["refresh_token"] != tokens["refresh_token"]
+
+    response = await test_client.get(
+        "/me", headers={
+            "Authorization": f"Bearer {refreshed['access_token']}"
+        }
+    )
+    assert response.status_code == 200
+    assert response.json()["login"]["username"] == "refresher"
+
+    # A refresh token can be exchanged only once
+    response = await test_client.post(
+        "/token/refresh", json={"refresh_token": tokens["refresh_token"]}
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_refresh_token_is_not_an_access_token(
+        test_client: AsyncClient, test_session
+):
+    tokens = await login(test_client)
+    response = await test_client.get(
+        "/me", headers={"Authorization": f"Bearer {tokens['refresh_token']}"}
+    )
+    assert response.status_code == 401
+
+    response = await test_client.post(
+        "/token/refresh", json={"refresh_token": tokens["access_token"]}
+    )
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_revoke_refresh_token(test_client: AsyncClient, test_session):
+    tokens = await login(test_client)
+    body = {"refresh_token": tokens["refresh_token"]}
+
+    response = await test_client.post("/token/revoke", json=body)
+    assert response.status_code == 204
+    response = await test_client.post("/token/revoke", json=body)
+    assert response.status_code == 204
+
+    response = await test_client.post("/token/refresh", json=body)
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_revocations_are_shared_through_the_database(test_session):
+    assert await revocation_list.revoke("a", 2 ** 40, test_session)
+    assert await revocation_list.revoke("expired", 1, test_session)
+
+    # Another worker does not know the revocation, but cannot reuse it
+    other = RevocationList()
+    assert "a" not in other
+    assert not await other.revoke("a", 2 ** 40, test_session)
+
+    other = RevocationList()
+    await other.sync(test_session)
+    assert "a" in other
+    assert "expired" not in other
+    assert other.stats() == {"revoked": 1, "synced": 1}
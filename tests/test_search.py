@@ -0,0 +1,116 @@
+import pytest
+from httpx import AsyncClient
+from sqlalchemy.dialects import postgresql
+from fast_python_api.core.search import _postgresql_query
+from fast_python_api.settings import settings
+from tests.test_token import generate_valid_token
+
+
+headers = {"Authorization": f"Bearer {generate_valid_token()}"}
+
+
+@pytest.mark.asyncio
+async def test_search_by_first_name_prefix(
+        test_client: AsyncClient, test_session
+):
+    response = await test_client.get("/users/search?q=ali", headers=headers)
+    assert response.status_code == 200
+    assert [user["email"] for user in response.json()] == [
+        "alice@example.com"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_search_by_username_and_email(
+        test_client: AsyncClient, test_session
+):
+    response = await test_client.get(
+        "/users/search?q=bob_johnson", headers=headers
+    )
+    assert response.json()[0]["login"]["username"] == "bob_johnson"
+
+    response = await test_client.get(
+        "/users/search?q=charlie@example", headers=headers
+    )
+    assert response.json()[0]["email"] == "charlie@example.com"
+
+
+@pytest.mark.asyncio
+async def test_search_multiple_words(test_client: AsyncClient, test_session):
+    response = await test_client.get(
+        "/users/search", params={"q": "Bob John"}, headers=headers
+    )
+    assert [user["email"] for user in response.json()] == ["bob@example.com"]
+
+
+@pytest.mark.asyncio
+async def test_search_limit(test_client: AsyncClient, test_session):
+    response = await test_client.get(
+        "/users/search?q=example&limit=3", headers=headers
+    )
+    assert response.status_code == 200
+    assert len(response.json()) == 3
+
+
+@pytest.mark.asyncio
+async def test_search_follows_updates(test_client: AsyncClient, test_session):
+    user_uuid = "c647e0c3-d0fb-47fd-bbea-c61b3cd999dd"
+    await test_client.put(
+        f"/users/{user_uuid}/",
+        json={"name": {"last_name": "Zebulon"}},
+        headers=headers
+    )
+    response = await test_client.get("/users/search?q=zebu", headers=headers)
+    assert [user["login"]["uuid"] for user in response.json()] == [user_uuid]
+
+    await test_client.delete(f"/users/{user_uuid}/", headers=headers)
+    response = await test_client.get("/users/search?q=zebu", headers=headers)
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+async def test_search_no_words(test_client: AsyncClient, test_session):
+    response = await test_client.get("/users/search?q=%25%25", headers=headers)
+    assert response.status_code == 200
+    assert response.json() == []
+
+
+@pytest.mark.asyncio
+async def test_search_without_access_token(
+        test_client: AsyncClient, test_session
+):
+    response = await test_client.get("/users/search?q=ali")
+    assert response.status_code == 401
+
+
+def test_postgresql_query_matches_every_word_per_table():
+    query = _postgresql_query("ali smi")
+    sql = str(query.compile(dialect=postgresql.dialect()))
+    where = sql.split("WHERE", 1)[1].split("ORDER BY")[0]
+    # Capped candidates, with one UNION of per-table selects per word,
+    # AND-ed together
+    assert where.count("users.id IN (SELECT") == 3
+    assert where.count("UNION") == 6
+    assert _postgresql_query("?!") is None
+
+
+def test_postgresql_query_ranks_capped_candidates(monkeypatch):
+    monkeypatch.setattr(settings, "SEARCH_CANDIDATES", 50)
+    query = _postgresql_query("ali")
+    sql = str(query.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    ))
+    candidates = sql.split("WHERE", 1)[1].split("ORDER BY")[0]
+    assert candidates.rstrip().endswith("LIMIT 50)")
+    assert "similarity" not in candidates
+
+
+def test_postgresql_short_words_match_prefix_only():
+    query = _postgresql_query("Al smith")
+    sql = str(query.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    ))
+    where = sql.split("WHERE", 1)[1].split("ORDER BY")[0]
+    assert where.count("lower(names.first_name) LIKE 'al%%'") == 1
+    assert where.count("names.first_name %% 'smith'") == 1
+    assert "'al'" not in where
@@ -0,0 +1,133 @@
+import asyncio
+import pytest
+from fastapi import HTTPException, Request
+from httpx import AsyncClient
+from fast_python_api.auth.throttling import (
+    AdmissionController, RateLimiter, client_ip, ip_limiter
+)
+from fast_python_api.settings import settings
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_rate_limiter_refills():
+    timer = FakeTimer()
+    limiter = RateLimiter(rate=1, burst=2, timer=timer)
+    assert limiter.consume("alice") is None
+    assert limiter.consume("alice") is None
+    assert limiter.consume("alice") == pytest.approx(1)
+    assert limiter.consume("bob") is None
+
+    timer.now = 1
+    assert limiter.consume("alice") is None
+    assert limiter.consume("alice") is not None
+    assert limiter.stats()["limited"] == 2
+
+
+@pytest.mark.asyncio
+async def test_admission_rejects_when_queue_full():
+    controller = AdmissionController(
+        limit=1, queue_size=0, timeout=1, retry_after=3
+    )
+    async with controller.admit():
+        with pytest.raises(HTTPException) as error:
+            async with controller.admit():
+                pass
+    assert error.value.status_code == 503
+    assert error.value.headers["Retry-After"] == "3"
+
+    async with controller.admit():
+        pass
+    assert controller.stats()["admitted"] == 2
+    assert controller.stats()["rejected"] == 1
+
+
+@pytest.mark.asyncio
+async def test_admission_queue_waits_then_times_out():
+    controller = AdmissionController(
+        limit=1, queue_size=1, timeout=0.05, retry_after=1
+    )
+    release = asyncio.Event()
+
+    async def hold():
+        async with controller.admit():
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    with pytest.raises(HTTPException) as error:
+        async with controller.admit():
+            pass
+    assert error.value.status_code == 503
+
+    release.set()
+    await holder
+    assert controller.stats()["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_login_rate_limited_per_username(
+        test_client: AsyncClient, test_session
+):
+    form = {"username": "alice_smith", "password": "wrong"}
+    for _ in range(settings.LOGIN_USERNAME_BURST):
+        response = await test_client.post("/token", data=form)
+        assert response.status_code == 401
+
+    response = await test_client.post("/token", data=form)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+    response = await test_client.post(
+        "/token", data={"username": "johndoe", "password": "wrong"}
+    )
+    assert response.status_code == 401
+
+
+def make_request(peer: str, forwarded: str | None = None) -> Request:
+    headers = []
+    if forwarded is not None:
+        headers.append((b"x-forwarded-for", forwarded.encode()))
+    return Request({
+        "type": "http", "headers": headers, "client": (peer, 5000)
+    })
+
+
+def test_client_ip_behind_trusted_proxies(monkeypatch):
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", ["10.0.0.0/8"])
+    # Untrusted peers cannot pick their bucket with the header
+    assert client_ip(make_request("203.0.113.5", "198.51.100.1")) == (
+        "203.0.113.5"
+    )
+    assert client_ip(make_request("10.0.0.2", "198.51.100.1")) == (
+        "198.51.100.1"
+    )
+    # Entries left of the last untrusted one may be forged
+    assert client_ip(
+        make_request("10.0.0.2", "1.2.3.4, 198.51.100.1, 10.0.0.3")
+    ) == "198.51.100.1"
+    assert client_ip(make_request("10.0.0.2")) == "10.0.0.2"
+
+
+@pytest.mark.asyncio
+async def test_login_rate_limited_per_forwarded_ip(
+        monkeypatch, test_client: AsyncClient, test_session
+):
+    monkeypatch.setattr(settings, "TRUSTED_PROXIES", ["127.0.0.1"])
+    monkeypatch.setattr(ip_limiter, "burst", 1)
+    form = {"username": "johndoe", "password": "wrong"}
+    for address in ("198.51.100.1", "198.51.100.2"):
+        response = await test_client.post(
+            "/token", data=form, headers={"X-Forwarded-For": address}
+        )
+        assert response.status_code == 401
+    response = await test_client.post(
+        "/token", data=form, headers={"X-Forwarded-For": "198.51.100.1"}
+    )
+    assert response.status_code == 429
@@ -50,3 +50,42 @@ async def test_verify_no_token(test_client):
     response = await test_client.get('/me/')
     assert response.status_code == status.HTTP_401_UNAUTHORIZED
     assert response.json() == {"detail": "Not authenticated"}
+
+
+class FakeTimer:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.mark.asyncio
+async def test_verified_token_is_cached(monkeypatch):
+    from fast_python_api.auth import user_auth
+
+    token = generate_valid_token(username="cached")
+    decode = jwt.decode
+    calls = []
+
+    def counting_decode(*args, **kwargs):
+        calls.append(args[0])
+        return decode(*args, **kwargs)
+
+    exp = decode(
+        token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
+    )["exp"]
+    timer = FakeTimer()
+    timer.now = exp - 60
+    monkeypatch.setattr(user_auth.token_cache, "timer", timer)
+    monkeypatch.setattr(user_auth.token_cache, "ttl", float("inf"))
+    monkeypatch.setattr(user_auth.jwt, "decode", counting_decode)
+    first = await user_auth.verify_access_token(token)
+    second = await user_auth.verify_access_token(token)
+    assert first.username == second.username == "cached"
+    assert len(calls) == 1
+
+    # Past its exp the token is verified again, the entry is still live
+    timer.now = exp + 1
+    await user_auth.verify_access_token(token)
+    assert len(calls) == 2
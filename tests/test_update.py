@@ -1,5 +1,8 @@
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import event
+from fast_python_api.auth.hashing import verify_password
+from fast_python_api.models import Login
 from tests.test_token import generate_valid_token
 
 
@@ -208,3 +211,103 @@ async def test_update_without_access_token(
 #     )
 #     assert response.status_code == 200
 #     assert response.json()['login']['role'] == "admin"
+
+
+@pytest.mark.asyncio
+async def test_update_only_touches_changed_tables(
+        test_client: AsyncClient, test_session
+):
+    user_uuid = 'c647e0c3-d0fb-47fd-bbea-c61b3cd999dd'
+    statements = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement.split()[0])
+
+    connection = (await test_session.connection()).sync_connection
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        response = await test_client.put(
+            f"/users/{user_uuid}/", json={"city": "Chicago"},
+            headers=headers_admin
+        )
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+    assert response.status_code == 200
+    assert statements.count("UPDATE") == 1
+    assert "SELECT" not in statements
+    data = response.json()
+    assert data["city"] == "Chicago"
+    assert data["name"]["first_name"] == "Alice"
+    assert data["login"]["username"] == "alice_smith"
+
+
+@pytest.mark.asyncio
+async def test_update_duplicate_username_and_email(
+        test_client: AsyncClient, test_session
+):
+    user_uuid = 'c647e0c3-d0fb-47fd-bbea-c61b3cd999dd'
+    response = await test_client.put(
+        f"/users/{user_uuid}/", json={"login": {"username": "johndoe"}},
+        headers=headers_admin
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Username already taken"
+
+    response = await test_client.put(
+        f"/users/{user_uuid}/", json={"email": "testuser@example.com"},
+        headers=headers_admin
+    )
+    assert response.status_code == 400
+    assert response.json()["detail"] == "User with this email already exists"
+
+
+@pytest.mark.asyncio
+async def test_update_password_but_not_role(
+        test_client: AsyncClient, test_session
+):
+    user_uuid = 'c647e0c3-d0fb-47fd-bbea-c61b3cd999dd'
+    response = await test_client.put(
+        f"/users/{user_uuid}/",
+        json={"login": {"password": "changed", "role": "admin"}},
+        headers=headers_user
+    )
+    assert response.status_code == 200
+    assert response.json()["login"]["role"] == "user"
+
+    login = await test_session.get(Login, user_uuid)
+    await test_session.refresh(login)
+    assert verify_password("changed", login.password)
+
+
+@pytest.mark.asyncio
+async def test_update_hashes_password_before_writing(
+        monkeypatch, test_client: AsyncClient, test_session
+):
+    from fast_python_api.core import user_crud
+
+    user_uuid = 'c647e0c3-d0fb-47fd-bbea-c61b3cd999dd'
+    statements = []
+    written_before_hash = []
+
+    def record(conn, cursor, statement, *args):
+        statements.append(statement.split()[0])
+
+    async def get_password_hash_async(password):
+        written_before_hash.append("UPDATE" in statements)
+        return f"hashed-{password}"
+
+    monkeypatch.setattr(
+        user_crud, "get_password_hash_async", get_password_hash_async
+    )
+    connection = (await test_session.connection()).sync_connection
+    event.listen(connection, "before_cursor_execute", record)
+    try:
+        response = await test_client.put(
+            f"/users/{user_uuid}/",
+            json={"city": "Oslo", "login": {"password": "changed"}},
+            headers=headers_user
+        )
+    finally:
+        event.remove(connection, "before_cursor_execute", record)
+    assert response.status_code == 200
+    assert written_before_hash == [False]